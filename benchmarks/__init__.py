@@ -0,0 +1,4 @@
+"""
+Мікробенчмарки гарячих шляхів бота з порівнянням зі збереженим baseline.
+Запуск: python -m benchmarks --help
+"""
@@ -0,0 +1,68 @@
+"""
+Мікробенчмарки гарячих шляхів бота.
+
+    python -m benchmarks                 # прогін + порівняння з baseline
+    python -m benchmarks -k dispatch     # лише бенчмарки, що містять "dispatch"
+    python -m benchmarks --save          # перезаписати baseline поточними результатами
+    python -m benchmarks --fail-on-regression --threshold 1.2
+"""
+import argparse
+import json
+import os
+import sys
+
+from benchmarks import cases  # noqa: F401 — реєстрація бенчмарків
+from benchmarks.harness import CASES, compare, format_results, load_baseline, run_cases, save_baseline
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Мікробенчмарки гарячих шляхів бота")
+    parser.add_argument("-k", dest="keyword", help="Фільтр за підрядком у назві бенчмарка")
+    parser.add_argument("--rounds", type=int, default=5, help="Кількість раундів (за замовчуванням: 5)")
+    parser.add_argument("--min-time", type=float, default=0.05, help="Мінімальна тривалість раунду, с")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Файл baseline")
+    parser.add_argument("--save", action="store_true", help="Зберегти результати як новий baseline")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Регресія — медіана повільніша за baseline у N разів (за замовчуванням: 1.25)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Код виходу 1 при регресії")
+    parser.add_argument("--json", dest="json_path", help="Зберегти результати у JSON-файл")
+    args = parser.parse_args(argv)
+
+    selected = [name for name in CASES if not args.keyword or args.keyword in name]
+    if not selected:
+        print(f"Немає бенчмарків для фільтра {args.keyword!r}", file=sys.stderr)
+        return 2
+
+    results = run_cases(selected, rounds=args.rounds, min_time=args.min_time)
+
+    comparison = None
+    if not args.save and os.path.exists(args.baseline):
+        comparison = compare(results, load_baseline(args.baseline), args.threshold)
+    print(format_results(results, comparison))
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.save:
+        if args.keyword and os.path.exists(args.baseline):
+            # частковий прогін оновлює лише вибрані записи
+            merged = load_baseline(args.baseline).get("results", {})
+            merged.update(results)
+            results = merged
+        save_baseline(args.baseline, results)
+        print(f"\nBaseline збережено: {args.baseline}")
+        return 0
+
+    regressions = [row["name"] for row in comparison or [] if row["regression"]]
+    if regressions:
+        print(f"\n⚠ Регресії (≥ x{args.threshold}): {', '.join(regressions)}")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Бенчмарки гарячих шляхів бота (handlers/, webhook_bot): очищення тексту, клавіатури,
+налаштування користувача, десеріалізація апдейтів та повний dispatch
+через dp.feed_update з офлайн-сесією Telegram і заглушкою OpenAI.
+"""
+import itertools
+import json
+import os
+
+# Змінні середовища мають бути встановлені до імпорту config/webhook_bot
+os.environ["BOT_TOKEN"] = "123456:benchmark-token"
+os.environ["OPENAI_API_KEY"] = "sk-benchmark"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("TRACE_SAMPLE_RATE", "0")
+
+from aiogram.client.session.aiohttp import AiohttpSession  # noqa: E402
+from aiogram.types import Update  # noqa: E402
+
+import handlers  # noqa: E402
+import openai_service  # noqa: E402
+import webhook_bot  # noqa: E402
+from benchmarks.harness import benchmark  # noqa: E402
+from handlers import keyboards  # noqa: E402
+from loadtest.fake_telegram import fake_result  # noqa: E402
+from loadtest.scenarios import callback_update, message_update  # noqa: E402
+
+# Типова відповідь моделі: markdown, HTML-сутності, зайві пробіли (~2 КБ)
+AI_ANSWER = (
+    "**Асинхронне програмування** — це   підхід, де <i>операції</i> вводу-виводу &nbsp; не блокують потік.\n\n"
+    "1. Event loop керує корутинами;\n2. `await` віддає керування;\n3. <b>задачі</b> &amp; футури.\n\n"
+) * 12
+
+
+class OfflineSession(AiohttpSession):
+    """
+    Сесія без мережі: серіалізує запит і розбирає відповідь так само, як
+    AiohttpSession, але відповідь будується локально.
+    """
+
+    async def make_request(self, bot, method, timeout=None):
+        self.build_form_data(bot=bot, method=method)
+        params = {"chat_id": getattr(method, "chat_id", 0), "text": getattr(method, "text", None)}
+        content = json.dumps({"ok": True, "result": fake_result(method.__api_method__, params)})
+        return self.check_response(bot=bot, method=method, status_code=200, content=content).result
+
+
+class StubOpenAIService:
+    async def generate_text(self, prompt, system_message=None, task="ask", user_id=None):
+        return AI_ANSWER
+
+    async def ask(self, question, chat_id=None, user_id=None):
+        return AI_ANSWER
+
+    async def generate_creative_text(self, prompt, user_id=None):
+        return AI_ANSWER
+
+    generate_code = summarize_text = explain_concept = generate_creative_text
+
+    async def translate_text(self, text, target_language="українська", user_id=None):
+        return AI_ANSWER
+
+
+webhook_bot.bot.session = OfflineSession()
+openai_service.openai_service = StubOpenAIService()
+
+dp = webhook_bot.dp
+bot = webhook_bot.bot
+USER_ID = 4242
+
+START_UPDATE = Update.model_validate(message_update(USER_ID, "/start"))
+ECHO_UPDATE = Update.model_validate(message_update(USER_ID, "/echo привіт"))
+ASK_UPDATE = Update.model_validate(message_update(USER_ID, "/ask Що таке event loop?"))
+SETTINGS_UPDATE = Update.model_validate(callback_update(USER_ID, "settings"))
+VOICE_UPDATE = Update.model_validate(callback_update(USER_ID, "voice_nova"))
+FSM_ENTER_UPDATE = Update.model_validate(callback_update(USER_ID, "ask_ai"))
+FSM_TEXT_UPDATE = Update.model_validate(message_update(USER_ID, "Поясни event loop"))
+
+# DedupMiddleware пропускає повторний update_id, тож кожна ітерація dispatch
+# отримує свіжий ідентифікатор — інакше вимірювався б лише відсів дубліката
+_update_ids = itertools.count(10_000_000)
+
+
+def _fresh(update: Update) -> Update:
+    return update.model_copy(update={"update_id": next(_update_ids)})
+
+
+MESSAGE_JSON = json.dumps(message_update(USER_ID, "/ask Що таке event loop?"), ensure_ascii=False)
+CALLBACK_JSON = json.dumps(callback_update(USER_ID, "settings"), ensure_ascii=False)
+
+
+# ---------- Текст ----------
+
+@benchmark("text")
+def sanitize_ai_answer():
+    handlers.sanitize_telegram_text(AI_ANSWER)
+
+
+# ---------- Клавіатури ----------
+
+@benchmark("keyboards")
+def main_menu():
+    keyboards.get_main_menu()
+
+
+@benchmark("keyboards")
+def voice_selection_keyboard():
+    keyboards.get_voice_selection_keyboard()
+
+
+@benchmark("keyboards")
+def settings_menu_keyboard():
+    keyboards.get_settings_menu_keyboard()
+
+
+# ---------- Налаштування ----------
+
+@benchmark("settings")
+def user_settings_hit():
+    handlers.get_user_settings(USER_ID)
+
+
+# ---------- Десеріалізація ----------
+
+@benchmark("deserialize")
+def message_update_from_json():
+    Update.model_validate_json(MESSAGE_JSON)
+
+
+@benchmark("deserialize")
+def callback_update_from_json():
+    Update.model_validate_json(CALLBACK_JSON)
+
+
+# ---------- Повний dispatch ----------
+
+@benchmark("dispatch")
+async def dispatch_start():
+    await dp.feed_update(bot, _fresh(START_UPDATE))
+
+
+@benchmark("dispatch")
+async def dispatch_echo():
+    await dp.feed_update(bot, _fresh(ECHO_UPDATE))
+
+
+@benchmark("dispatch")
+async def dispatch_ask():
+    await dp.feed_update(bot, _fresh(ASK_UPDATE))
+
+
+@benchmark("dispatch")
+async def dispatch_settings_callback():
+    await dp.feed_update(bot, _fresh(SETTINGS_UPDATE))
+
+
+@benchmark("dispatch")
+async def dispatch_voice_callback():
+    await dp.feed_update(bot, _fresh(VOICE_UPDATE))
+
+
+@benchmark("dispatch")
+async def dispatch_fsm_ask_dialog():
+    await dp.feed_update(bot, _fresh(FSM_ENTER_UPDATE))
+    await dp.feed_update(bot, _fresh(FSM_TEXT_UPDATE))
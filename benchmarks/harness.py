@@ -0,0 +1,144 @@
+"""
+Мінімальний мікробенчмарк-раннер у стилі pytest-benchmark: калібрування
+кількості ітерацій, кілька раундів, медіана/мін/середнє на операцію та
+порівняння з збереженим baseline.
+"""
+import asyncio
+import inspect
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# name -> (group, callable)
+CASES: Dict[str, tuple] = {}
+
+
+def benchmark(group: str, name: Optional[str] = None):
+    """Реєструє функцію (sync або async, без аргументів) як бенчмарк"""
+
+    def decorator(fn: Callable) -> Callable:
+        CASES[name or fn.__name__] = (group, fn)
+        return fn
+
+    return decorator
+
+
+async def _run_async(fn: Callable, number: int) -> float:
+    started = time.perf_counter()
+    for _ in range(number):
+        await fn()
+    return time.perf_counter() - started
+
+
+def _run_sync(fn: Callable, number: int) -> float:
+    started = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return time.perf_counter() - started
+
+
+def measure(fn: Callable, loop: asyncio.AbstractEventLoop, rounds: int = 5, min_time: float = 0.05) -> Dict[str, Any]:
+    """
+    Підбирає кількість ітерацій так, щоб раунд тривав не менше min_time,
+    і повертає статистику часу однієї операції в мікросекундах.
+    """
+    if inspect.iscoroutinefunction(fn):
+        run = lambda number: loop.run_until_complete(_run_async(fn, number))  # noqa: E731
+    else:
+        run = lambda number: _run_sync(fn, number)  # noqa: E731
+
+    run(1)  # прогрів: ліниві імпорти, кеші pydantic
+    number = 1
+    while True:
+        elapsed = run(number)
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+
+    per_op = [run(number) / number * 1e6 for _ in range(rounds)]
+    return {
+        "median_us": round(statistics.median(per_op), 3),
+        "min_us": round(min(per_op), 3),
+        "mean_us": round(statistics.fmean(per_op), 3),
+        "stdev_us": round(statistics.stdev(per_op), 3) if rounds > 1 else 0.0,
+        "ops_per_s": round(1e6 / statistics.median(per_op), 1),
+        "rounds": rounds,
+        "iterations": number,
+    }
+
+
+def run_cases(selected: List[str], rounds: int = 5, min_time: float = 0.05) -> Dict[str, Dict[str, Any]]:
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        results = {}
+        for name in selected:
+            group, fn = CASES[name]
+            results[name] = {"group": group, **measure(fn, loop, rounds, min_time)}
+        return results
+    finally:
+        loop.close()
+
+
+def environment() -> Dict[str, str]:
+    """Опис середовища, в якому знято результати (baseline прив'язаний до машини)"""
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, Any]]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Порівнює медіани з baseline. Регресія — якщо поточна медіана
+    більша за baseline у `threshold` разів і більше.
+    """
+    rows = []
+    base_results = baseline.get("results", {})
+    for name, current in results.items():
+        base = base_results.get(name)
+        if base is None:
+            rows.append({"name": name, "ratio": None, "regression": False})
+            continue
+        ratio = current["median_us"] / base["median_us"] if base["median_us"] else float("inf")
+        rows.append({"name": name, "ratio": round(ratio, 3), "regression": ratio >= threshold})
+    return rows
+
+
+def format_results(results: Dict[str, Dict[str, Any]], comparison: Optional[List[Dict[str, Any]]] = None) -> str:
+    ratios = {row["name"]: row for row in comparison or []}
+    header = f"{'бенчмарк':<36}{'медіана, мкс':>14}{'мін, мкс':>12}{'ops/s':>14}"
+    if comparison is not None:
+        header += f"{'vs baseline':>14}"
+    lines = [header]
+    group = None
+    for name, result in sorted(results.items(), key=lambda item: (item[1]["group"], item[0])):
+        if result["group"] != group:
+            group = result["group"]
+            lines.append(f"[{group}]")
+        line = f"  {name:<34}{result['median_us']:>14}{result['min_us']:>12}{result['ops_per_s']:>14}"
+        if comparison is not None:
+            row = ratios.get(name, {})
+            if row.get("ratio") is None:
+                line += f"{'нове':>14}"
+            else:
+                mark = " ⚠" if row["regression"] else ""
+                line += f"{(row['ratio'] - 1) * 100:>+12.1f}%{mark}"
+        lines.append(line)
+    return "\n".join(lines)
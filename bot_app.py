@@ -0,0 +1,46 @@
+"""
+Збірка бота і диспетчера, спільна для polling і webhook: та сама сесія
+Bot API (таймаути, keep-alive, JSON-кодек профілю), те саме FSM-сховище,
+middleware і Router з хендлерами. Транспорт обирає точка входу.
+"""
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
+from aiohttp import ClientTimeout
+
+import handlers
+import loop_monitor
+import overload
+import perf_profile
+from config import BOT_TOKEN, DEDUP_ENABLED, METRICS_ENABLED, TELEGRAM_API_URL
+from middlewares import setup_metrics_middlewares, setup_tracing_middlewares
+from shared_state import create_fsm_storage
+from update_dedup import setup_dedup_middleware
+
+
+def create_bot(connection_limit: int = 100) -> Bot:
+    """Bot з налаштованою сесією (таймаути + keep-alive, пул з'єднань)"""
+    session = AiohttpSession(
+        api=TelegramAPIServer.from_base(TELEGRAM_API_URL) if TELEGRAM_API_URL else PRODUCTION,
+        timeout=ClientTimeout(total=None, connect=10, sock_read=180),
+        limit=connection_limit,
+        json_loads=perf_profile.json_loads,
+        json_dumps=perf_profile.json_dumps,
+    )
+    return Bot(token=BOT_TOKEN, session=session)
+
+
+def create_dispatcher() -> Dispatcher:
+    """Dispatcher зі спільним сховищем, middleware і хендлерами (один на процес)"""
+    dp = Dispatcher(storage=create_fsm_storage())
+    if DEDUP_ENABLED:
+        setup_dedup_middleware(dp)
+    setup_tracing_middlewares(dp)
+    if METRICS_ENABLED:
+        setup_metrics_middlewares(dp)
+    dp.startup.register(loop_monitor.on_startup)
+    dp.startup.register(overload.on_startup)
+    dp.shutdown.register(overload.on_shutdown)
+    dp.shutdown.register(loop_monitor.on_shutdown)
+    dp.include_router(handlers.router)
+    return dp
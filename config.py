@@ -1,14 +1,26 @@
 import os
-from dotenv import load_dotenv
 
-# Завантаження змінних середовища з .env файлу
-load_dotenv()
+# Завантаження змінних середовища з .env файлу.
+# python-dotenv імпортуємо лише коли .env справді існує (на Heroku змінні вже в оточенні),
+# і без find_dotenv(), який обходить стек викликів та дерево каталогів.
+for _env_file in (os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env'), os.path.join(os.getcwd(), '.env')):
+    if os.path.isfile(_env_file):
+        from dotenv import load_dotenv
+        load_dotenv(_env_file)
+        break
 
 # Конфігурація бота
 BOT_TOKEN = os.getenv('BOT_TOKEN', 'YOUR_BOT_TOKEN_HERE')
 
 # Налаштування логування
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')  # text або json
+LOG_SAMPLING = os.getenv('LOG_SAMPLING', '')  # наприклад: openai_service=0.1,aiohttp.access=0.05
+LOG_REDACT_PROMPTS = os.getenv('LOG_REDACT_PROMPTS', 'true').lower() in ('1', 'true', 'yes')
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+# Адреса Bot API (порожньо — api.telegram.org; для локального Bot API сервера або навантажувальних тестів)
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', '')
 
 # Налаштування бота
 BOT_USERNAME = os.getenv('BOT_USERNAME', '')
@@ -18,11 +30,79 @@ ADMIN_USER_ID = os.getenv('ADMIN_USER_ID', '')
 PARSE_MODE = 'HTML'  # Режим парсингу повідомлень
 DISABLE_WEB_PAGE_PREVIEW = True  # Відключити попередній перегляд веб-сторінок
 
+# Профіль продуктивності: default або fast (uvloop + orjson, якщо встановлені)
+PERF_PROFILE = os.getenv('PERF_PROFILE', 'default')
+
+# Налаштування polling (bot.py): апдейти чату обробляються по черзі, різних чатів — паралельно
+POLLING_WORKERS = int(os.getenv('POLLING_WORKERS', '32'))  # Кількість одночасно оброблюваних апдейтів
+POLLING_QUEUE_SIZE = int(os.getenv('POLLING_QUEUE_SIZE', '1000'))  # Максимум апдейтів у черзі до паузи getUpdates
+POLLING_LIMIT = int(os.getenv('POLLING_LIMIT', '100'))  # Апдейтів за один getUpdates (1-100)
+POLLING_TIMEOUT = int(os.getenv('POLLING_TIMEOUT', '25'))  # Long poll getUpdates, секунди
+POLLING_DRAIN_TIMEOUT = float(os.getenv('POLLING_DRAIN_TIMEOUT', '10'))  # Дообробка черги при зупинці, секунди
+
+# Справедлива черга дорогих задач (озвучка, зображення) між користувачами
+JOB_CAPACITY = int(os.getenv('JOB_CAPACITY', '16'))  # Сумарна вартість задач, що виконуються одночасно
+JOB_COSTS = os.getenv('JOB_COSTS', 'image=4,tts=1')  # Вартість задачі за типом
+JOB_USER_LIMITS = os.getenv('JOB_USER_LIMITS', 'image=1,tts=2')  # Одночасних задач одного користувача за типом
+JOB_USER_QUEUE = int(os.getenv('JOB_USER_QUEUE', '5'))  # Максимум задач у черзі користувача (понад — відмова)
+JOB_QUANTUM = int(os.getenv('JOB_QUANTUM', '4'))  # Кредит вартості користувача за один обхід round-robin
+
+# Монітор event loop: затримка і зависання зі стеком блокуючого коду
+LOOP_MONITOR_ENABLED = os.getenv('LOOP_MONITOR_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+LOOP_MONITOR_INTERVAL = float(os.getenv('LOOP_MONITOR_INTERVAL', '0.25'))  # Період виміру затримки, секунди
+LOOP_SLOW_THRESHOLD = float(os.getenv('LOOP_SLOW_THRESHOLD', '0.2'))  # Зависання довше — WARNING зі стеком (0 — без watchdog)
+
+# Профілювання на вимогу: /profile для ADMIN_USER_ID і HTTP-маршрут з токеном
+PROFILE_PATH = os.getenv('PROFILE_PATH', '/debug/profile')
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')  # Без токена HTTP-маршрут не реєструється
+PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', '60'))  # Максимальна тривалість сесії
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.005'))  # Період семплювання стеку, секунди
+
+# Ступінчаста деградація під перевантаженням (тиск: черги апдейтів і задач, затримка event loop)
+OVERLOAD_ENABLED = os.getenv('OVERLOAD_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+OVERLOAD_THRESHOLDS = os.getenv('OVERLOAD_THRESHOLDS', '0.5,0.6,0.7,0.8,0.9')  # Межі тиску для рівнів 1-5
+OVERLOAD_LAG_HIGH = float(os.getenv('OVERLOAD_LAG_HIGH', '0.5'))  # Затримка event loop (с), що означає тиск 1.0
+OVERLOAD_JOB_QUEUE_HIGH = int(os.getenv('OVERLOAD_JOB_QUEUE_HIGH', '100'))  # Задач у черзі JobScheduler, що означає тиск 1.0
+OVERLOAD_HYSTERESIS = float(os.getenv('OVERLOAD_HYSTERESIS', '0.8'))  # Рівень знімається, коли тиск < межа * це значення
+OVERLOAD_COOLDOWN = float(os.getenv('OVERLOAD_COOLDOWN', '10'))  # Мінімум секунд між пониженнями рівня
+OVERLOAD_INTERVAL = float(os.getenv('OVERLOAD_INTERVAL', '0.5'))  # Період вимірювань, секунди
+OVERLOAD_CHEAP_MODEL = os.getenv('OVERLOAD_CHEAP_MODEL', 'gpt-4o-mini')  # Дешевша модель для тексту з рівня 2
+OVERLOAD_MAX_TOKENS = int(os.getenv('OVERLOAD_MAX_TOKENS', '300'))  # Ліміт max_tokens з рівня 3
+
+# Придушення повторно доставлених апдейтів (за update_id)
+DEDUP_ENABLED = os.getenv('DEDUP_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+DEDUP_BACKEND = os.getenv('DEDUP_BACKEND', 'memory')  # memory або sqlite (спільний для кількох процесів)
+DEDUP_TTL = float(os.getenv('DEDUP_TTL', '3600'))  # Скільки секунд пам'ятати update_id
+DEDUP_MAX_SIZE = int(os.getenv('DEDUP_MAX_SIZE', '100000'))  # Максимум update_id у пам'яті
+DEDUP_SQLITE_PATH = os.getenv('DEDUP_SQLITE_PATH', 'dedup.sqlite3')
+
+# Стан бота (налаштування користувачів, FSM): memory або sqlite (спільний для кількох процесів)
+STATE_BACKEND = os.getenv('STATE_BACKEND', 'memory')
+STATE_SQLITE_PATH = os.getenv('STATE_SQLITE_PATH', 'bot_state.sqlite3')
+
 # Налаштування webhook
 WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', 'localhost')
 WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8080'))
 WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
 WEBHOOK_URL = os.getenv('WEBHOOK_URL', f'https://{WEBHOOK_HOST}')
+# Черга прийому апдейтів: webhook одразу відповідає 200, обробку веде пул воркерів (0 — без черги)
+WEBHOOK_QUEUE_SIZE = int(os.getenv('WEBHOOK_QUEUE_SIZE', '1000'))
+WEBHOOK_WORKERS = int(os.getenv('WEBHOOK_WORKERS', '32'))  # Кількість одночасно оброблюваних апдейтів
+WEBHOOK_QUEUE_OVERFLOW = os.getenv('WEBHOOK_QUEUE_OVERFLOW', 'reject')  # reject (503, Telegram повторить) або drop
+WEBHOOK_DRAIN_TIMEOUT = float(os.getenv('WEBHOOK_DRAIN_TIMEOUT', '10'))  # Дообробка черги при зупинці, секунди
+# Кількість процесів webhook-сервера на спільному порту (0 — за кількістю CPU); WEB_CONCURRENCY навмисно не читається
+WEBHOOK_PROCESSES = int(os.getenv('WEBHOOK_PROCESSES', '1'))
+WEBHOOK_PROCESS_MODE = os.getenv('WEBHOOK_PROCESS_MODE', 'auto')  # auto, reuseport (SO_REUSEPORT) або prefork (спільний сокет)
+
+# Налаштування метрик (Prometheus endpoint на webhook сервері)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+METRICS_PATH = os.getenv('METRICS_PATH', '/metrics')
+
+# Налаштування трасування (частка апдейтів у вибірці: 0 — вимкнено, 1 — всі)
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+TRACE_EXPORT = os.getenv('TRACE_EXPORT', 'file')  # file або otlp
+TRACE_FILE_PATH = os.getenv('TRACE_FILE_PATH', 'traces.jsonl')
+TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
 
 # Налаштування ngrok
 NGROK_AUTH_TOKEN = os.getenv('NGROK_AUTH_TOKEN', '')  # Отримайте з https://dashboard.ngrok.com/get-started/your-authtoken
@@ -30,10 +110,47 @@ NGROK_REGION = os.getenv('NGROK_REGION', 'us')  # us, eu, ap, au, sa, jp, in
 
 # Налаштування OpenAI
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')  # Отримайте з https://platform.openai.com/api-keys
+OPENAI_API_KEYS = os.getenv('OPENAI_API_KEYS', '')  # Пул ключів через кому: "ключ", "ключ@org-id", "ім'я=ключ@org-id"
+OPENAI_KEY_COOLDOWN = float(os.getenv('OPENAI_KEY_COOLDOWN', '20'))  # Охолодження ключа після 429, секунди
+OPENAI_CONFIGURED = bool(OPENAI_API_KEY or OPENAI_API_KEYS)
+# Темп запитів за заголовками x-ratelimit-* (openai_keys.py)
+RATE_LIMIT_SOFT_HEADROOM = float(os.getenv('RATE_LIMIT_SOFT_HEADROOM', '0.2'))  # Нижче цієї частки ліміту — рівномірний темп (0 — вимкнено)
+RATE_LIMIT_MAX_WAIT = float(os.getenv('RATE_LIMIT_MAX_WAIT', '10'))  # Найдовша пауза перед запитом, секунди
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1')  # Базова адреса API (проксі або локальна заглушка)
 OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')  # Модель для генерації тексту
 OPENAI_MAX_TOKENS = int(os.getenv('OPENAI_MAX_TOKENS', '1000'))  # Максимальна кількість токенів
 OPENAI_TEMPERATURE = float(os.getenv('OPENAI_TEMPERATURE', '0.7'))  # Температура для генерації
 
+# Адаптивний max_tokens: бюджет відповіді за командою і довжиною входу (token_budget.py)
+TOKEN_BUDGET_ENABLED = os.getenv('TOKEN_BUDGET_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+TOKEN_BUDGET_PERCENTILE = float(os.getenv('TOKEN_BUDGET_PERCENTILE', '0.99'))  # Перцентиль фактичних довжин відповідей
+TOKEN_BUDGET_MARGIN = float(os.getenv('TOKEN_BUDGET_MARGIN', '1.2'))  # Запас над перцентилем
+TOKEN_BUDGET_MIN = int(os.getenv('TOKEN_BUDGET_MIN', '64'))  # Нижня межа бюджету, токени
+TOKEN_BUDGET_WINDOW = int(os.getenv('TOKEN_BUDGET_WINDOW', '500'))  # Останніх відповідей у вікні на команду
+TOKEN_BUDGET_MIN_SAMPLES = int(os.getenv('TOKEN_BUDGET_MIN_SAMPLES', '20'))  # До цього — OPENAI_MAX_TOKENS
+
+# Пам'ять розмови для /ask (conversation_memory.py); сховище — STATE_BACKEND
+CONVERSATION_MEMORY_ENABLED = os.getenv('CONVERSATION_MEMORY_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+CONVERSATION_WINDOW_TOKENS = int(os.getenv('CONVERSATION_WINDOW_TOKENS', '1500'))  # Бюджет токенів історії в запиті
+CONVERSATION_MAX_TURNS = int(os.getenv('CONVERSATION_MAX_TURNS', '20'))  # Реплік у буфері чату
+CONVERSATION_COMPACT_AFTER = int(os.getenv('CONVERSATION_COMPACT_AFTER', '12'))  # Понад стільки реплік — стискати старші
+CONVERSATION_KEEP_TURNS = int(os.getenv('CONVERSATION_KEEP_TURNS', '4'))  # Останніх реплік, що лишаються дослівно
+CONVERSATION_MEMORY_SIZE = int(os.getenv('CONVERSATION_MEMORY_SIZE', '10000'))  # Розмов у пам'яті процесу (memory)
+
+# Пам'ять перекладів для /translate (translation_memory.py); сховище — STATE_BACKEND
+TRANSLATION_MEMORY_ENABLED = os.getenv('TRANSLATION_MEMORY_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+TRANSLATION_MEMORY_FUZZY = os.getenv('TRANSLATION_MEMORY_FUZZY', 'false').lower() in ('1', 'true', 'yes')  # Збіг без регістру і розділових знаків
+TRANSLATION_MEMORY_SIZE = int(os.getenv('TRANSLATION_MEMORY_SIZE', '10000'))  # Сегментів у пам'яті процесу (memory)
+
+# Маршрутизація текстових запитів між моделями (model_router.py)
+MODEL_ROUTING_ENABLED = os.getenv('MODEL_ROUTING_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+MODEL_FAST = os.getenv('MODEL_FAST', 'gpt-4o-mini')  # Найшвидша модель для коротких запитів
+MODEL_STRONG = os.getenv('MODEL_STRONG', 'gpt-4o')  # Сильніша модель для коду і довгих текстів
+MODEL_ROUTES = os.getenv('MODEL_ROUTES', '')  # Власна таблиця маршрутів у JSON (порожньо — вбудована)
+# Ціни USD за 1M токенів (вхід/вихід) для оцінки вартості маршрутів
+MODEL_PRICES = os.getenv('MODEL_PRICES', 'gpt-4o-mini=0.15/0.6,gpt-4o=2.5/10,gpt-3.5-turbo=0.5/1.5')
+PREMIUM_USER_IDS = {uid.strip() for uid in os.getenv('PREMIUM_USER_IDS', '').split(',') if uid.strip()}  # Рівень premium
+
 # Налаштування OpenAI для TTS (озвучка)
 OPENAI_TTS_MODEL = os.getenv('OPENAI_TTS_MODEL', 'tts-1')  # Модель для генерації озвучки
 OPENAI_TTS_VOICE = os.getenv('OPENAI_TTS_VOICE', 'alloy')  # Голос для озвучки (alloy, echo, fable, onyx, nova, shimmer)
@@ -48,5 +165,5 @@ OPENAI_IMAGE_QUALITY = os.getenv('OPENAI_IMAGE_QUALITY', 'auto')  # Якість
 if BOT_TOKEN == 'YOUR_BOT_TOKEN_HERE':
     print("⚠️  УВАГА: Встановіть BOT_TOKEN у змінних середовища або .env файлі!")
 
-if not OPENAI_API_KEY:
-    print("⚠️  УВАГА: Встановіть OPENAI_API_KEY у змінних середовища або .env файлі!")
+if not OPENAI_CONFIGURED:
+    print("⚠️  УВАГА: Встановіть OPENAI_API_KEY (або OPENAI_API_KEYS) у змінних середовища або .env файлі!")
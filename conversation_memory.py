@@ -0,0 +1,241 @@
+"""
+Пам'ять розмови для /ask: історія з вікном контексту в межах бюджету токенів.
+
+Історія окрема для кожного користувача в кожному чаті (chat_id, user_id):
+у групі питання й відповіді одного учасника не потрапляють у контекст
+іншого, а /reset забуває лише власну розмову.
+Кожна розмова має обмежений буфер останніх реплік (CONVERSATION_MAX_TURNS) і
+підсумок усього, що було раніше. До запиту додається вікно: підсумок і
+найновіші репліки, доки вони вміщуються в CONVERSATION_WINDOW_TOKENS, тож
+розмір промпту не росте разом з розмовою і користувачам не треба
+вставляти попередній контекст знову.
+Коли в буфері стає понад CONVERSATION_COMPACT_AFTER реплік, старші за
+останні CONVERSATION_KEEP_TURNS у фоні стискаються моделлю в новий
+підсумок (разом з попереднім) — відповідь користувачу на це не чекає.
+
+Сховище — як і для налаштувань (shared_state): STATE_BACKEND=memory (LRU на
+CONVERSATION_MEMORY_SIZE розмов у процесі) або sqlite, спільний для всіх
+процесів файл STATE_SQLITE_PATH.
+"""
+import json
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+import metrics
+from config import (
+    CONVERSATION_COMPACT_AFTER, CONVERSATION_KEEP_TURNS, CONVERSATION_MAX_TURNS, CONVERSATION_MEMORY_ENABLED,
+    CONVERSATION_MEMORY_SIZE, CONVERSATION_WINDOW_TOKENS, STATE_BACKEND, STATE_SQLITE_PATH,
+)
+from model_router import estimate_tokens
+from shared_state import SqliteExecutor
+
+logger = logging.getLogger(__name__)
+
+WINDOW_TOKENS = metrics.REGISTRY.histogram(
+    "bot_conversation_window_tokens", "Оцінка токенів історії, доданої до запиту /ask",
+    buckets=(0, 64, 128, 256, 512, 1024, 2048, 4096),
+)
+COMPACTIONS = metrics.REGISTRY.counter(
+    "bot_conversation_compactions_total", "Стискання старих реплік у підсумок", ("status",),
+)
+
+_SUMMARY_PREFIX = "Підсумок попередньої розмови з користувачем: "
+
+# (chat_id, user_id)
+ConversationKey = Tuple[int, int]
+
+
+@dataclass
+class Turn:
+    role: str  # user або assistant
+    text: str
+    tokens: int
+
+
+@dataclass
+class Conversation:
+    summary: str = ""
+    turns: List[Turn] = field(default_factory=list)
+
+    def to_json(self) -> str:
+        return json.dumps({"summary": self.summary, "turns": [[t.role, t.text, t.tokens] for t in self.turns]},
+                          ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "Conversation":
+        data = json.loads(raw)
+        return cls(data.get("summary", ""), [Turn(*turn) for turn in data.get("turns", [])])
+
+
+class MemoryConversationStore:
+    """Розмови у словнику процесу (повертає живі об'єкти), найдавніше використані витісняються"""
+
+    def __init__(self, size: int = 10000):
+        self.size = size
+        self._conversations: "OrderedDict[ConversationKey, Conversation]" = OrderedDict()
+
+    async def load(self, key: ConversationKey) -> Conversation:
+        conversation = self._conversations.get(key)
+        if conversation is None:
+            return Conversation()
+        self._conversations.move_to_end(key)
+        return conversation
+
+    async def save(self, key: ConversationKey, conversation: Conversation) -> None:
+        self._conversations[key] = conversation
+        self._conversations.move_to_end(key)
+        while len(self._conversations) > self.size:
+            self._conversations.popitem(last=False)
+
+    async def delete(self, key: ConversationKey) -> None:
+        self._conversations.pop(key, None)
+
+
+class SqliteConversationStore:
+    """Розмови у спільній таблиці SQLite (JSON на чат і користувача); запити — у потоці, поза event loop"""
+
+    def __init__(self, path: str):
+        self._db = SqliteExecutor(path)
+        self._db.conn.execute(
+            "CREATE TABLE IF NOT EXISTS conversation_memory "
+            "(chat_id INTEGER NOT NULL, user_id INTEGER NOT NULL, data TEXT NOT NULL, PRIMARY KEY (chat_id, user_id))"
+        )
+
+    def _fetch(self, key: ConversationKey) -> Optional[str]:
+        row = self._db.conn.execute(
+            "SELECT data FROM conversation_memory WHERE chat_id = ? AND user_id = ?", key,
+        ).fetchone()
+        return row[0] if row else None
+
+    def _upsert(self, key: ConversationKey, data: str) -> None:
+        self._db.conn.execute(
+            "INSERT INTO conversation_memory (chat_id, user_id, data) VALUES (?, ?, ?) "
+            "ON CONFLICT(chat_id, user_id) DO UPDATE SET data = excluded.data",
+            (*key, data),
+        )
+
+    def _remove(self, key: ConversationKey) -> None:
+        self._db.conn.execute("DELETE FROM conversation_memory WHERE chat_id = ? AND user_id = ?", key)
+
+    async def load(self, key: ConversationKey) -> Conversation:
+        raw = await self._db.run(self._fetch, key)
+        return Conversation.from_json(raw) if raw else Conversation()
+
+    async def save(self, key: ConversationKey, conversation: Conversation) -> None:
+        await self._db.run(self._upsert, key, conversation.to_json())
+
+    async def delete(self, key: ConversationKey) -> None:
+        await self._db.run(self._remove, key)
+
+
+def create_conversation_store(backend: str = STATE_BACKEND, path: str = STATE_SQLITE_PATH,
+                              size: int = CONVERSATION_MEMORY_SIZE):
+    return SqliteConversationStore(path) if backend == "sqlite" else MemoryConversationStore(size)
+
+
+# (попередній підсумок, репліки) -> новий підсумок
+Summarizer = Callable[[str, List[Turn]], Awaitable[str]]
+
+
+class ConversationMemory:
+    """
+    Args:
+        store: Сховище розмов (load/save/delete)
+        summarizer: Корутина, що стискає старі репліки в підсумок
+        window_tokens: Бюджет токенів історії в одному запиті
+        max_turns: Скільки реплік тримати в буфері
+        compact_after: З якої кількості реплік стискати старші в підсумок
+        keep_turns: Скільки останніх реплік лишати дослівно при стисканні
+    """
+
+    def __init__(self, store, summarizer: Optional[Summarizer] = None, window_tokens: int = 1500,
+                 max_turns: int = 20, compact_after: int = 12, keep_turns: int = 4):
+        self.store = store
+        self.summarizer = summarizer
+        self.window_tokens = window_tokens
+        self.max_turns = max_turns
+        self.compact_after = compact_after
+        self.keep_turns = keep_turns
+        self._compacting: Set[ConversationKey] = set()
+
+    async def window(self, chat_id: int, user_id: int) -> List[dict]:
+        """Повідомлення історії для Chat Completions: підсумок і найновіші репліки в межах бюджету"""
+        conversation = await self.store.load((chat_id, user_id))
+        used = estimate_tokens(conversation.summary) if conversation.summary else 0
+        recent: List[dict] = []
+        for turn in reversed(conversation.turns):
+            if used + turn.tokens > self.window_tokens:
+                break
+            recent.append({"role": turn.role, "content": turn.text})
+            used += turn.tokens
+        recent.reverse()
+        if conversation.summary:
+            recent.insert(0, {"role": "system", "content": _SUMMARY_PREFIX + conversation.summary})
+        WINDOW_TOKENS.observe(used)
+        return recent
+
+    async def add_exchange(self, chat_id: int, user_id: int, question: str, answer: str) -> None:
+        """Запам'ятовує питання й відповідь; за потреби запускає фонове стискання"""
+        key = (chat_id, user_id)
+        conversation = await self.store.load(key)
+        conversation.turns.append(Turn("user", question, estimate_tokens(question)))
+        conversation.turns.append(Turn("assistant", answer, estimate_tokens(answer)))
+        # буфер обмежений: найстаріші репліки, що не встигли стиснутись, відкидаються
+        del conversation.turns[:-self.max_turns]
+        await self.store.save(key, conversation)
+        if len(conversation.turns) > self.compact_after and self.summarizer is not None \
+                and key not in self._compacting:
+            self._compacting.add(key)
+            metrics.track_task(self._compact(key), "conversation_compact")
+
+    async def clear(self, chat_id: int, user_id: int) -> None:
+        await self.store.delete((chat_id, user_id))
+
+    async def _compact(self, key: ConversationKey) -> None:
+        try:
+            conversation = await self.store.load(key)
+            old = conversation.turns[:-self.keep_turns] if self.keep_turns else list(conversation.turns)
+            if not old:
+                return
+            summary = await self.summarizer(conversation.summary, old)
+            # поки модель відповідала, могли додатись репліки або історію очистили
+            conversation = await self.store.load(key)
+            if conversation.turns[:len(old)] != old:
+                COMPACTIONS.labels("stale").inc()
+                return
+            conversation.summary = summary.strip()
+            conversation.turns = conversation.turns[len(old):]
+            await self.store.save(key, conversation)
+            COMPACTIONS.labels("ok").inc()
+        except Exception as e:
+            COMPACTIONS.labels("error").inc()
+            logger.warning("Не вдалося стиснути історію розмови %s: %s", key, e)
+        finally:
+            self._compacting.discard(key)
+
+
+async def _summarize_with_openai(summary: str, turns: List[Turn]) -> str:
+    # сервіс імпортується тут: він сам використовує пам'ять розмов
+    from openai_service import get_openai_service
+
+    return await get_openai_service().summarize_history(summary, [(turn.role, turn.text) for turn in turns])
+
+
+_conversation_memory: Optional[ConversationMemory] = None
+
+
+def get_conversation_memory() -> Optional[ConversationMemory]:
+    """Отримати глобальну пам'ять розмов (None — вимкнено CONVERSATION_MEMORY_ENABLED)"""
+    global _conversation_memory
+    if _conversation_memory is None and CONVERSATION_MEMORY_ENABLED:
+        _conversation_memory = ConversationMemory(
+            create_conversation_store(),
+            summarizer=_summarize_with_openai,
+            window_tokens=CONVERSATION_WINDOW_TOKENS,
+            max_turns=CONVERSATION_MAX_TURNS,
+            compact_after=CONVERSATION_COMPACT_AFTER,
+            keep_turns=CONVERSATION_KEEP_TURNS,
+        )
+    return _conversation_memory
@@ -0,0 +1,30 @@
+"""
+Хендлери бота як aiogram Router — один набір для обох транспортів:
+polling (bot.py) і webhook (webhook_bot.py). Фонові задачі TTS/зображень,
+ретраї доставки, налаштування користувачів — теж спільні.
+
+Порядок підключення важливий: команди спрацьовують навіть у стані FSM,
+стани — раніше за обробник звичайного тексту. Адмін-команди — першими:
+для інших користувачів їх фільтр не проходить і апдейт іде далі.
+"""
+from aiogram import Router
+
+from handlers import admin, callbacks, commands, fallback, inputs
+from handlers.common import (
+    UserStates, get_user_settings, load_user_settings, sanitize_telegram_text, save_user_setting, update_user_setting,
+    user_settings,
+)
+
+router = Router(name="handlers")
+router.include_routers(admin.router, commands.router, callbacks.router, inputs.router, fallback.router)
+
+__all__ = [
+    "router",
+    "UserStates",
+    "get_user_settings",
+    "load_user_settings",
+    "sanitize_telegram_text",
+    "save_user_setting",
+    "update_user_setting",
+    "user_settings",
+]
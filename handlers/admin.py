@@ -0,0 +1,65 @@
+"""
+Команди адміністратора (ADMIN_USER_ID): діагностика живого процесу.
+Для інших користувачів команди не існують — апдейт іде далі по роутерах.
+"""
+import html
+import logging
+
+from aiogram import Bot, F, Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import BufferedInputFile, Message
+
+import metrics
+from config import ADMIN_USER_ID
+from handlers.delivery import edit_message_with_retry, send_document_with_retry
+from profiler import ProfilerBusy, get_profiler, parse_args
+
+logger = logging.getLogger(__name__)
+
+router = Router(name="admin")
+router.message.filter(F.from_user.id.func(lambda user_id: bool(ADMIN_USER_ID) and str(user_id) == ADMIN_USER_ID))
+
+# Telegram обмежує повідомлення 4096 символами
+_TOP_LIMIT = 3500
+
+
+async def _profile_job(bot: Bot, chat_id: int, status_message_id: int, seconds: float, mode: str) -> None:
+    try:
+        result = await get_profiler().profile(seconds, mode)
+    except ProfilerBusy as e:
+        await edit_message_with_retry(bot, chat_id, status_message_id, f"⏳ {e}")
+        return
+    except Exception as e:
+        logger.exception("Помилка профілювання")
+        await edit_message_with_retry(bot, chat_id, status_message_id, f"❌ Помилка профілювання: {e}")
+        return
+
+    await edit_message_with_retry(
+        bot, chat_id, status_message_id,
+        f"✅ Профіль {result.mode} за {result.seconds:g} с ({result.samples} семплів)\n\n"
+        f"<pre>{html.escape(result.top[:_TOP_LIMIT])}</pre>",
+        parse_mode="HTML",
+    )
+    await send_document_with_retry(
+        bot, chat_id, BufferedInputFile(result.data, filename=result.filename),
+        caption="collapsed stacks для flamegraph.pl / speedscope" if result.mode == "sample"
+        else "pstats: python -m pstats або snakeviz",
+    )
+
+
+@router.message(Command("profile"))
+async def profile_handler(message: Message, command: CommandObject, bot: Bot) -> None:
+    """/profile [секунди] [sample|cprofile] — профілювання процесу, результат документом"""
+    try:
+        seconds, mode = parse_args(command.args or "")
+    except ValueError as e:
+        await message.answer(f"❌ {e}\nВикористання: /profile [секунди] [sample|cprofile]")
+        return
+    profiler = get_profiler()
+    if profiler.busy:
+        await message.answer("⏳ Профілювання вже триває")
+        return
+    seconds = min(seconds, profiler.max_seconds)
+    status = await message.answer(f"🔬 Профілюю ({mode}) {seconds:g} с...")
+    # профілюємо у фоні: смуга чату адміністратора не блокується на весь час сесії
+    metrics.track_task(_profile_job(bot, message.chat.id, status.message_id, seconds, mode), "profile")
@@ -0,0 +1,274 @@
+"""
+Callback'и inline-меню: вибір функції (з переходом у стан FSM) і налаштування.
+Усі відповіді — через safe_edit_message.
+"""
+from aiogram import F, Router
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
+
+from config import OPENAI_CONFIGURED
+from handlers.common import UserStates, save_user_setting
+from handlers.delivery import safe_edit_message
+from handlers.keyboards import (
+    get_back_to_menu_keyboard, get_image_quality_keyboard, get_image_size_keyboard, get_main_menu,
+    get_settings_menu_keyboard, get_speed_selection_keyboard, get_voice_selection_keyboard,
+)
+
+router = Router(name="callbacks")
+
+
+@router.callback_query(F.data == "back_to_menu")
+async def back_to_menu_callback(callback: CallbackQuery, state: FSMContext):
+    await state.clear()
+    openai_status = "✅ Підключено" if OPENAI_CONFIGURED else "❌ Не підключено"
+    welcome_text = (
+        f"Привіт, {callback.from_user.first_name}! 👋\n\n"
+        f"Я розумний телеграм бот з функціями OpenAI.\n"
+        f"Оберіть функцію з меню нижче:\n\n"
+        f"OpenAI: {openai_status}"
+    )
+    await safe_edit_message(callback, welcome_text, "HTML", get_main_menu())
+
+
+@router.callback_query(F.data == "ask_ai")
+async def ask_ai_callback(callback: CallbackQuery, state: FSMContext):
+    text = (
+        "🤖 <b>Запитати AI</b>\n\n"
+        "Напишіть ваш запит, і я відповім на нього за допомогою штучного інтелекту.\n\n"
+        "Приклад: Що таке машинне навчання?"
+    )
+    success = await safe_edit_message(callback, text, "HTML", get_back_to_menu_keyboard())
+    if success:
+        await state.set_state(UserStates.waiting_for_text)
+
+
+@router.callback_query(F.data == "creative")
+async def creative_callback(callback: CallbackQuery, state: FSMContext):
+    text = (
+        "✨ <b>Креативне письмо</b>\n\n"
+        "Опишіть тему або жанр, і я створю креативний текст.\n\n"
+        "Приклад: Напиши вірш про зиму"
+    )
+    success = await safe_edit_message(callback, text, "HTML", get_back_to_menu_keyboard())
+    if success:
+        await state.set_state(UserStates.waiting_for_creative_prompt)
+
+
+@router.callback_query(F.data == "code")
+async def code_callback(callback: CallbackQuery, state: FSMContext):
+    text = (
+        "💻 <b>Генерація коду</b>\n\n"
+        "Опишіть, який код потрібно згенерувати.\n\n"
+        "Приклад: Створи функцію сортування масиву"
+    )
+    success = await safe_edit_message(callback, text, "HTML", get_back_to_menu_keyboard())
+    if success:
+        await state.set_state(UserStates.waiting_for_code_prompt)
+
+
+@router.callback_query(F.data == "translate")
+async def translate_callback(callback: CallbackQuery, state: FSMContext):
+    text = (
+        "🌐 <b>Переклад тексту</b>\n\n"
+        "Напишіть текст, який потрібно перекласти.\n\n"
+        "Приклад: Hello world"
+    )
+    success = await safe_edit_message(callback, text, "HTML", get_back_to_menu_keyboard())
+    if success:
+        await state.set_state(UserStates.waiting_for_translate_text)
+
+
+@router.callback_query(F.data == "summarize")
+async def summarize_callback(callback: CallbackQuery, state: FSMContext):
+    text = (
+        "📝 <b>Резюме тексту</b>\n\n"
+        "Надішліть текст, який потрібно резюмувати.\n\n"
+        "Приклад: [ваш довгий текст]"
+    )
+    success = await safe_edit_message(callback, text, "HTML", get_back_to_menu_keyboard())
+    if success:
+        await state.set_state(UserStates.waiting_for_summarize_text)
+
+
+@router.callback_query(F.data == "explain")
+async def explain_callback(callback: CallbackQuery, state: FSMContext):
+    text = (
+        "💡 <b>Пояснення концепції</b>\n\n"
+        "Напишіть концепцію або термін, який потрібно пояснити.\n\n"
+        "Приклад: Що таке машинне навчання?"
+    )
+    success = await safe_edit_message(callback, text, "HTML", get_back_to_menu_keyboard())
+    if success:
+        await state.set_state(UserStates.waiting_for_explain_concept)
+
+
+@router.callback_query(F.data == "tts")
+async def tts_callback(callback: CallbackQuery, state: FSMContext):
+    text = (
+        "🎤 <b>Озвучка тексту</b>\n\n"
+        "Напишіть текст для озвучування.\n\n"
+        "Приклад: Привіт, як справи?"
+    )
+    success = await safe_edit_message(callback, text, "HTML", get_back_to_menu_keyboard())
+    if success:
+        await state.set_state(UserStates.waiting_for_tts_text)
+
+
+@router.callback_query(F.data == "image")
+async def image_callback(callback: CallbackQuery, state: FSMContext):
+    text = (
+        "🖼️ <b>Генерація зображення</b>\n\n"
+        "Опишіть зображення, яке потрібно згенерувати.\n\n"
+        "Приклад: Кіт, що грає з м'ячем"
+    )
+    success = await safe_edit_message(callback, text, "HTML", get_back_to_menu_keyboard())
+    if success:
+        await state.set_state(UserStates.waiting_for_image_prompt)
+
+
+@router.callback_query(F.data == "help")
+async def help_callback(callback: CallbackQuery):
+    help_text = """
+🤖 <b>Доступні функції:</b>
+
+<b>Основні функції:</b>
+🤖 Запитати AI - запитати щось у штучного інтелекту
+✨ Креативне письмо - створення креативних текстів
+💻 Генерація коду - створення коду на різних мовах
+🌐 Переклад - переклад тексту на різні мови
+📝 Резюме тексту - створення коротких резюме
+💡 Пояснення - пояснення складних концепцій
+🎤 Озвучка (TTS) - перетворення тексту в мову
+🖼️ Генерація зображень - створення зображень за описом
+
+<b>Як користуватися:</b>
+1. Натисніть на потрібну функцію в меню
+2. Введіть текст згідно з інструкціями
+3. Отримайте результат
+
+<b>Команди:</b>
+/start - головне меню
+/help - ця допомога
+    """
+    await safe_edit_message(callback, help_text, "HTML", get_back_to_menu_keyboard())
+
+
+@router.callback_query(F.data == "info")
+async def info_callback(callback: CallbackQuery):
+    openai_status = "✅ Підключено" if OPENAI_CONFIGURED else "❌ Не підключено"
+    info_text = f"""
+📊 <b>Інформація про бота:</b>
+
+• Назва: Розумний Telegram Bot з OpenAI
+• Версія: 2.0
+• Основні функції: 8 функцій
+• Мова: Python
+• Бібліотека: aiogram 3.13
+• OpenAI: {openai_status}
+
+<b>Цей бот надає:</b>
+1. Інтеграцію з OpenAI для розумних відповідей
+2. Креативне письмо та генерацію коду
+3. Переклад та резюмування тексту
+4. Пояснення складних концепцій
+5. Генерацію озвучки (TTS)
+6. Генерацію зображень (DALL-E)
+    """
+    await safe_edit_message(callback, info_text, "HTML", get_back_to_menu_keyboard())
+
+
+@router.callback_query(F.data == "settings")
+async def settings_callback(callback: CallbackQuery):
+    text = "⚙️ <b>Налаштування</b>\n\nОберіть параметр для зміни:"
+    await safe_edit_message(callback, text, "HTML", get_settings_menu_keyboard())
+
+
+@router.callback_query(F.data == "settings_voice")
+async def settings_voice_callback(callback: CallbackQuery):
+    text = "🎤 <b>Налаштування голосу TTS</b>\n\nОберіть голос для озвучування:"
+    await safe_edit_message(callback, text, "HTML", get_voice_selection_keyboard())
+
+
+@router.callback_query(F.data == "settings_speed")
+async def settings_speed_callback(callback: CallbackQuery):
+    text = "⚡ <b>Налаштування швидкості TTS</b>\n\nОберіть швидкість озвучування:"
+    await safe_edit_message(callback, text, "HTML", get_speed_selection_keyboard())
+
+
+@router.callback_query(F.data == "settings_image_size")
+async def settings_image_size_callback(callback: CallbackQuery):
+    text = "📐 <b>Налаштування розміру зображення</b>\n\nОберіть розмір для генерації зображень:"
+    await safe_edit_message(callback, text, "HTML", get_image_size_keyboard())
+
+
+@router.callback_query(F.data == "settings_image_quality")
+async def settings_image_quality_callback(callback: CallbackQuery):
+    text = "🎨 <b>Налаштування якості зображення</b>\n\nОберіть якість для генерації зображень:"
+    await safe_edit_message(callback, text, "HTML", get_image_quality_keyboard())
+
+
+@router.callback_query(F.data.startswith("voice_"))
+async def voice_selection_callback(callback: CallbackQuery):
+    voice = callback.data.replace("voice_", "")
+    user_id = callback.from_user.id
+    await save_user_setting(user_id, "voice", voice)
+    text = (
+        f"✅ <b>Голос змінено на: {voice.title()}</b>\n\n"
+        f"Тепер всі озвучки будуть використовувати голос <b>{voice}</b>"
+    )
+    await safe_edit_message(callback, text, "HTML", get_voice_selection_keyboard())
+
+
+@router.callback_query(F.data == "speed_custom")
+async def speed_custom_callback(callback: CallbackQuery, state: FSMContext):
+    text = (
+        "⚡ <b>Введіть власну швидкість</b>\n\n"
+        "Введіть число від 0.25 до 4.0 (наприклад: 1.5):"
+    )
+    kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="🔙 Назад", callback_data="settings_speed")]])
+    success = await safe_edit_message(callback, text, "HTML", kb)
+    if success:
+        await state.set_state(UserStates.waiting_for_speed_setting)
+
+
+@router.callback_query(F.data.startswith("speed_"))
+async def speed_selection_callback(callback: CallbackQuery):
+    speed_str = callback.data.replace("speed_", "")
+    try:
+        speed = float(speed_str)
+        user_id = callback.from_user.id
+        await save_user_setting(user_id, "speed", speed)
+        text = (
+            f"✅ <b>Швидкість змінено на: {speed}x</b>\n\n"
+            f"Тепер всі озвучки будуть використовувати швидкість <b>{speed}x</b>"
+        )
+        await safe_edit_message(callback, text, "HTML", get_speed_selection_keyboard())
+    except ValueError:
+        try:
+            await callback.answer("❌ Невірний формат швидкості")
+        except Exception:
+            pass
+
+
+@router.callback_query(F.data.startswith("size_"))
+async def image_size_selection_callback(callback: CallbackQuery):
+    size = callback.data.replace("size_", "")
+    user_id = callback.from_user.id
+    await save_user_setting(user_id, "image_size", size)
+    text = (
+        f"✅ <b>Розмір зображення змінено на: {size}</b>\n\n"
+        f"Тепер всі зображення будуть генеруватися в розмірі <b>{size}</b>"
+    )
+    await safe_edit_message(callback, text, "HTML", get_image_size_keyboard())
+
+
+@router.callback_query(F.data.startswith("quality_"))
+async def image_quality_selection_callback(callback: CallbackQuery):
+    quality = callback.data.replace("quality_", "")
+    user_id = callback.from_user.id
+    await save_user_setting(user_id, "image_quality", quality)
+    text = (
+        f"✅ <b>Якість зображення змінено на: {quality.upper()}</b>\n\n"
+        f"Тепер всі зображення будуть генеруватися з якістю <b>{quality.upper()}</b>"
+    )
+    await safe_edit_message(callback, text, "HTML", get_image_quality_keyboard())
@@ -0,0 +1,400 @@
+"""
+Команди бота: базові (/start, /help, /echo, /info) та OpenAI (/ask, /reset ... /image).
+"""
+import logging
+
+from aiogram import Bot, Router
+from aiogram.filters import Command, CommandStart
+from aiogram.types import BufferedInputFile, Message
+
+from config import OPENAI_CONFIGURED
+from conversation_memory import get_conversation_memory
+from handlers.common import sanitize_telegram_text
+from handlers.delivery import send_message_with_retry
+from handlers.jobs import start_image_job, start_tts_job
+from handlers.keyboards import get_back_to_menu_keyboard, get_main_menu
+from openai_image_service import get_openai_image_service
+from openai_service import get_openai_service
+from openai_tts_service import get_openai_tts_service
+
+logger = logging.getLogger(__name__)
+
+router = Router(name="commands")
+
+
+@router.message(CommandStart())
+async def start_handler(message: Message) -> None:
+    user = message.from_user
+    openai_status = "✅ Підключено" if OPENAI_CONFIGURED else "❌ Не підключено"
+    welcome_text = (
+        f"Привіт, {user.first_name}! 👋\n\n"
+        f"Я розумний телеграм бот з функціями OpenAI.\n"
+        f"Оберіть функцію з меню нижче:\n\n"
+        f"OpenAI: {openai_status}"
+    )
+    await message.answer(welcome_text, parse_mode="HTML", reply_markup=get_main_menu())
+
+
+@router.message(Command("help"))
+async def help_handler(message: Message) -> None:
+    help_text = """
+🤖 <b>Доступні команди:</b>
+
+<b>Основні команди:</b>
+/start - Почати роботу з ботом (показати меню)
+/help - Показати це повідомлення
+/echo - Повторити ваше повідомлення
+/info - Інформація про бота
+
+<b>OpenAI функції:</b>
+/ask - Запитати щось у AI (наприклад: /ask Що таке штучний інтелект?)
+/reset - Забути попередню розмову з AI
+/creative - Креативне письмо (наприклад: /creative Напиши вірш про зиму)
+/code - Генерація коду (наприклад: /code Створи функцію сортування)
+/translate - Переклад тексту (наприклад: /translate Hello world)
+/summarize - Резюме тексту (наприклад: /summarize [ваш довгий текст])
+/explain - Пояснення концепції (наприклад: /explain Що таке машинне навчання?)
+/tts - Озвучити текст з налаштуваннями (наприклад: /tts Привіт! | alloy | 1.5)
+/tts_settings - Показати налаштування TTS та приклади використання
+/image - Згенерувати зображення (наприклад: /image Кіт, що грає з м'ячем)
+
+<b>Нове інтерактивне меню:</b>
+Використовуйте /start для доступу до зручного меню з кнопками!
+
+Просто надішліть мені будь-яке повідомлення, і я його повторю!
+    """
+    await message.answer(help_text, parse_mode="HTML", reply_markup=get_back_to_menu_keyboard())
+
+
+@router.message(Command("echo"))
+async def echo_handler(message: Message) -> None:
+    echo_text = message.text.replace("/echo", "").strip()
+    if echo_text:
+        await message.answer(f"Ви написали: {echo_text}")
+    else:
+        await message.answer("Напишіть щось після команди /echo")
+
+
+@router.message(Command("info"))
+async def info_handler(message: Message) -> None:
+    openai_status = "✅ Підключено" if OPENAI_CONFIGURED else "❌ Не підключено"
+    info_text = f"""
+📊 <b>Інформація про бота:</b>
+
+• Назва: Розумний Telegram Bot з OpenAI
+• Версія: 2.0
+• Основні функції: 4 команди
+• OpenAI функції: 9 команд
+• Мова: Python
+• Бібліотека: aiogram 3.13
+• OpenAI: {openai_status}
+
+<b>Цей бот надає:</b>
+1. Базову функціональність (привітання, повторення)
+2. Інтеграцію з OpenAI для розумних відповідей
+3. Креативне письмо та генерацію коду
+4. Переклад та резюмування тексту
+5. Пояснення складних концепцій
+6. Генерацію озвучки (TTS)
+7. Генерацію зображень (DALL-E)
+    """
+    await message.answer(info_text, parse_mode="HTML")
+
+
+# ---------- OpenAI команди ----------
+@router.message(Command("ask"))
+async def ask_handler(message: Message) -> None:
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано. Зверніться до адміністратора.")
+        return
+
+    question = message.text.replace("/ask", "").strip()
+    if not question:
+        await message.answer("Напишіть ваш запит після команди /ask\nНаприклад: /ask Що таке штучний інтелект?")
+        return
+
+    try:
+        thinking_msg = await message.answer("🤔 Думаю...")
+        openai_service = get_openai_service()
+        response = await openai_service.ask(question, chat_id=message.chat.id, user_id=message.from_user.id)
+        await thinking_msg.delete()
+        sanitized_response = sanitize_telegram_text(response)
+        await message.answer(f"🧠 <b>Відповідь:</b>\n\n{sanitized_response}", parse_mode="HTML")
+    except Exception as e:
+        logger.error("Помилка в команді /ask: %s", e, exc_info=True)
+        await message.answer(f"❌ Виникла помилка при обробці запиту: {str(e)}")
+
+
+@router.message(Command("reset"))
+async def reset_handler(message: Message) -> None:
+    memory = get_conversation_memory()
+    if memory is not None:
+        await memory.clear(message.chat.id, message.from_user.id)
+    await message.answer("🧹 Попередню розмову забуто. Наступне питання — з чистого аркуша.")
+
+
+@router.message(Command("creative"))
+async def creative_handler(message: Message) -> None:
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано. Зверніться до адміністратора.")
+        return
+
+    prompt = message.text.replace("/creative", "").strip()
+    if not prompt:
+        await message.answer(
+            "Напишіть тему для креативного письма після команди /creative\nНаприклад: /creative Напиши вірш про зиму"
+        )
+        return
+
+    try:
+        thinking_msg = await message.answer("🎨 Створюю...")
+        openai_service = get_openai_service()
+        response = await openai_service.generate_creative_text(prompt, user_id=message.from_user.id)
+        await thinking_msg.delete()
+        sanitized_response = sanitize_telegram_text(response)
+        await message.answer(f"✨ <b>Креативний текст:</b>\n\n{sanitized_response}", parse_mode="HTML")
+    except Exception as e:
+        logger.error("Помилка в команді /creative: %s", e)
+        await message.answer(f"❌ Виникла помилка при створенні тексту: {str(e)}")
+
+
+@router.message(Command("code"))
+async def code_handler(message: Message) -> None:
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано. Зверніться до адміністратора.")
+        return
+
+    prompt = message.text.replace("/code", "").strip()
+    if not prompt:
+        await message.answer(
+            "Опишіть код, який потрібно згенерувати після команди /code\nНаприклад: /code Створи функцію сортування масиву"
+        )
+        return
+
+    try:
+        thinking_msg = await message.answer("💻 Генерую код...")
+        openai_service = get_openai_service()
+        response = await openai_service.generate_code(prompt, user_id=message.from_user.id)
+        await thinking_msg.delete()
+        sanitized_response = sanitize_telegram_text(response)
+        await message.answer(f"🔧 <b>Згенерований код:</b>\n\n<code>{sanitized_response}</code>", parse_mode="HTML")
+    except Exception as e:
+        logger.error("Помилка в команді /code: %s", e)
+        await message.answer(f"❌ Виникла помилка при генерації коду: {str(e)}")
+
+
+@router.message(Command("translate"))
+async def translate_handler(message: Message) -> None:
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано. Зверніться до адміністратора.")
+        return
+
+    text = message.text.replace("/translate", "").strip()
+    if not text:
+        await message.answer("Напишіть текст для перекладу після команди /translate\nНаприклад: /translate Hello world")
+        return
+
+    try:
+        thinking_msg = await message.answer("🌐 Перекладаю...")
+        openai_service = get_openai_service()
+        response = await openai_service.translate_text(text, user_id=message.from_user.id)
+        await thinking_msg.delete()
+        sanitized_response = sanitize_telegram_text(response)
+        await message.answer(f"🔄 <b>Переклад:</b>\n\n{sanitized_response}", parse_mode="HTML")
+    except Exception as e:
+        logger.error("Помилка в команді /translate: %s", e)
+        await message.answer(f"❌ Виникла помилка при перекладі: {str(e)}")
+
+
+@router.message(Command("summarize"))
+async def summarize_handler(message: Message) -> None:
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано. Зверніться до адміністратора.")
+        return
+
+    text = message.text.replace("/summarize", "").strip()
+    if not text:
+        await message.answer("Надішліть текст для резюмування після команди /summarize\nНаприклад: /summarize [ваш довгий текст]")
+        return
+
+    try:
+        thinking_msg = await message.answer("📝 Створюю резюме...")
+        openai_service = get_openai_service()
+        response = await openai_service.summarize_text(text, user_id=message.from_user.id)
+        await thinking_msg.delete()
+        sanitized_response = sanitize_telegram_text(response)
+        await message.answer(f"📋 <b>Резюме:</b>\n\n{sanitized_response}", parse_mode="HTML")
+    except Exception as e:
+        logger.error("Помилка в команді /summarize: %s", e)
+        await message.answer(f"❌ Виникла помилка при створенні резюме: {str(e)}")
+
+
+@router.message(Command("explain"))
+async def explain_handler(message: Message) -> None:
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано. Зверніться до адміністратора.")
+        return
+
+    concept = message.text.replace("/explain", "").strip()
+    if not concept:
+        await message.answer("Напишіть концепцію для пояснення після команди /explain\nНаприклад: /explain Що таке машинне навчання?")
+        return
+
+    try:
+        thinking_msg = await message.answer("💡 Пояснюю...")
+        openai_service = get_openai_service()
+        response = await openai_service.explain_concept(concept, user_id=message.from_user.id)
+        await thinking_msg.delete()
+        sanitized_response = sanitize_telegram_text(response)
+        await message.answer(f"🎓 <b>Пояснення:</b>\n\n{sanitized_response}", parse_mode="HTML")
+    except Exception as e:
+        logger.error("Помилка в команді /explain: %s", e)
+        await message.answer(f"❌ Виникла помилка при поясненні: {str(e)}")
+
+
+@router.message(Command("tts"))
+async def tts_handler(message: Message, bot: Bot) -> None:
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано. Зверніться до адміністратора.")
+        return
+
+    command_text = message.text.replace('/tts', '').strip()
+    if not command_text:
+        await message.answer(
+            "🎤 <b>Озвучка тексту</b>\n\n"
+            "Використання:\n"
+            "• <code>/tts Привіт, як справи?</code>\n"
+            "• <code>/tts Привіт | 1.5</code>\n"
+            "• <code>/tts Привіт | alloy | 1.5</code>\n\n"
+            "Голоси: alloy, echo, fable, onyx, nova, shimmer\nШвидкість: 0.25–4.0",
+            parse_mode="HTML"
+        )
+        return
+
+    parts = command_text.split('|')
+    text = parts[0].strip()
+    if not text:
+        await message.answer("❌ Введіть текст для озвучування")
+        return
+
+    voice = None
+    speed = None
+    if len(parts) >= 2:
+        voice = parts[1].strip()
+    if len(parts) >= 3:
+        try:
+            speed = float(parts[2].strip())
+        except ValueError:
+            await message.answer("❌ Невірний формат швидкості. Використовуйте число (наприклад: 1.5)")
+            return
+
+    status = await send_message_with_retry(bot, message.chat.id, "🎤 Генерую озвучку...")
+    await start_tts_job(bot, message.chat.id, message.from_user.id, status.message_id, text, voice, speed)
+
+
+@router.message(Command("tts_settings"))
+async def tts_settings_handler(message: Message, bot: Bot) -> None:
+    """Команда для налаштувань TTS"""
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано. Зверніться до адміністратора.")
+        return
+
+    try:
+        tts_service = get_openai_tts_service()
+
+        # ⬇️ ЦІ ДВА ВИКЛИКИ ПОТРІБНО AWAIT
+        available_voices = await tts_service.get_available_voices()
+        speed_range = await tts_service.get_speed_range()
+
+        # Якщо в сервісі є ще поточні налаштування як корутини — теж await
+        current_voice = getattr(tts_service, "voice", None)
+        current_speed = getattr(tts_service, "speed", None)
+        if callable(current_voice):
+            current_voice = await current_voice()
+        if callable(current_speed):
+            current_speed = await current_speed()
+
+        # Підстрахуємось на випадок, якщо сервіс повернув None
+        available_voices = available_voices or []
+        if not isinstance(available_voices, (list, tuple)):
+            available_voices = list(available_voices)
+
+        # Формуємо текст відповіді
+        settings_text = (
+            "🎤 <b>Налаштування TTS</b>\n\n"
+            f"<b>Поточні налаштування:</b>\n"
+            f"• Голос: <code>{current_voice or 'alloy'}</code>\n"
+            f"• Швидкість: <code>{current_speed or 1.0}x</code>\n\n"
+            f"<b>Доступні голоси:</b>\n{', '.join(map(str, available_voices)) or '—'}\n\n"
+            f"<b>Діапазон швидкості:</b>\n"
+            f"{(speed_range[0] if speed_range else 0.25)}x - {(speed_range[1] if speed_range else 4.0)}x (1.0 = нормальна)\n\n"
+            "<b>Приклади використання:</b>\n"
+            "• <code>/tts Привіт!</code>\n"
+            "• <code>/tts Привіт! | 1.5</code>\n"
+            "• <code>/tts Привіт! | nova</code>\n"
+            "• <code>/tts Привіт! | echo | 0.8</code>\n"
+        )
+
+        await send_message_with_retry(bot, message.chat.id, settings_text, parse_mode="HTML")
+
+    except Exception as e:
+        logger.error("Помилка в команді /tts_settings: %s", e)
+        await send_message_with_retry(bot, message.chat.id, f"❌ Виникла помилка при отриманні налаштувань: {str(e)}")
+
+
+@router.message(Command("image"))
+async def image_handler(message: Message, bot: Bot) -> None:
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано. Зверніться до адміністратора.")
+        return
+
+    prompt = message.text.replace('/image', '').strip()
+    if not prompt:
+        await message.answer("Опишіть зображення, яке потрібно згенерувати після команди /image\nНаприклад: /image Кіт, що грає з м'ячем")
+        return
+
+    # миттєвий ACK користувачу — і повертаємо контроль webhook'у
+    status = await message.answer("🎨 Створюю 2 варіанти зображення… Це може зайняти до хвилини.")
+
+    await start_image_job(bot, message.chat.id, message.from_user.id, status.message_id, prompt)
+
+
+@router.message(Command("image_debug"))
+async def image_debug_handler(message: Message) -> None:
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано.")
+        return
+
+    prompt = message.text.replace("/image_debug", "").strip() or "A simple red circle"
+
+    try:
+        await message.answer(f"🔍 <b>Діагностика генерації зображення</b>\n\nПромт: {prompt}", parse_mode="HTML")
+        image_service = get_openai_image_service()
+
+        settings_info = f"""
+<b>Налаштування:</b>
+• Модель: {image_service.model}
+• Розмір: {image_service.default_size}
+• Якість: {image_service.default_quality}
+        """
+        await message.answer(settings_info, parse_mode="HTML")
+
+        await message.answer("🎨 Тестую генерацію...")
+        image_bytes_list = await image_service.generate_image(prompt, n=1)
+
+        debug_info = f"""
+<b>Результат:</b>
+• Кількість зображень: {len(image_bytes_list) if image_bytes_list else 0}
+• Розмір першого зображення: {len(image_bytes_list[0]) if image_bytes_list and len(image_bytes_list) > 0 else 'None'} байт
+        """
+        await message.answer(debug_info, parse_mode="HTML")
+
+        if image_bytes_list and len(image_bytes_list) > 0:
+            image_bytes = image_bytes_list[0]
+            photo_file = BufferedInputFile(image_bytes, filename="debug_image.png")
+            await message.answer_photo(photo=photo_file, caption="✅ Тестове зображення", parse_mode="HTML")
+        else:
+            await message.answer("❌ Не отримано зображення")
+    except Exception as e:
+        logger.error("Помилка в команді /image_debug: %s", e)
+        await message.answer(f"❌ Помилка діагностики: {str(e)}")
@@ -0,0 +1,85 @@
+"""
+Спільне для всіх хендлерів: стани FSM, налаштування користувачів і
+очищення тексту відповіді моделі для Telegram.
+"""
+import re
+
+from aiogram.fsm.state import State, StatesGroup
+
+import metrics
+from shared_state import create_settings_store
+
+
+# Стани для FSM
+class UserStates(StatesGroup):
+    waiting_for_text = State()
+    waiting_for_creative_prompt = State()
+    waiting_for_code_prompt = State()
+    waiting_for_translate_text = State()
+    waiting_for_summarize_text = State()
+    waiting_for_explain_concept = State()
+    waiting_for_tts_text = State()
+    waiting_for_image_prompt = State()
+    # Стани для налаштувань
+    waiting_for_voice_setting = State()
+    waiting_for_speed_setting = State()
+    waiting_for_image_size_setting = State()
+    waiting_for_image_quality_setting = State()
+
+
+# Налаштування користувачів (у пам'яті процесу або спільні між процесами, див. STATE_BACKEND)
+user_settings = create_settings_store()
+
+def sanitize_telegram_text(text: str) -> str:
+    """
+    Очищає текст від невалідних HTML тегів для Telegram
+    """
+    if not text:
+        return text
+    text = re.sub(r"<[^>]*>", "", text)  # прибрати теги
+    text = re.sub(r"&[a-zA-Z0-9#]+;", "", text)  # прибрати entities
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+def _default_settings() -> dict:
+    return {
+        "voice": "alloy",
+        "speed": 1.0,
+        "image_size": "auto",
+        "image_quality": "auto",
+    }
+
+
+def get_user_settings(user_id: int) -> dict:
+    """Отримання налаштувань користувача (синхронно; з хендлерів — load_user_settings)"""
+    settings = user_settings.get(user_id)
+    metrics.record_cache("user_settings", settings is not None)
+    if settings is None:
+        settings = _default_settings()
+        user_settings.put(user_id, settings)
+    return settings
+
+
+def update_user_setting(user_id: int, setting: str, value) -> None:
+    """Оновлення налаштування користувача (синхронно; з хендлерів — save_user_setting)"""
+    settings = get_user_settings(user_id)
+    settings[setting] = value
+    user_settings.put(user_id, settings)
+
+
+async def load_user_settings(user_id: int) -> dict:
+    """Налаштування користувача без блокування event loop (SQLite — у потоці)"""
+    settings = await user_settings.aget(user_id)
+    metrics.record_cache("user_settings", settings is not None)
+    if settings is None:
+        settings = _default_settings()
+        await user_settings.aput(user_id, settings)
+    return settings
+
+
+async def save_user_setting(user_id: int, setting: str, value) -> None:
+    """Оновлення налаштування користувача без блокування event loop"""
+    settings = await load_user_settings(user_id)
+    settings[setting] = value
+    await user_settings.aput(user_id, settings)
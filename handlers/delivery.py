@@ -0,0 +1,206 @@
+"""
+Надійна доставка в Telegram: ретраї з урахуванням flood control і мережевих
+збоїв, безпечне редагування повідомлень з fallback у нове повідомлення.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from aiogram import Bot, types
+from aiogram.exceptions import TelegramBadRequest, TelegramNetworkError, TelegramRetryAfter
+from aiogram.types import BufferedInputFile, CallbackQuery, InlineKeyboardMarkup, InputMediaPhoto
+
+import metrics
+import tracing
+
+logger = logging.getLogger(__name__)
+
+
+async def safe_edit_message(
+    callback: CallbackQuery,
+    text: str,
+    parse_mode: str = "HTML",
+    reply_markup: Optional[InlineKeyboardMarkup] = None,
+    max_retries: int = 3,
+) -> bool:
+    """
+    Безпечне редагування повідомлення з миттєвим ACK, ретраями та fallback у нове повідомлення.
+    """
+    # 0) миттєво ACK, щоб не ловити "query is too old"
+    try:
+        await callback.answer()
+    except Exception:
+        pass
+
+    # 1) намагаємось відредагувати (швидко)
+    for attempt in range(max_retries):
+        try:
+            await callback.message.edit_text(text, parse_mode=parse_mode, reply_markup=reply_markup)
+            return True
+        except TelegramBadRequest as e:
+            msg = str(e)
+            # Якщо контент не змінився — вважаємо успіхом
+            if "message is not modified" in msg:
+                return True
+            # Якщо редагувати вже не можна — відправляємо нове повідомлення
+            if "query is too old" in msg or "message to edit not found" in msg:
+                try:
+                    await callback.message.answer(text, parse_mode=parse_mode, reply_markup=reply_markup)
+                    return True
+                except Exception as inner_e:
+                    logger.error("Fallback send_message failed: %s", inner_e)
+                    return False
+            # Інші помилки — підняти вище, або повторити
+            if attempt == max_retries - 1:
+                logger.error("safe_edit_message TelegramBadRequest: %s", e)
+                try:
+                    await callback.message.answer(text, parse_mode=parse_mode, reply_markup=reply_markup)
+                    return True
+                except Exception as inner_e:
+                    logger.error("Fallback send_message failed: %s", inner_e)
+                    return False
+        except TelegramNetworkError as e:
+            # Сітка впала — трохи зачекати й повторити
+            await _sleep_network_backoff("edit_text", attempt + 1)
+            if attempt == max_retries - 1:
+                logger.error("safe_edit_message TelegramNetworkError: %s", e)
+                try:
+                    await callback.message.answer(text, parse_mode=parse_mode, reply_markup=reply_markup)
+                    return True
+                except Exception as inner_e:
+                    logger.error("Fallback send_message failed: %s", inner_e)
+                    return False
+        except Exception as e:
+            logger.warning("Спроба %d редагування не вдалася: %s", attempt + 1, e)
+            metrics.RETRIES.labels("edit_text", "error").inc()
+            await asyncio.sleep(0.7 * (attempt + 1))
+
+    return False
+
+
+async def _sleep_flood_wait(method: str, e: TelegramRetryAfter) -> None:
+    """Очікування flood control з обліком у метриках"""
+    retry_after = int(getattr(e, "retry_after", 1))
+    metrics.record_flood_wait(method, retry_after)
+    metrics.RETRIES.labels(method, "flood_wait").inc()
+    await asyncio.sleep(retry_after)
+
+
+async def _sleep_network_backoff(method: str, attempt: int) -> None:
+    """Пауза перед повтором після мережевої помилки"""
+    metrics.RETRIES.labels(method, "network").inc()
+    await asyncio.sleep(0.7 * attempt)
+
+
+async def safe_edit_message_text(
+    bot: Bot,
+    chat_id: int,
+    message_id: int,
+    text: str,
+    reply_markup: Optional[InlineKeyboardMarkup] = None,
+    max_attempts: int = 3,
+):
+    attempt = 0
+    while attempt < max_attempts:
+        try:
+            with tracing.span("telegram.edit_message_text", attempt=attempt + 1):
+                return await bot.edit_message_text(
+                    chat_id=chat_id, message_id=message_id, text=text, reply_markup=reply_markup
+                )
+        except TelegramBadRequest as e:
+            msg = str(e)
+            if "message is not modified" in msg:
+                return
+            if "query is too old" in msg or "message to edit not found" in msg:
+                return await bot.send_message(chat_id, text, reply_markup=reply_markup)
+            raise
+        except TelegramNetworkError:
+            attempt += 1
+            await _sleep_network_backoff("edit_message_text", attempt)
+
+async def send_photo_with_retry(bot: Bot, chat_id: int, photo: BufferedInputFile, caption: str = None, parse_mode: str = "HTML", max_attempts: int = 3):
+    for attempt in range(1, max_attempts + 1):
+        try:
+            with tracing.span("telegram.send_photo", attempt=attempt):
+                return await bot.send_photo(chat_id, photo=photo, caption=caption, parse_mode=parse_mode)
+        except TelegramRetryAfter as e:
+            await _sleep_flood_wait("send_photo", e)
+        except TelegramNetworkError:
+            if attempt == max_attempts:
+                raise
+            await _sleep_network_backoff("send_photo", attempt)
+
+async def send_document_with_retry(bot: Bot, chat_id: int, document: BufferedInputFile, caption: str = None, parse_mode: str = "HTML", max_attempts: int = 3):
+    for attempt in range(1, max_attempts + 1):
+        try:
+            with tracing.span("telegram.send_document", attempt=attempt):
+                return await bot.send_document(chat_id, document=document, caption=caption, parse_mode=parse_mode)
+        except TelegramRetryAfter as e:
+            await _sleep_flood_wait("send_document", e)
+        except TelegramNetworkError:
+            if attempt == max_attempts:
+                raise
+            await _sleep_network_backoff("send_document", attempt)
+
+async def send_media_group_with_retry(bot: Bot, chat_id: int, media: list[InputMediaPhoto], max_attempts: int = 3):
+    for attempt in range(1, max_attempts + 1):
+        try:
+            with tracing.span("telegram.send_media_group", attempt=attempt, items=len(media)):
+                return await bot.send_media_group(chat_id, media=media)
+        except TelegramRetryAfter as e:
+            await _sleep_flood_wait("send_media_group", e)
+        except TelegramNetworkError:
+            if attempt == max_attempts:
+                raise
+            await _sleep_network_backoff("send_media_group", attempt)
+
+async def send_message_with_retry(bot: Bot, chat_id: int, text: str, parse_mode: str = "HTML", reply_markup=None, max_attempts: int = 3):
+    for attempt in range(1, max_attempts + 1):
+        try:
+            with tracing.span("telegram.send_message", attempt=attempt):
+                return await bot.send_message(chat_id, text, parse_mode=parse_mode, reply_markup=reply_markup)
+        except TelegramRetryAfter as e:
+            await _sleep_flood_wait("send_message", e)
+        except TelegramNetworkError:
+            if attempt == max_attempts:
+                raise
+            await _sleep_network_backoff("send_message", attempt)
+
+async def edit_message_with_retry(bot: Bot, chat_id: int, message_id: int, text: str, parse_mode: str = "HTML", reply_markup=None, max_attempts: int = 3):
+    for attempt in range(1, max_attempts + 1):
+        try:
+            with tracing.span("telegram.edit_message_text", attempt=attempt):
+                return await bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text, parse_mode=parse_mode, reply_markup=reply_markup)
+        except TelegramBadRequest as e:
+            msg = str(e)
+            if "message is not modified" in msg:
+                return
+            if "query is too old" in msg or "message to edit not found" in msg:
+                return await bot.send_message(chat_id, text, parse_mode=parse_mode, reply_markup=reply_markup)
+            raise
+        except TelegramRetryAfter as e:
+            await _sleep_flood_wait("edit_message_text", e)
+        except TelegramNetworkError:
+            if attempt == max_attempts:
+                raise
+            await _sleep_network_backoff("edit_message_text", attempt)
+
+async def delete_message_silent(bot: Bot, chat_id: int, message_id: int):
+    try:
+        await bot.delete_message(chat_id, message_id)
+    except Exception:
+        pass
+
+async def send_voice_with_retry(bot: Bot, chat_id: int, voice_bytes: bytes, caption: str = None, parse_mode: str = "HTML", filename: str = "speech.mp3", max_attempts: int = 3):
+    for attempt in range(1, max_attempts + 1):
+        try:
+            audio_input = types.BufferedInputFile(file=voice_bytes, filename=filename)
+            with tracing.span("telegram.send_voice", attempt=attempt, bytes=len(voice_bytes)):
+                return await bot.send_voice(chat_id, voice=audio_input, caption=caption, parse_mode=parse_mode)
+        except TelegramRetryAfter as e:
+            await _sleep_flood_wait("send_voice", e)
+        except TelegramNetworkError:
+            if attempt == max_attempts:
+                raise
+            await _sleep_network_backoff("send_voice", attempt)
+
@@ -0,0 +1,13 @@
+"""
+Звичайні текстові повідомлення поза командами і станами (підключається останнім).
+"""
+from aiogram import F, Router
+from aiogram.types import Message
+
+router = Router(name="fallback")
+
+
+# Обробка звичайних повідомлень
+@router.message(F.text)
+async def handle_message(message: Message) -> None:
+    await message.answer(f"🔔 Ви написали: {message.text}")
@@ -0,0 +1,214 @@
+"""
+Введення користувача в станах FSM (після вибору функції в меню) і
+власна швидкість TTS.
+"""
+import logging
+
+from aiogram import Bot, Router
+from aiogram.fsm.context import FSMContext
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Message
+
+from config import OPENAI_CONFIGURED
+from handlers.common import UserStates, sanitize_telegram_text, save_user_setting
+from handlers.delivery import send_message_with_retry
+from handlers.jobs import start_image_job, start_tts_job
+from handlers.keyboards import get_back_to_menu_keyboard, get_speed_selection_keyboard
+from openai_service import get_openai_service
+
+logger = logging.getLogger(__name__)
+
+router = Router(name="inputs")
+
+
+@router.message(UserStates.waiting_for_text)
+async def handle_ask_ai_text(message: Message, state: FSMContext):
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано. Зверніться до адміністратора.")
+        await state.clear()
+        return
+
+    try:
+        thinking_msg = await message.answer("🤔 Думаю...")
+        openai_service = get_openai_service()
+        response = await openai_service.ask(message.text, chat_id=message.chat.id, user_id=message.from_user.id)
+        await thinking_msg.delete()
+        sanitized_response = sanitize_telegram_text(response)
+        await message.answer(
+            f"🧠 <b>Відповідь:</b>\n\n{sanitized_response}", parse_mode="HTML", reply_markup=get_back_to_menu_keyboard()
+        )
+    except Exception as e:
+        logger.error("Помилка в обробці запиту AI: %s", e)
+        await message.answer(
+            f"❌ Виникла помилка при обробці запиту: {str(e)}", reply_markup=get_back_to_menu_keyboard()
+        )
+    await state.clear()
+
+
+@router.message(UserStates.waiting_for_creative_prompt)
+async def handle_creative_text(message: Message, state: FSMContext):
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано. Зверніться до адміністратора.")
+        await state.clear()
+        return
+
+    try:
+        thinking_msg = await message.answer("🎨 Створюю...")
+        openai_service = get_openai_service()
+        response = await openai_service.generate_creative_text(message.text, user_id=message.from_user.id)
+        await thinking_msg.delete()
+        sanitized_response = sanitize_telegram_text(response)
+        await message.answer(
+            f"✨ <b>Креативний текст:</b>\n\n{sanitized_response}",
+            parse_mode="HTML",
+            reply_markup=get_back_to_menu_keyboard(),
+        )
+    except Exception as e:
+        logger.error("Помилка в креативному письмі: %s", e)
+        await message.answer(f"❌ Виникла помилка при створенні тексту: {str(e)}", reply_markup=get_back_to_menu_keyboard())
+    await state.clear()
+
+
+@router.message(UserStates.waiting_for_code_prompt)
+async def handle_code_text(message: Message, state: FSMContext):
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано. Зверніться до адміністратора.")
+        await state.clear()
+        return
+
+    try:
+        thinking_msg = await message.answer("💻 Генерую код...")
+        openai_service = get_openai_service()
+        response = await openai_service.generate_code(message.text, user_id=message.from_user.id)
+        await thinking_msg.delete()
+        sanitized_response = sanitize_telegram_text(response)
+        await message.answer(
+            f"🔧 <b>Згенерований код:</b>\n\n<code>{sanitized_response}</code>",
+            parse_mode="HTML",
+            reply_markup=get_back_to_menu_keyboard(),
+        )
+    except Exception as e:
+        logger.error("Помилка в генерації коду: %s", e)
+        await message.answer(
+            f"❌ Виникла помилка при генерації коду: {str(e)}", reply_markup=get_back_to_menu_keyboard()
+        )
+    await state.clear()
+
+
+@router.message(UserStates.waiting_for_translate_text)
+async def handle_translate_text(message: Message, state: FSMContext):
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано. Зверніться до адміністратора.")
+        await state.clear()
+        return
+
+    try:
+        thinking_msg = await message.answer("🌐 Перекладаю...")
+        openai_service = get_openai_service()
+        response = await openai_service.translate_text(message.text, user_id=message.from_user.id)
+        await thinking_msg.delete()
+        sanitized_response = sanitize_telegram_text(response)
+        await message.answer(
+            f"🔄 <b>Переклад:</b>\n\n{sanitized_response}", parse_mode="HTML", reply_markup=get_back_to_menu_keyboard()
+        )
+    except Exception as e:
+        logger.error("Помилка в перекладі: %s", e)
+        await message.answer(f"❌ Виникла помилка при перекладі: {str(e)}", reply_markup=get_back_to_menu_keyboard())
+    await state.clear()
+
+
+@router.message(UserStates.waiting_for_summarize_text)
+async def handle_summarize_text(message: Message, state: FSMContext):
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано. Зверніться до адміністратора.")
+        await state.clear()
+        return
+
+    try:
+        thinking_msg = await message.answer("📝 Створюю резюме...")
+        openai_service = get_openai_service()
+        response = await openai_service.summarize_text(message.text, user_id=message.from_user.id)
+        await thinking_msg.delete()
+        sanitized_response = sanitize_telegram_text(response)
+        await message.answer(
+            f"📋 <b>Резюме:</b>\n\n{sanitized_response}", parse_mode="HTML", reply_markup=get_back_to_menu_keyboard()
+        )
+    except Exception as e:
+        logger.error("Помилка в резюмуванні: %s", e)
+        await message.answer(
+            f"❌ Виникла помилка при створенні резюме: {str(e)}", reply_markup=get_back_to_menu_keyboard()
+        )
+    await state.clear()
+
+
+@router.message(UserStates.waiting_for_explain_concept)
+async def handle_explain_text(message: Message, state: FSMContext):
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано. Зверніться до адміністратора.")
+        await state.clear()
+        return
+
+    try:
+        thinking_msg = await message.answer("💡 Пояснюю...")
+        openai_service = get_openai_service()
+        response = await openai_service.explain_concept(message.text, user_id=message.from_user.id)
+        await thinking_msg.delete()
+        sanitized_response = sanitize_telegram_text(response)
+        await message.answer(
+            f"🎓 <b>Пояснення:</b>\n\n{sanitized_response}", parse_mode="HTML", reply_markup=get_back_to_menu_keyboard()
+        )
+    except Exception as e:
+        logger.error("Помилка в поясненні: %s", e)
+        await message.answer(
+            f"❌ Виникла помилка при поясненні: {str(e)}", reply_markup=get_back_to_menu_keyboard()
+        )
+    await state.clear()
+
+
+@router.message(UserStates.waiting_for_tts_text)
+async def handle_tts_text(message: Message, state: FSMContext, bot: Bot):
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано. Зверніться до адміністратора.")
+        await state.clear()
+        return
+
+    status = await send_message_with_retry(bot, message.chat.id, "🎤 Генерую озвучку...")
+    await start_tts_job(bot, message.chat.id, message.from_user.id, status.message_id, message.text, state=state)
+
+
+@router.message(UserStates.waiting_for_image_prompt)
+async def handle_image_text(message: Message, state: FSMContext, bot: Bot):
+    if not OPENAI_CONFIGURED:
+        await message.answer("❌ OpenAI API ключ не налаштовано. Зверніться до адміністратора.")
+        await state.clear()
+        return
+
+    status = await message.answer("🎨 Створюю 2 варіанти зображення… Це може зайняти до хвилини.")
+    await start_image_job(bot, message.chat.id, message.from_user.id, status.message_id, message.text, state=state)
+
+
+# Обробник введення власної швидкості
+@router.message(UserStates.waiting_for_speed_setting)
+async def handle_custom_speed(message: Message, state: FSMContext):
+    try:
+        speed = float(message.text)
+        if not (0.25 <= speed <= 4.0):
+            kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="🔙 Назад", callback_data="settings_speed")]])
+            await message.answer("❌ Швидкість повинна бути від 0.25 до 4.0. Спробуйте ще раз:", reply_markup=kb)
+            return
+
+        user_id = message.from_user.id
+        await save_user_setting(user_id, "speed", speed)
+
+        await message.answer(
+            f"✅ <b>Швидкість змінено на: {speed}x</b>\n\nТепер всі озвучки будуть використовувати швидкість <b>{speed}x</b>",
+            parse_mode="HTML",
+            reply_markup=get_speed_selection_keyboard(),
+        )
+    except ValueError:
+        kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="🔙 Назад", callback_data="settings_speed")]])
+        await message.answer(
+            "❌ Невірний формат числа. Введіть число від 0.25 до 4.0 (наприклад: 1.5):",
+            reply_markup=kb,
+        )
+        return
+    await state.clear()
@@ -0,0 +1,252 @@
+"""
+Фонові задачі генерації озвучки та зображень.
+
+Хендлер лише надсилає статус-повідомлення і повертає керування — воркер
+планувальника (polling чи webhook) звільняється одразу. Генерація та
+доставка результату йдуть окремою задачею з ретраями відправок, яку
+запускає JobScheduler (справедлива черга між користувачами); якщо задача
+не стартувала одразу, статус-повідомлення показує позицію в черзі.
+Під перевантаженням (overload) зображення деградують до одного варіанту
+низької якості, а на найвищому рівні нові задачі відхиляються одразу.
+Однаково для команд (/tts, /image) і для введення з меню (FSM).
+"""
+import logging
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.fsm.context import FSMContext
+from aiogram.types import BufferedInputFile, InputMediaPhoto
+
+from handlers.common import load_user_settings, sanitize_telegram_text
+from handlers.delivery import (
+    edit_message_with_retry, safe_edit_message_text, send_media_group_with_retry, send_photo_with_retry,
+    send_voice_with_retry,
+)
+from handlers.keyboards import get_back_to_menu_keyboard
+from job_scheduler import QUEUED, REJECTED, SHED, Ticket, get_job_scheduler
+from overload import get_overload_controller
+from openai_image_service import get_openai_image_service
+from openai_tts_service import get_openai_tts_service
+
+logger = logging.getLogger(__name__)
+
+
+async def tts_hint(tts_service) -> str:
+    """Повертає коротку підказку з голосами/швидкістю. Безпечна до збоїв."""
+    try:
+        voices = await tts_service.get_available_voices()
+    except Exception:
+        voices = []
+
+    try:
+        speed_range = await tts_service.get_speed_range()
+    except Exception:
+        speed_range = (0.25, 4.0)
+
+    voices_txt = ", ".join(map(str, voices)) if voices else "alloy, echo, fable, onyx, nova, shimmer"
+    return (
+        f"\n\n<b>Доступні голоси:</b> {voices_txt}"
+        f"\n<b>Діапазон швидкості:</b> {speed_range[0]}x – {speed_range[1]}x (1.0 = нормальна)"
+    )
+
+
+async def _finish_input(state: Optional[FSMContext]) -> None:
+    """
+    Вихід зі стану введення (FSM) одразу після submit: поки задача чекає в
+    черзі чи виконується, наступний текст користувача не ставить ще одну
+    платну задачу, а йде звичайним обробникам.
+    """
+    if state is not None:
+        await state.clear()
+
+
+async def _report_ticket(
+    bot: Bot,
+    chat_id: int,
+    status_message_id: int,
+    ticket: Ticket,
+) -> None:
+    """Показує позицію в черзі або відмову в статус-повідомленні"""
+    if ticket.status == SHED:
+        await safe_edit_message_text(
+            bot, chat_id, status_message_id,
+            "⚠️ Бот зараз перевантажений, тому нові озвучки та зображення тимчасово недоступні. "
+            "Спробуйте за кілька хвилин.",
+            reply_markup=get_back_to_menu_keyboard()
+        )
+    elif ticket.status == QUEUED:
+        await safe_edit_message_text(
+            bot, chat_id, status_message_id,
+            f"⏳ Запит у черзі, позиція {ticket.position}. Почнемо, щойно звільниться місце."
+        )
+    elif ticket.status == REJECTED:
+        await safe_edit_message_text(
+            bot, chat_id, status_message_id,
+            "❌ Забагато запитів у черзі. Дочекайтеся результату попередніх і спробуйте ще раз.",
+            reply_markup=get_back_to_menu_keyboard()
+        )
+
+
+async def _tts_job(
+    bot: Bot,
+    chat_id: int,
+    user_id: int,
+    status_message_id: int,
+    text: str,
+    voice: Optional[str],
+    speed: Optional[float],
+) -> None:
+    try:
+        settings = await load_user_settings(user_id)
+        final_voice = voice or settings['voice']
+        final_speed = speed if speed is not None else settings['speed']
+
+        tts_service = get_openai_tts_service()
+        audio_data = await tts_service.generate_speech_with_validation(text, final_voice, final_speed)
+
+        caption_parts = [f"🔊 <b>Озвучка:</b> {sanitize_telegram_text(text)[:800]}",
+                         f"Голос: {final_voice}",
+                         f"Швидкість: {final_speed}x"]
+
+        await send_voice_with_retry(
+            bot,
+            chat_id=chat_id,
+            voice_bytes=audio_data,
+            caption="\n".join(caption_parts),
+            parse_mode="HTML",
+            filename="speech.mp3"
+        )
+
+        await edit_message_with_retry(
+            bot, chat_id, status_message_id,
+            "✅ Озвучка готова!",
+            reply_markup=get_back_to_menu_keyboard()
+        )
+
+    except Exception as e:
+        logger.error("Помилка в озвучуванні (фон): %s", e)
+        try:
+            tts_service = get_openai_tts_service()
+            hint = await tts_hint(tts_service)   # ⬅️ ВАЖЛИВО: await
+        except Exception:
+            hint = ""
+        await edit_message_with_retry(
+            bot, chat_id, status_message_id,
+            f"❌ Виникла помилка при генерації озвучки: {str(e)}{hint}",
+            reply_markup=get_back_to_menu_keyboard()
+        )
+
+
+async def start_tts_job(
+    bot: Bot,
+    chat_id: int,
+    user_id: int,
+    status_message_id: int,
+    text: str,
+    voice: Optional[str] = None,
+    speed: Optional[float] = None,
+    state: Optional[FSMContext] = None,
+) -> Ticket:
+    """Озвучка у фоні; voice/speed=None — з налаштувань користувача, state очищується одразу"""
+    if get_overload_controller().reject("tts"):
+        ticket = Ticket(SHED)
+    else:
+        ticket = get_job_scheduler().submit(
+            user_id, "tts", lambda: _tts_job(bot, chat_id, user_id, status_message_id, text, voice, speed)
+        )
+    await _finish_input(state)
+    await _report_ticket(bot, chat_id, status_message_id, ticket)
+    return ticket
+
+
+async def _image_job(
+    bot: Bot,
+    chat_id: int,
+    user_id: int,
+    status_message_id: int,
+    prompt: str,
+) -> None:
+    try:
+        # під перевантаженням — один варіант низької якості
+        settings = get_overload_controller().effective_settings(await load_user_settings(user_id))
+        image_service = get_openai_image_service()
+
+        # Генеруємо варіанти (зазвичай 2)
+        image_bytes_list = await image_service.generate_image(
+            prompt,
+            size=settings['image_size'],
+            quality=settings['image_quality'],
+            n=settings['image_count']
+        )
+
+        if not image_bytes_list:
+            await safe_edit_message_text(
+                bot, chat_id, status_message_id,
+                "❌ Не вдалося згенерувати зображення.", reply_markup=get_back_to_menu_keyboard()
+            )
+            return
+
+        # Якщо є 2 і більше — шлемо однією media_group (швидше і надійніше)
+        if len(image_bytes_list) >= 2:
+            media = []
+            for i, image_bytes in enumerate(image_bytes_list[:2], 1):
+                media.append(
+                    InputMediaPhoto(
+                        media=BufferedInputFile(image_bytes, filename=f"generated_image_{i}.png"),
+                        caption=(f"🖼️ <b>Варіант {i}</b>\n"
+                                 f"Опис: {sanitize_telegram_text(prompt)[:800]}\n"
+                                 f"Розмір: {settings['image_size']}, Якість: {settings['image_quality'].upper()}") if i == 1 else None,
+                        parse_mode="HTML"
+                    )
+                )
+            await send_media_group_with_retry(bot, chat_id, media)
+            await safe_edit_message_text(
+                bot, chat_id, status_message_id,
+                "✅ Згенеровано 2 зображення.", reply_markup=get_back_to_menu_keyboard()
+            )
+        else:
+            # один варіант — звичайна відправка
+            photo_file = BufferedInputFile(image_bytes_list[0], filename="generated_image.png")
+            await send_photo_with_retry(
+                bot,
+                chat_id=chat_id,
+                photo=photo_file,
+                caption=(f"🖼️ <b>Згенероване зображення</b>\n"
+                         f"Опис: {sanitize_telegram_text(prompt)[:800]}\n"
+                         f"Розмір: {settings['image_size']}, Якість: {settings['image_quality'].upper()}"),
+                parse_mode="HTML"
+            )
+            await safe_edit_message_text(
+                bot, chat_id, status_message_id,
+                "✅ Зображення згенеровано.", reply_markup=get_back_to_menu_keyboard()
+            )
+
+    except Exception as e:
+        logger.error("Помилка в генерації зображення (фон): %s", e)
+        try:
+            await safe_edit_message_text(
+                bot, chat_id, status_message_id,
+                f"❌ Виникла помилка при генерації зображення: {e}", reply_markup=get_back_to_menu_keyboard()
+            )
+        except Exception:
+            pass
+
+
+async def start_image_job(
+    bot: Bot,
+    chat_id: int,
+    user_id: int,
+    status_message_id: int,
+    prompt: str,
+    state: Optional[FSMContext] = None,
+) -> Ticket:
+    """Генерація 2 варіантів зображення у фоні (під перевантаженням — одного); state очищується одразу"""
+    if get_overload_controller().reject("image"):
+        ticket = Ticket(SHED)
+    else:
+        ticket = get_job_scheduler().submit(
+            user_id, "image", lambda: _image_job(bot, chat_id, user_id, status_message_id, prompt)
+        )
+    await _finish_input(state)
+    await _report_ticket(bot, chat_id, status_message_id, ticket)
+    return ticket
@@ -0,0 +1,132 @@
+"""
+Inline-клавіатури меню та налаштувань.
+"""
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+
+def get_main_menu() -> InlineKeyboardMarkup:
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text="🤖 Запитати AI", callback_data="ask_ai"),
+                InlineKeyboardButton(text="✨ Креативне письмо", callback_data="creative"),
+            ],
+            [
+                InlineKeyboardButton(text="💻 Генерація коду", callback_data="code"),
+                InlineKeyboardButton(text="🌐 Переклад", callback_data="translate"),
+            ],
+            [
+                InlineKeyboardButton(text="📝 Резюме тексту", callback_data="summarize"),
+                InlineKeyboardButton(text="💡 Пояснення", callback_data="explain"),
+            ],
+            [
+                InlineKeyboardButton(text="🎤 Озвучка (TTS)", callback_data="tts"),
+                InlineKeyboardButton(text="🖼️ Генерація зображень", callback_data="image"),
+            ],
+            [
+                InlineKeyboardButton(text="⚙️ Налаштування", callback_data="settings"),
+                InlineKeyboardButton(text="ℹ️ Допомога", callback_data="help"),
+            ],
+            [InlineKeyboardButton(text="📊 Інформація", callback_data="info")],
+        ]
+    )
+    return keyboard
+
+
+def get_back_to_menu_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="🏠 Назад до меню", callback_data="back_to_menu")]])
+
+
+def get_settings_menu_keyboard() -> InlineKeyboardMarkup:
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text="🎤 Голос TTS", callback_data="settings_voice"),
+                InlineKeyboardButton(text="⚡ Швидкість TTS", callback_data="settings_speed"),
+            ],
+            [
+                InlineKeyboardButton(text="📐 Розмір зображення", callback_data="settings_image_size"),
+                InlineKeyboardButton(text="🎨 Якість зображення", callback_data="settings_image_quality"),
+            ],
+            [InlineKeyboardButton(text="🏠 Назад до меню", callback_data="back_to_menu")],
+        ]
+    )
+    return keyboard
+
+
+def get_voice_selection_keyboard() -> InlineKeyboardMarkup:
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text="🎵 Alloy", callback_data="voice_alloy"),
+                InlineKeyboardButton(text="🔊 Echo", callback_data="voice_echo"),
+            ],
+            [
+                InlineKeyboardButton(text="📚 Fable", callback_data="voice_fable"),
+                InlineKeyboardButton(text="💎 Onyx", callback_data="voice_onyx"),
+            ],
+            [
+                InlineKeyboardButton(text="⭐ Nova", callback_data="voice_nova"),
+                InlineKeyboardButton(text="✨ Shimmer", callback_data="voice_shimmer"),
+            ],
+            [InlineKeyboardButton(text="🔙 Назад до налаштувань", callback_data="settings")],
+        ]
+    )
+    return keyboard
+
+
+def get_speed_selection_keyboard() -> InlineKeyboardMarkup:
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text="🐌 0.5x", callback_data="speed_0.5"),
+                InlineKeyboardButton(text="🚶 0.75x", callback_data="speed_0.75"),
+            ],
+            [
+                InlineKeyboardButton(text="🚶‍♂️ 1.0x", callback_data="speed_1.0"),
+                InlineKeyboardButton(text="🏃 1.25x", callback_data="speed_1.25"),
+            ],
+            [
+                InlineKeyboardButton(text="🏃‍♂️ 1.5x", callback_data="speed_1.5"),
+                InlineKeyboardButton(text="🚀 2.0x", callback_data="speed_2.0"),
+            ],
+            [InlineKeyboardButton(text="✏️ Ввести власну", callback_data="speed_custom")],
+            [InlineKeyboardButton(text="🔙 Назад до налаштувань", callback_data="settings")],
+        ]
+    )
+    return keyboard
+
+
+def get_image_size_keyboard() -> InlineKeyboardMarkup:
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text="📱 1024x1024", callback_data="size_1024x1024"),
+                InlineKeyboardButton(text="📄 1024x1536", callback_data="size_1024x1536"),
+            ],
+            [
+                InlineKeyboardButton(text="🖥️ 1536x1024", callback_data="size_1536x1024"),
+                InlineKeyboardButton(text="🤖 Auto", callback_data="size_auto"),
+            ],
+            [InlineKeyboardButton(text="🔙 Назад до налаштувань", callback_data="settings")],
+        ]
+    )
+    return keyboard
+
+
+def get_image_quality_keyboard() -> InlineKeyboardMarkup:
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text="🔧 Low", callback_data="quality_low"),
+                InlineKeyboardButton(text="⚖️ Medium", callback_data="quality_medium"),
+            ],
+            [
+                InlineKeyboardButton(text="🎨 High", callback_data="quality_high"),
+                InlineKeyboardButton(text="🤖 Auto", callback_data="quality_auto"),
+            ],
+            [InlineKeyboardButton(text="🔙 Назад до налаштувань", callback_data="settings")],
+        ]
+    )
+    return keyboard
+
@@ -0,0 +1,233 @@
+"""
+Справедливий планувальник дорогих задач (озвучка, зображення) між користувачами.
+
+Раніше кожен /tts чи натискання "🖼️ Генерація зображень" одразу запускав
+окрему фонову задачу, і один користувач міг зайняти всю квоту OpenAI.
+Тепер задачі проходять через JobScheduler:
+  - спільна ємність JOB_CAPACITY в одиницях вартості (JOB_COSTS:
+    зображення дорожче за озвучку);
+  - ліміт одночасних задач користувача за типом (JOB_USER_LIMITS);
+  - черги користувачів обслуговуються deficit round-robin: за кожен обхід
+    користувач отримує квант JOB_QUANTUM і витрачає його на свої задачі,
+    тож активний користувач не витісняє решту, а дорогі задачі
+    враховуються пропорційно вартості;
+  - понад JOB_USER_QUEUE задач у черзі користувача — відмова одразу.
+
+Користувач, задача якого не стартувала одразу, отримує позицію в черзі.
+"""
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional
+
+import metrics
+from config import JOB_CAPACITY, JOB_COSTS, JOB_QUANTUM, JOB_USER_LIMITS, JOB_USER_QUEUE, OVERLOAD_JOB_QUEUE_HIGH
+from overload import get_overload_controller
+
+logger = logging.getLogger(__name__)
+
+JOBS_SUBMITTED = metrics.REGISTRY.counter(
+    "bot_jobs_submitted_total", "Подані дорогі задачі за результатом (started, queued, rejected)", ("kind", "result"),
+)
+JOB_WAIT = metrics.REGISTRY.histogram(
+    "bot_job_queue_wait_seconds", "Час очікування дорогої задачі в черзі користувача", ("kind",),
+)
+JOB_QUEUED_USERS = metrics.REGISTRY.gauge(
+    "bot_job_queued_users", "Користувачі з задачами в черзі планувальника",
+)
+
+STARTED = "started"
+QUEUED = "queued"
+REJECTED = "rejected"
+SHED = "shed"  # відхилено контролером перевантаження ще до планувальника
+
+
+def parse_limits(spec: str) -> Dict[str, int]:
+    """Розбирає "kind=n,kind2=n" у словник"""
+    limits: Dict[str, int] = {}
+    for item in spec.split(","):
+        kind, sep, value = item.strip().partition("=")
+        if not sep or not kind:
+            continue
+        try:
+            limits[kind.strip()] = max(0, int(value))
+        except ValueError:
+            continue
+    return limits
+
+
+@dataclass
+class Ticket:
+    """Результат подання задачі: status і позиція в черзі (0 — стартувала одразу)"""
+    status: str
+    position: int = 0
+
+
+@dataclass
+class _Job:
+    kind: str
+    cost: int
+    factory: Callable[[], Awaitable[Any]]
+    enqueued: float = field(default_factory=time.monotonic)
+
+
+class JobScheduler:
+    """
+    Args:
+        capacity: Сумарна вартість задач, що виконуються одночасно
+        costs: Вартість задачі за типом (невідомий тип — 1)
+        user_limits: Максимум одночасних задач користувача за типом (0 або відсутній — без ліміту)
+        user_queue: Максимум задач у черзі одного користувача
+        quantum: Кредит вартості, який користувач отримує за один обхід round-robin
+    """
+
+    def __init__(
+        self,
+        capacity: int = 8,
+        costs: Optional[Dict[str, int]] = None,
+        user_limits: Optional[Dict[str, int]] = None,
+        user_queue: int = 5,
+        quantum: int = 4,
+    ):
+        self.costs = dict(costs or {})
+        # задача, дорожча за всю ємність, інакше ніколи б не стартувала
+        self.capacity = max(capacity, max(self.costs.values(), default=1))
+        self.user_limits = dict(user_limits or {})
+        self.user_queue = user_queue
+        self.quantum = max(1, quantum)
+        self._used = 0
+        self._queues: Dict[Hashable, Deque[_Job]] = {}
+        self._deficit: Dict[Hashable, int] = {}
+        self._active: Deque[Hashable] = deque()
+        self._running: Dict[Hashable, Dict[str, int]] = {}
+
+    def cost(self, kind: str) -> int:
+        return max(1, self.costs.get(kind, 1))
+
+    def running(self, user_id: Hashable, kind: Optional[str] = None) -> int:
+        counts = self._running.get(user_id, {})
+        return counts.get(kind, 0) if kind is not None else sum(counts.values())
+
+    def queued(self, user_id: Optional[Hashable] = None) -> int:
+        if user_id is not None:
+            return len(self._queues.get(user_id, ()))
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _user_allows(self, user_id: Hashable, kind: str) -> bool:
+        limit = self.user_limits.get(kind, 0)
+        return limit <= 0 or self.running(user_id, kind) < limit
+
+    def position(self, user_id: Hashable, index: int) -> int:
+        """
+        Оцінка позиції (з 1) задачі з індексом index у черзі користувача:
+        round-robin віддає кожному користувачу по задачі за обхід, тож
+        попереду — до index+1 задач кожного іншого користувача.
+        """
+        ahead = sum(min(len(queue), index + 1) for uid, queue in self._queues.items() if uid != user_id)
+        return ahead + index + 1
+
+    def submit(self, user_id: Hashable, kind: str, factory: Callable[[], Awaitable[Any]]) -> Ticket:
+        """Запускає задачу одразу або ставить у чергу користувача; factory() створює корутину"""
+        job = _Job(kind, self.cost(kind), factory)
+        queue = self._queues.get(user_id)
+        if not queue and not self._active and self._user_allows(user_id, kind) \
+                and self._used + job.cost <= self.capacity:
+            self._start(user_id, job)
+            JOBS_SUBMITTED.labels(kind, STARTED).inc()
+            return Ticket(STARTED)
+
+        if queue is not None and len(queue) >= self.user_queue:
+            JOBS_SUBMITTED.labels(kind, REJECTED).inc()
+            return Ticket(REJECTED)
+
+        if queue is None:
+            queue = self._queues[user_id] = deque()
+            self._deficit[user_id] = 0
+            self._active.append(user_id)
+        queue.append(job)
+        self._pump()
+        if not queue or queue[-1] is not job:
+            # інші користувачі не чекали — задача стартувала одразу
+            JOBS_SUBMITTED.labels(kind, STARTED).inc()
+            return Ticket(STARTED)
+        JOBS_SUBMITTED.labels(kind, QUEUED).inc()
+        return Ticket(QUEUED, self.position(user_id, len(queue) - 1))
+
+    def _start(self, user_id: Hashable, job: _Job) -> None:
+        self._used += job.cost
+        counts = self._running.setdefault(user_id, {})
+        counts[job.kind] = counts.get(job.kind, 0) + 1
+        task = metrics.track_task(self._run(job), job.kind)
+        task.add_done_callback(lambda _: self._finish(user_id, job))
+
+    @staticmethod
+    async def _run(job: _Job) -> Any:
+        JOB_WAIT.labels(job.kind).observe(time.monotonic() - job.enqueued)
+        return await job.factory()
+
+    def _finish(self, user_id: Hashable, job: _Job) -> None:
+        self._used -= job.cost
+        counts = self._running[user_id]
+        counts[job.kind] -= 1
+        if not counts[job.kind]:
+            del counts[job.kind]
+        if not counts:
+            del self._running[user_id]
+        self._pump()
+
+    def _pump(self) -> None:
+        """
+        Deficit round-robin: користувач на голові кільця отримує квант і
+        запускає задачі, поки вистачає кредиту; потім переходить у кінець.
+        Користувачі, які впираються у власний ліміт, пропускаються, а якщо
+        голові бракує вільної ємності — чекаємо завершення задач (інакше
+        дешеві задачі безкінечно обганяли б дорогі).
+        """
+        skipped = 0
+        while self._active and skipped < len(self._active):
+            user_id = self._active[0]
+            queue = self._queues[user_id]
+            job = queue[0]
+            if not self._user_allows(user_id, job.kind):
+                self._active.rotate(-1)
+                skipped += 1
+                continue
+            if self._used + job.cost > self.capacity:
+                break
+            skipped = 0
+            if self._deficit[user_id] < job.cost:
+                self._deficit[user_id] += self.quantum
+                if self._deficit[user_id] < job.cost:
+                    self._active.rotate(-1)
+                    continue
+            self._deficit[user_id] -= job.cost
+            queue.popleft()
+            self._start(user_id, job)
+            if not queue:
+                # порожня черга не накопичує кредит
+                self._active.popleft()
+                del self._queues[user_id]
+                del self._deficit[user_id]
+            elif self._deficit[user_id] < queue[0].cost:
+                self._active.rotate(-1)
+        JOB_QUEUED_USERS.set(len(self._queues))
+
+
+_job_scheduler: Optional[JobScheduler] = None
+
+
+def get_job_scheduler() -> JobScheduler:
+    """Отримати глобальний екземпляр планувальника дорогих задач"""
+    global _job_scheduler
+    if _job_scheduler is None:
+        _job_scheduler = JobScheduler(
+            capacity=JOB_CAPACITY,
+            costs=parse_limits(JOB_COSTS),
+            user_limits=parse_limits(JOB_USER_LIMITS),
+            user_queue=JOB_USER_QUEUE,
+            quantum=JOB_QUANTUM,
+        )
+        metrics.JOB_QUEUE_DEPTH.labels("jobs").set_function(_job_scheduler.queued)
+        get_overload_controller().watch_queue("jobs", _job_scheduler.queued, OVERLOAD_JOB_QUEUE_HIGH)
+    return _job_scheduler
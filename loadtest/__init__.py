@@ -0,0 +1,4 @@
+"""
+Навантажувальне тестування бота з локальними заглушками Telegram Bot API та OpenAI.
+Запуск: python -m loadtest --help
+"""
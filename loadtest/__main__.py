@@ -0,0 +1,78 @@
+"""
+Офлайн навантажувальний тест webhook-бота.
+
+    python -m loadtest --sessions 500 --concurrency 50
+    python -m loadtest --tg-latency 0.2 --tg-throttle 0.02 --openai-errors 0.05 --json report.json
+    python -m loadtest --perf-profile fast   # порівняння з uvloop + orjson
+"""
+import argparse
+import json
+import os
+import sys
+
+from loadtest.profiles import UpstreamProfile
+from loadtest.runner import FakeUpstreams, configure_environment, format_report, run_load
+from loadtest.scenarios import DEFAULT_MIX, SCENARIOS
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description="Офлайн навантажувальний тест webhook_bot")
+    parser.add_argument("--sessions", type=int, default=200, help="Кількість сесій користувачів")
+    parser.add_argument("--concurrency", type=int, default=20, help="Одночасно активних сесій")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Суміш сценаріїв name=weight ({', '.join(SCENARIOS)})")
+    parser.add_argument("--think", type=float, default=0.0, help="Середня пауза користувача між апдейтами, с")
+    parser.add_argument("--tg-latency", type=float, default=0.03, help="Латентність фейкового Telegram, с")
+    parser.add_argument("--tg-errors", type=float, default=0.0, help="Частка відповідей 500 від Telegram")
+    parser.add_argument("--tg-throttle", type=float, default=0.0, help="Частка відповідей 429 від Telegram")
+    parser.add_argument("--openai-latency", type=float, default=0.3, help="Латентність фейкового OpenAI (chat), с")
+    parser.add_argument("--openai-errors", type=float, default=0.0, help="Частка відповідей 500 від OpenAI")
+    parser.add_argument("--openai-throttle", type=float, default=0.0, help="Частка відповідей 429 від OpenAI")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after у відповідях 429, с")
+    parser.add_argument("--perf-profile", choices=("default", "fast"), help="PERF_PROFILE бота (event loop і JSON-кодек)")
+    parser.add_argument("--json", dest="json_path", help="Зберегти звіт у JSON-файл")
+    return parser
+
+
+async def _main(args: argparse.Namespace, upstreams: FakeUpstreams) -> dict:
+    import perf_profile
+    import webhook_bot  # імпорт лише після configure_environment
+
+    report = await run_load(
+        webhook_bot.create_app,
+        webhook_bot.dp,
+        sessions=args.sessions,
+        concurrency=args.concurrency,
+        mix=args.mix,
+        think_time=args.think,
+    )
+    report["upstream"] = await upstreams.stats()
+    report["perf"] = perf_profile.describe()
+    await webhook_bot.bot.session.close()
+    return report
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    telegram = UpstreamProfile(args.tg_latency, error_rate=args.tg_errors,
+                               throttle_rate=args.tg_throttle, retry_after=args.retry_after)
+    openai = UpstreamProfile(args.openai_latency, error_rate=args.openai_errors,
+                             throttle_rate=args.openai_throttle, retry_after=args.retry_after)
+
+    with FakeUpstreams(telegram, openai) as upstreams:
+        configure_environment(upstreams)
+        if args.perf_profile:
+            os.environ["PERF_PROFILE"] = args.perf_profile
+        import perf_profile
+
+        report = perf_profile.run(_main(args, upstreams))
+
+    report["profiles"] = {"telegram": telegram.to_dict(), "openai": openai.to_dict()}
+    print(format_report(report))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
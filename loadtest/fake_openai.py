@@ -0,0 +1,108 @@
+"""
+Локальна заглушка api.openai.com для навантажувальних тестів.
+
+Підтримує /v1/chat/completions, /v1/images/generations та /v1/audio/speech,
+повертає заголовки x-ratelimit-* і відповідає 429/500 за профілем.
+GET /_stats — лічильники викликів за endpoint'ами.
+"""
+import base64
+import os
+import time
+from collections import Counter
+
+from aiohttp import web
+
+from loadtest.profiles import UpstreamProfile
+
+# Мінімальний валідний PNG 1x1 — вміст не важливий, важливий розмір
+_PNG_1X1 = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+)
+
+# Множники затримки відносно базової латентності профілю
+_LATENCY_SCALE = {"chat": 1.0, "audio": 1.5, "images": 8.0}
+
+
+def _ratelimit_headers(remaining_requests: int, remaining_tokens: int) -> dict:
+    return {
+        "x-ratelimit-limit-requests": "10000",
+        "x-ratelimit-remaining-requests": str(remaining_requests),
+        "x-ratelimit-reset-requests": "6ms",
+        "x-ratelimit-limit-tokens": "2000000",
+        "x-ratelimit-remaining-tokens": str(remaining_tokens),
+        "x-ratelimit-reset-tokens": "30ms",
+    }
+
+
+def create_fake_openai_app(profile: UpstreamProfile, completion_words: int = 60,
+                           image_bytes: int = 256 * 1024, audio_bytes: int = 48 * 1024) -> web.Application:
+    calls: Counter = Counter()
+    failures: Counter = Counter()
+    # одне "зображення" на весь процес — щоб заглушка не витрачала CPU на генерацію
+    image_b64 = base64.b64encode(_PNG_1X1 + os.urandom(max(0, image_bytes - len(_PNG_1X1)))).decode()
+    audio = os.urandom(audio_bytes)
+
+    async def _maybe_fail(endpoint: str):
+        calls[endpoint] += 1
+        await profile.delay(_LATENCY_SCALE[endpoint])
+        status = profile.pick_failure()
+        if status is None:
+            return None
+        failures[f"{endpoint}:{status}"] += 1
+        headers = _ratelimit_headers(0, 0) if status == 429 else {}
+        if status == 429:
+            headers["retry-after"] = str(profile.retry_after)
+        return web.json_response(
+            {"error": {"message": "Rate limit reached" if status == 429 else "Server error", "type": "fake"}},
+            status=status, headers=headers,
+        )
+
+    async def chat_completions(request: web.Request) -> web.Response:
+        body = await request.json()
+        failure = await _maybe_fail("chat")
+        if failure is not None:
+            return failure
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in body.get("messages", []))
+        content = " ".join(["слово"] * completion_words)
+        prompt_tokens = max(1, prompt_chars // 4)
+        completion_tokens = completion_words * 2
+        return web.json_response({
+            "id": f"chatcmpl-{calls['chat']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }, headers=_ratelimit_headers(9000, 1900000))
+
+    async def images_generations(request: web.Request) -> web.Response:
+        body = await request.json()
+        failure = await _maybe_fail("images")
+        if failure is not None:
+            return failure
+        n = int(body.get("n", 1))
+        return web.json_response({
+            "created": int(time.time()),
+            "data": [{"b64_json": image_b64} for _ in range(n)],
+        }, headers=_ratelimit_headers(90, 1900000))
+
+    async def audio_speech(request: web.Request) -> web.Response:
+        await request.read()
+        failure = await _maybe_fail("audio")
+        if failure is not None:
+            return failure
+        return web.Response(body=audio, content_type="audio/mpeg", headers=_ratelimit_headers(900, 1900000))
+
+    async def handle_stats(request: web.Request) -> web.Response:
+        return web.json_response({"calls": dict(calls), "failures": dict(failures)})
+
+    app = web.Application(client_max_size=16 * 1024 * 1024)
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_post("/v1/images/generations", images_generations)
+    app.router.add_post("/v1/audio/speech", audio_speech)
+    app.router.add_get("/_stats", handle_stats)
+    return app
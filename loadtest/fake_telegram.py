@@ -0,0 +1,92 @@
+"""
+Локальна заглушка api.telegram.org для навантажувальних тестів.
+
+Приймає POST /bot<token>/<method>, імітує затримку та помилки за профілем
+і повертає мінімально валідні відповіді Bot API. GET /_stats — лічильники
+викликів за методами.
+"""
+import itertools
+import time
+from collections import Counter
+
+from aiohttp import web
+
+from loadtest.profiles import UpstreamProfile
+
+_message_ids = itertools.count(1000)
+
+
+def _message(chat_id: int, text: str = "ok") -> dict:
+    return {
+        "message_id": next(_message_ids),
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "private"},
+        "text": text,
+    }
+
+
+async def _read_params(request: web.Request) -> dict:
+    """Параметри методу: JSON, form-urlencoded або multipart (файли пропускаються)"""
+    if request.content_type == "application/json":
+        return await request.json()
+    if request.content_type.startswith("multipart/"):
+        params = {}
+        reader = await request.multipart()
+        async for part in reader:
+            data = await part.read()
+            if part.filename is None:
+                params[part.name] = data.decode("utf-8", "replace")
+        return params
+    return dict(await request.post())
+
+
+def fake_result(method: str, params: dict):
+    """Мінімально валідний `result` відповіді Bot API для методу"""
+    chat_id = int(params.get("chat_id") or 0)
+    if method in ("sendMessage", "sendPhoto", "sendVoice", "sendDocument", "sendAudio"):
+        return _message(chat_id, params.get("text") or params.get("caption") or "")
+    if method == "editMessageText":
+        return _message(chat_id, params.get("text") or "")
+    if method == "sendMediaGroup":
+        return [_message(chat_id, "media"), _message(chat_id, "media")]
+    if method == "getMe":
+        return {"id": 123456, "is_bot": True, "first_name": "LoadTestBot", "username": "loadtest_bot"}
+    if method == "getUpdates":
+        return []
+    if method == "getWebhookInfo":
+        return {"url": "", "has_custom_certificate": False, "pending_update_count": 0}
+    # answerCallbackQuery, deleteMessage, setWebhook, deleteWebhook, ...
+    return True
+
+
+def create_fake_telegram_app(profile: UpstreamProfile) -> web.Application:
+    calls: Counter = Counter()
+    failures: Counter = Counter()
+
+    async def handle_method(request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        calls[method] += 1
+        params = await _read_params(request)
+        await profile.delay()
+
+        status = profile.pick_failure()
+        if status == 429:
+            failures[f"{method}:429"] += 1
+            return web.json_response({
+                "ok": False, "error_code": 429,
+                "description": f"Too Many Requests: retry after {profile.retry_after}",
+                "parameters": {"retry_after": profile.retry_after},
+            }, status=429)
+        if status == 500:
+            failures[f"{method}:500"] += 1
+            return web.json_response({"ok": False, "error_code": 500, "description": "Internal Server Error"}, status=500)
+
+        return web.json_response({"ok": True, "result": fake_result(method, params)})
+
+    async def handle_stats(request: web.Request) -> web.Response:
+        return web.json_response({"calls": dict(calls), "failures": dict(failures)})
+
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post("/bot{token}/{method}", handle_method)
+    app.router.add_get("/_stats", handle_stats)
+    return app
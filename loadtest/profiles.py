@@ -0,0 +1,56 @@
+"""
+Профілі поведінки фейкових upstream'ів: латентність, помилки 5xx та 429.
+"""
+import asyncio
+import random
+from typing import Optional
+
+
+class UpstreamProfile:
+    """
+    Поведінка фейкового сервера.
+
+    Args:
+        latency: Середня затримка відповіді (секунди)
+        jitter: Розкид затримки як частка від latency (0.5 → ±50%)
+        error_rate: Частка відповідей 500
+        throttle_rate: Частка відповідей 429
+        retry_after: Значення retry_after для 429 (секунди)
+    """
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.5, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: int = 1):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+
+    def to_dict(self) -> dict:
+        return {
+            "latency": self.latency,
+            "jitter": self.jitter,
+            "error_rate": self.error_rate,
+            "throttle_rate": self.throttle_rate,
+            "retry_after": self.retry_after,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "UpstreamProfile":
+        return cls(**data)
+
+    async def delay(self, scale: float = 1.0) -> None:
+        latency = self.latency * scale
+        if latency <= 0:
+            return
+        spread = latency * self.jitter
+        await asyncio.sleep(max(0.0, random.uniform(latency - spread, latency + spread)))
+
+    def pick_failure(self) -> Optional[int]:
+        """Повертає HTTP статус помилки, якщо цей запит має впасти"""
+        roll = random.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 500
+        return None
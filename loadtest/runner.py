@@ -0,0 +1,411 @@
+"""
+Прогін навантаження на webhook_bot.create_app() повністю офлайн.
+
+Фейкові Telegram та OpenAI піднімаються в окремому процесі (щоб їхній CPU
+не спотворював вимірювання бота), бот — у поточному процесі з реальним
+aiohttp-сервером. Апдейти надсилаються сесіями: наступний апдейт сесії
+йде лише після того, як попередній оброблено (як живий користувач,
+що чекає відповіді), тож FSM-діалоги відпрацьовують коректно.
+"""
+import asyncio
+import math
+import multiprocessing
+import os
+import random
+import resource
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from loadtest.profiles import UpstreamProfile
+from loadtest.scenarios import SCENARIOS, parse_mix, pick_scenario
+
+LOADTEST_BOT_TOKEN = "123456:loadtest-token"
+
+
+# ---------- Фейкові upstream'и в окремому процесі ----------
+
+def _serve_fakes(telegram_profile: dict, openai_profile: dict, conn) -> None:
+    from aiohttp import web
+
+    from loadtest.fake_openai import create_fake_openai_app
+    from loadtest.fake_telegram import create_fake_telegram_app
+
+    async def _serve():
+        ports = []
+        for app in (
+            create_fake_telegram_app(UpstreamProfile.from_dict(telegram_profile)),
+            create_fake_openai_app(UpstreamProfile.from_dict(openai_profile)),
+        ):
+            app_runner = web.AppRunner(app, access_log=None)
+            await app_runner.setup()
+            site = web.TCPSite(app_runner, "127.0.0.1", 0, backlog=1024)
+            await site.start()
+            ports.append(app_runner.addresses[0][1])
+        conn.send(ports)
+        conn.close()
+        await asyncio.Event().wait()
+
+    asyncio.run(_serve())
+
+
+class FakeUpstreams:
+    """Процес з фейковими Telegram Bot API та OpenAI API"""
+
+    def __init__(self, telegram_profile: UpstreamProfile, openai_profile: UpstreamProfile):
+        self.telegram_profile = telegram_profile
+        self.openai_profile = openai_profile
+        self.telegram_url = ""
+        self.openai_url = ""
+        self._process: Optional[multiprocessing.Process] = None
+
+    def start(self) -> "FakeUpstreams":
+        ctx = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = ctx.Pipe(duplex=False)
+        self._process = ctx.Process(
+            target=_serve_fakes,
+            args=(self.telegram_profile.to_dict(), self.openai_profile.to_dict(), child_conn),
+            daemon=True,
+        )
+        self._process.start()
+        if not parent_conn.poll(30):
+            self.stop()
+            raise RuntimeError("Фейкові upstream'и не стартували за 30 с")
+        telegram_port, openai_port = parent_conn.recv()
+        self.telegram_url = f"http://127.0.0.1:{telegram_port}"
+        self.openai_url = f"http://127.0.0.1:{openai_port}"
+        return self
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join(5)
+            self._process = None
+
+    async def stats(self) -> Dict[str, Any]:
+        import aiohttp
+
+        async with aiohttp.ClientSession() as session:
+            result = {}
+            for name, url in (("telegram", self.telegram_url), ("openai", self.openai_url)):
+                async with session.get(f"{url}/_stats") as resp:
+                    result[name] = await resp.json()
+            return result
+
+    def __enter__(self) -> "FakeUpstreams":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def configure_environment(upstreams: FakeUpstreams, log_level: str = "WARNING") -> None:
+    """
+    Спрямовує бота на фейкові upstream'и. Викликати ДО імпорту webhook_bot,
+    бо config читає змінні середовища під час імпорту.
+    """
+    os.environ["BOT_TOKEN"] = LOADTEST_BOT_TOKEN
+    os.environ["OPENAI_API_KEY"] = "sk-loadtest"
+    os.environ["TELEGRAM_API_URL"] = upstreams.telegram_url
+    os.environ["OPENAI_BASE_URL"] = f"{upstreams.openai_url}/v1"
+    os.environ.setdefault("LOG_LEVEL", log_level)
+    os.environ.setdefault("TRACE_SAMPLE_RATE", "0")
+
+
+# ---------- Вимірювання ----------
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль методом найближчого рангу (q у діапазоні 0..100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    """p50/p90/p99/max у мілісекундах"""
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p90_ms": round(percentile(values, 90) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2) if values else 0.0,
+    }
+
+
+def read_memory() -> Dict[str, float]:
+    """Поточний та піковий RSS процесу в МБ"""
+    memory = {}
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, value = line.split(":", 1)
+                    memory["rss_mb" if key == "VmRSS" else "peak_rss_mb"] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        # не Linux: лише пік з getrusage (на Linux у КБ, на macOS у байтах)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        memory["peak_rss_mb"] = round(peak / (1024 * 1024 if peak > 1 << 30 else 1024), 1)
+    return memory
+
+
+class ProcessingTracker:
+    """
+    Outer-middleware, що фіксує завершення обробки кожного апдейту:
+    час обробки, помилки хендлерів і сигнал для сесії, що чекає.
+    """
+
+    def __init__(self):
+        self.waiters: Dict[int, asyncio.Future] = {}
+        self.handler_seconds: List[float] = []
+        self.handler_errors = 0
+
+    def expect(self, update_id: int) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.waiters[update_id] = future
+        return future
+
+    async def __call__(self, handler: Callable[..., Awaitable[Any]], event, data: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            self.handler_errors += 1
+            raise
+        finally:
+            self.handler_seconds.append(time.perf_counter() - started)
+            future = self.waiters.pop(event.update_id, None)
+            if future is not None and not future.done():
+                future.set_result(None)
+
+
+class TaskSampler:
+    """Періодично знімає кількість asyncio-задач (пік та часовий ряд)"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_tasks = 0
+        self.samples: List[Tuple[float, int]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        started = time.perf_counter()
+        while True:
+            count = len(asyncio.all_tasks())
+            self.peak_tasks = max(self.peak_tasks, count)
+            self.samples.append((time.perf_counter() - started, count))
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+# ---------- Прогін ----------
+
+async def wait_for_drain(baseline_tasks: int, timeout: float) -> bool:
+    """Чекає, доки фонові задачі бота (TTS/зображення) завершаться"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if len(asyncio.all_tasks()) <= baseline_tasks:
+            return True
+        await asyncio.sleep(0.05)
+    return False
+
+
+class WebhookDriver:
+    """
+    Бот на локальному порту + відтворення сесій з обліком латентності.
+    Статистика накопичується до виклику take_stats(), тож довгі прогони
+    (soak) не тримають в пам'яті всю історію вимірювань.
+    """
+
+    def __init__(self, app_factory: Callable[[], Any], dispatcher, mix: str,
+                 think_time: float = 0.0, update_timeout: float = 120.0):
+        self.app_factory = app_factory
+        self.scenario_mix = parse_mix(mix)
+        self.think_time = think_time
+        self.update_timeout = update_timeout
+        self.tracker = ProcessingTracker()
+        dispatcher.update.outer_middleware(self.tracker)
+        self.webhook_url = ""
+        self._app_runner = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.ack_seconds: List[float] = []
+        self.e2e_seconds: List[float] = []
+        self.per_scenario: Dict[str, List[float]] = {name: [] for name, _ in self.scenario_mix}
+        self.tracker.handler_seconds = []
+        self.tracker.handler_errors = 0
+        self.http_errors = 0
+        self.timeouts = 0
+        self.updates_sent = 0
+
+    async def start(self) -> None:
+        from aiohttp import web
+
+        from config import WEBHOOK_PATH
+
+        self._app_runner = web.AppRunner(self.app_factory(), access_log=None)
+        await self._app_runner.setup()
+        site = web.TCPSite(self._app_runner, "127.0.0.1", 0, backlog=4096)
+        await site.start()
+        self.webhook_url = f"http://127.0.0.1:{self._app_runner.addresses[0][1]}{WEBHOOK_PATH}"
+
+    async def stop(self) -> None:
+        if self._app_runner is not None:
+            await self._app_runner.cleanup()
+            self._app_runner = None
+
+    async def play_session(self, client, user_id: int) -> None:
+        """Надсилає апдейти однієї сесії, чекаючи обробки кожного"""
+        tracker = self.tracker
+        name = pick_scenario(self.scenario_mix)
+        session_started = time.perf_counter()
+        for update in SCENARIOS[name](user_id):
+            done = tracker.expect(update["update_id"])
+            sent = time.perf_counter()
+            async with client.post(self.webhook_url, json=update) as resp:
+                await resp.read()
+                self.ack_seconds.append(time.perf_counter() - sent)
+                self.updates_sent += 1
+                if resp.status != 200:
+                    self.http_errors += 1
+                    tracker.waiters.pop(update["update_id"], None)
+                    continue
+            try:
+                await asyncio.wait_for(done, self.update_timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                tracker.waiters.pop(update["update_id"], None)
+                continue
+            self.e2e_seconds.append(time.perf_counter() - sent)
+            if self.think_time:
+                await asyncio.sleep(random.uniform(0, 2 * self.think_time))
+        self.per_scenario[name].append(time.perf_counter() - session_started)
+
+    def take_stats(self) -> Dict[str, Any]:
+        """Зведення з моменту попереднього виклику; лічильники обнуляються"""
+        stats = {
+            "updates": self.updates_sent,
+            "webhook_ack": latency_summary(self.ack_seconds),
+            "end_to_end": latency_summary(self.e2e_seconds),
+            "handler": latency_summary(self.tracker.handler_seconds),
+            "sessions_by_scenario": {
+                name: latency_summary(values) for name, values in self.per_scenario.items() if values
+            },
+            "errors": {
+                "http": self.http_errors,
+                "timeouts": self.timeouts,
+                "handler_exceptions": self.tracker.handler_errors,
+            },
+        }
+        self._reset()
+        return stats
+
+
+async def run_load(
+    app_factory: Callable[[], Any],
+    dispatcher,
+    sessions: int,
+    concurrency: int,
+    mix: str,
+    think_time: float = 0.0,
+    update_timeout: float = 120.0,
+    drain_timeout: float = 300.0,
+) -> Dict[str, Any]:
+    """
+    Запускає app_factory() на локальному порту і проганяє `sessions` сесій,
+    з яких одночасно активні не більше `concurrency`.
+    """
+    import aiohttp
+
+    driver = WebhookDriver(app_factory, dispatcher, mix, think_time, update_timeout)
+    await driver.start()
+
+    sampler = TaskSampler()
+    sampler.start()
+    await asyncio.sleep(0)
+    baseline_tasks = len(asyncio.all_tasks())
+    memory_before = read_memory()
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _bounded(client: aiohttp.ClientSession, user_id: int) -> None:
+        async with semaphore:
+            await driver.play_session(client, user_id)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    started = time.perf_counter()
+    async with aiohttp.ClientSession(connector=connector) as client:
+        await asyncio.gather(*(_bounded(client, 100000 + i) for i in range(sessions)))
+    load_seconds = time.perf_counter() - started
+
+    drained = await wait_for_drain(baseline_tasks, drain_timeout)
+    total_seconds = time.perf_counter() - started
+    await sampler.stop()
+    await driver.stop()
+
+    stats = driver.take_stats()
+    return {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "duration_s": round(load_seconds, 3),
+        "drain_s": round(total_seconds - load_seconds, 3),
+        "drained": drained,
+        "throughput_ups": round(stats["updates"] / load_seconds, 1) if load_seconds else 0.0,
+        **stats,
+        "tasks": {"baseline": baseline_tasks, "peak": sampler.peak_tasks},
+        "memory": {"before": memory_before, "after": read_memory()},
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"Сесій: {report['sessions']} (паралельно {report['concurrency']}), апдейтів: {report['updates']}",
+        f"Тривалість: {report['duration_s']} с, дренаж фонових задач: {report['drain_s']} с"
+        + ("" if report["drained"] else " (НЕ завершено)"),
+        f"Пропускна здатність: {report['throughput_ups']} апдейтів/с",
+    ]
+    perf = report.get("perf")
+    if perf:
+        lines.append(f"Профіль: {perf['profile']} (loop={perf['loop']}, json={perf['json']})")
+    lines += [
+        "",
+        f"{'латентність':<28}{'n':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  (мс)",
+    ]
+
+    def _row(label: str, summary: Dict[str, float]) -> str:
+        return (f"{label:<28}{summary['count']:>8}{summary['p50_ms']:>10}{summary['p90_ms']:>10}"
+                f"{summary['p99_ms']:>10}{summary['max_ms']:>10}")
+
+    lines.append(_row("webhook ACK", report["webhook_ack"]))
+    lines.append(_row("апдейт end-to-end", report["end_to_end"]))
+    lines.append(_row("хендлер", report["handler"]))
+    for name, summary in report["sessions_by_scenario"].items():
+        lines.append(_row(f"сесія {name}", summary))
+
+    errors = report["errors"]
+    memory = report["memory"]
+    lines += [
+        "",
+        f"Помилки: HTTP {errors['http']}, таймаути {errors['timeouts']}, винятки хендлерів {errors['handler_exceptions']}",
+        f"asyncio-задачі: базово {report['tasks']['baseline']}, пік {report['tasks']['peak']}",
+        f"RSS: {memory['before'].get('rss_mb', '?')} → {memory['after'].get('rss_mb', '?')} МБ, "
+        f"пік {memory['after'].get('peak_rss_mb', '?')} МБ",
+    ]
+    upstream = report.get("upstream")
+    if upstream:
+        for name, stats in upstream.items():
+            calls = ", ".join(f"{method}={count}" for method, count in sorted(stats["calls"].items()))
+            failures = ", ".join(f"{key}={count}" for key, count in sorted(stats["failures"].items())) or "—"
+            lines.append(f"{name}: {calls}; відмови: {failures}")
+    return "\n".join(lines)
@@ -0,0 +1,134 @@
+"""
+Синтетичні потоки апдейтів: сесія користувача — послідовність апдейтів
+(команди, натискання кнопок, FSM-діалоги), які надсилаються по черзі.
+"""
+import itertools
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+
+_update_ids = itertools.count(1)
+_message_ids = itertools.count(1)
+_callback_ids = itertools.count(1)
+
+
+def _user(user_id: int) -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": f"Load{user_id}", "language_code": "uk"}
+
+
+def _message(user_id: int, text: str) -> dict:
+    message = {
+        "message_id": next(_message_ids),
+        "date": int(time.time()),
+        "chat": {"id": user_id, "type": "private"},
+        "from": _user(user_id),
+        "text": text,
+    }
+    if text.startswith("/"):
+        command = text.split(maxsplit=1)[0]
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+    return message
+
+
+def message_update(user_id: int, text: str) -> dict:
+    return {"update_id": next(_update_ids), "message": _message(user_id, text)}
+
+
+def callback_update(user_id: int, data: str) -> dict:
+    return {
+        "update_id": next(_update_ids),
+        "callback_query": {
+            "id": str(next(_callback_ids)),
+            "from": _user(user_id),
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": _message(user_id, "menu"),
+        },
+    }
+
+
+# Сесія = список апдейтів одного користувача
+Session = List[dict]
+
+
+def commands_session(user_id: int) -> Session:
+    return [
+        message_update(user_id, "/start"),
+        message_update(user_id, "/help"),
+        message_update(user_id, "/echo навантажувальний тест"),
+        message_update(user_id, "/info"),
+    ]
+
+
+def settings_session(user_id: int) -> Session:
+    return [
+        callback_update(user_id, "settings"),
+        callback_update(user_id, "settings_voice"),
+        callback_update(user_id, random.choice(["voice_nova", "voice_alloy", "voice_echo"])),
+        callback_update(user_id, "settings_speed"),
+        callback_update(user_id, random.choice(["speed_1.0", "speed_1.25"])),
+        callback_update(user_id, "back_to_menu"),
+    ]
+
+
+def ask_session(user_id: int) -> Session:
+    return [message_update(user_id, "/ask Що таке асинхронне програмування?")]
+
+
+def fsm_ask_session(user_id: int) -> Session:
+    return [
+        callback_update(user_id, "ask_ai"),
+        message_update(user_id, "Поясни, як працює event loop у Python"),
+    ]
+
+
+def fsm_translate_session(user_id: int) -> Session:
+    return [
+        callback_update(user_id, "translate"),
+        message_update(user_id, "Добрий день, як справи?"),
+    ]
+
+
+def tts_session(user_id: int) -> Session:
+    return [message_update(user_id, "/tts Привіт! Це перевірка озвучки тексту.")]
+
+
+def image_session(user_id: int) -> Session:
+    return [
+        callback_update(user_id, "image"),
+        message_update(user_id, "Кіт-астронавт на Місяці, акварель"),
+    ]
+
+
+SCENARIOS: Dict[str, Callable[[int], Session]] = {
+    "commands": commands_session,
+    "settings": settings_session,
+    "ask": ask_session,
+    "fsm_ask": fsm_ask_session,
+    "fsm_translate": fsm_translate_session,
+    "tts": tts_session,
+    "image": image_session,
+}
+
+# Суміш за замовчуванням: переважно дешеві апдейти, трохи важких
+DEFAULT_MIX = "commands=30,settings=20,ask=15,fsm_ask=15,fsm_translate=10,tts=6,image=4"
+
+
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    """Розбирає "name=weight,..." у список (сценарій, вага)"""
+    mix = []
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition("=")
+        if not name:
+            continue
+        if name not in SCENARIOS:
+            raise ValueError(f"Невідомий сценарій: {name} (доступні: {', '.join(SCENARIOS)})")
+        mix.append((name, float(weight or 1)))
+    if not mix:
+        raise ValueError("Порожня суміш сценаріїв")
+    return mix
+
+
+def pick_scenario(mix: List[Tuple[str, float]]) -> str:
+    names, weights = zip(*mix)
+    return random.choices(names, weights=weights)[0]
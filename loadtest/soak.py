@@ -0,0 +1,247 @@
+"""
+Soak-тест: годинами ганяє webhook-бота проти фейкових upstream'ів і шукає витоки.
+
+    python -m loadtest.soak --duration 4h --interval 60
+    python -m loadtest.soak --duration 20m --users 0 --max-rss-growth-mb 30
+
+Кожен інтервал знімає RSS, пам'ять під tracemalloc, кількість asyncio-задач,
+лічильники gc та розмір кешу налаштувань користувачів. Після прогріву
+фіксується базовий знімок; в кінці порівнюється зростання з порогами.
+При перевищенні — код виходу 1 і дамп різниці алокацій (top allocators).
+"""
+import argparse
+import asyncio
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+from loadtest.profiles import UpstreamProfile
+from loadtest.runner import FakeUpstreams, WebhookDriver, configure_environment, read_memory, wait_for_drain
+from loadtest.scenarios import DEFAULT_MIX
+
+# Алокації самого харнеса та інтерпретатора не цікаві
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+    tracemalloc.Filter(False, "*/loadtest/*"),
+)
+
+
+def parse_duration(value: str) -> float:
+    """'90', '90s', '30m', '4h' → секунди"""
+    value = value.strip().lower()
+    units = {"s": 1, "m": 60, "h": 3600}
+    if value and value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+
+def linear_slope(points: List[Tuple[float, float]]) -> float:
+    """Нахил МНК-прямої (одиниць y на одиницю x); 0 для менш ніж двох точок"""
+    if len(points) < 2:
+        return 0.0
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if not var_x:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+
+
+def _snapshot() -> Optional[tracemalloc.Snapshot]:
+    if not tracemalloc.is_tracing():
+        return None
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+def format_allocation_diff(current: tracemalloc.Snapshot, baseline: tracemalloc.Snapshot, top: int) -> str:
+    """Top allocators за приростом пам'яті з моменту базового знімка"""
+    lines = [f"Top {top} приростів алокацій (траса від місця алокації назовні):"]
+    for index, stat in enumerate(current.compare_to(baseline, "traceback")[:top], 1):
+        lines.append(
+            f"#{index}: {stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} блоків), всього {stat.size / 1024:.1f} KiB"
+        )
+        lines.extend(f"    {line}" for line in stat.traceback.format(limit=8, most_recent_first=True))
+    return "\n".join(lines)
+
+
+def _sample(started: float, user_settings, stats: Dict[str, Any]) -> Dict[str, Any]:
+    memory = read_memory()
+    sample = {
+        "t_s": round(time.perf_counter() - started, 1),
+        "rss_mb": memory.get("rss_mb"),
+        "tasks": len(asyncio.all_tasks()),
+        "gc_counts": gc.get_count(),
+        "gc_collections": [generation["collections"] for generation in gc.get_stats()],
+        "gc_garbage": len(gc.garbage),
+        "user_settings": len(user_settings),
+        "updates": stats["updates"],
+        "e2e_p99_ms": stats["end_to_end"]["p99_ms"],
+        "errors": sum(stats["errors"].values()),
+    }
+    if tracemalloc.is_tracing():
+        sample["traced_mb"] = round(tracemalloc.get_traced_memory()[0] / (1024 * 1024), 2)
+    return sample
+
+
+def _format_sample(sample: Dict[str, Any]) -> str:
+    traced = f" traced={sample['traced_mb']}MB" if "traced_mb" in sample else ""
+    return (
+        f"[{sample['t_s']:>8}s] rss={sample['rss_mb']}MB{traced} tasks={sample['tasks']} "
+        f"gc={sample['gc_counts']} users={sample['user_settings']} "
+        f"updates={sample['updates']} p99={sample['e2e_p99_ms']}ms errors={sample['errors']}"
+    )
+
+
+async def soak(args: argparse.Namespace, upstreams: FakeUpstreams) -> Dict[str, Any]:
+    import aiohttp
+
+    import startup
+    import handlers
+    import webhook_bot  # імпорт лише після configure_environment
+
+    driver = WebhookDriver(webhook_bot.create_app, webhook_bot.dp, args.mix, think_time=args.think)
+    await driver.start()
+
+    # tracemalloc вмикається після імпорту важких SDK: під трасуванням імпорт
+    # openai займає хвилини і блокує event loop, а витоки шукаємо лише в рантаймі
+    await startup.warm_up()
+    if not args.no_tracemalloc:
+        tracemalloc.start(args.frames)
+    baseline_tasks = len(asyncio.all_tasks())
+
+    stop = asyncio.Event()
+    user_ids = iter(range(1_000_000, sys.maxsize))
+
+    def _next_user() -> int:
+        # --users 0: кожна сесія — новий користувач; інакше — обмежена популяція
+        return next(user_ids) if args.users == 0 else 1_000_000 + random.randrange(args.users)
+
+    async def _worker(client: aiohttp.ClientSession) -> None:
+        while not stop.is_set():
+            await driver.play_session(client, _next_user())
+
+    started = time.perf_counter()
+    deadline = started + args.duration
+    warmup_until = started + args.warmup
+    samples: List[Dict[str, Any]] = []
+    baseline_sample: Optional[Dict[str, Any]] = None
+    baseline_snapshot = None
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as client:
+        workers = [asyncio.create_task(_worker(client)) for _ in range(args.concurrency)]
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(min(args.interval, max(0.0, deadline - time.perf_counter())))
+            sample = _sample(started, handlers.user_settings, driver.take_stats())
+            samples.append(sample)
+            print(_format_sample(sample), flush=True)
+            if baseline_sample is None and time.perf_counter() >= warmup_until:
+                baseline_snapshot = _snapshot()
+                baseline_sample = sample
+        stop.set()
+        await asyncio.gather(*workers)
+
+    await wait_for_drain(baseline_tasks, 300.0)
+    await driver.stop()
+    await webhook_bot.bot.session.close()
+
+    final_snapshot = _snapshot()
+    final = _sample(started, handlers.user_settings, driver.take_stats())
+    if baseline_sample is None:
+        # прогін коротший за прогрів — порівнюємо з першим семплом
+        baseline_sample = samples[0] if samples else final
+    steady = [s for s in samples if s["t_s"] >= baseline_sample["t_s"]] + [final]
+
+    rss_growth = (final["rss_mb"] or 0) - (baseline_sample["rss_mb"] or 0)
+    traced_growth = final.get("traced_mb", 0) - baseline_sample.get("traced_mb", 0)
+    failures = []
+    if rss_growth > args.max_rss_growth_mb:
+        failures.append(f"RSS зріс на {rss_growth:.1f} МБ (поріг {args.max_rss_growth_mb} МБ)")
+    if tracemalloc.is_tracing() and traced_growth > args.max_traced_growth_mb:
+        failures.append(f"tracemalloc: +{traced_growth:.1f} МБ (поріг {args.max_traced_growth_mb} МБ)")
+    if final["tasks"] > baseline_tasks:
+        failures.append(f"після дренажу лишилось {final['tasks'] - baseline_tasks} зайвих asyncio-задач")
+
+    report = {
+        "duration_s": round(time.perf_counter() - started, 1),
+        "baseline": baseline_sample,
+        "final": final,
+        "rss_growth_mb": round(rss_growth, 1),
+        "traced_growth_mb": round(traced_growth, 2),
+        "rss_slope_mb_per_h": round(linear_slope([(s["t_s"], s["rss_mb"] or 0) for s in steady]) * 3600, 2),
+        "failures": failures,
+        "samples": samples,
+        "upstream": await upstreams.stats(),
+    }
+    if baseline_snapshot is not None and final_snapshot is not None and (failures or args.dump):
+        diff = format_allocation_diff(final_snapshot, baseline_snapshot, args.top)
+        path = args.dump or "soak_alloc_diff.txt"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(diff + "\n")
+        report["allocation_diff"] = path
+        print("\n" + "\n".join(diff.splitlines()[:40]))
+    return report
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m loadtest.soak", description="Soak-тест і детектор витоків пам'яті")
+    parser.add_argument("--duration", type=parse_duration, default=parse_duration("1h"), help="Тривалість: 90s, 30m, 4h")
+    parser.add_argument("--interval", type=parse_duration, default=60.0, help="Інтервал семплювання")
+    parser.add_argument("--warmup", type=parse_duration, default=parse_duration("5m"),
+                        help="Прогрів до базового знімка (кеші, ліниві імпорти, пули з'єднань)")
+    parser.add_argument("--concurrency", type=int, default=10, help="Одночасно активних сесій")
+    parser.add_argument("--think", type=float, default=0.5, help="Середня пауза користувача між апдейтами, с")
+    parser.add_argument("--users", type=int, default=5000,
+                        help="Розмір популяції користувачів (0 — кожна сесія від нового користувача)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Суміш сценаріїв name=weight")
+    parser.add_argument("--tg-latency", type=float, default=0.03, help="Латентність фейкового Telegram, с")
+    parser.add_argument("--openai-latency", type=float, default=0.3, help="Латентність фейкового OpenAI, с")
+    parser.add_argument("--openai-errors", type=float, default=0.01, help="Частка відповідей 500 від OpenAI")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=50.0, help="Допустимий приріст RSS після прогріву")
+    parser.add_argument("--max-traced-growth-mb", type=float, default=20.0,
+                        help="Допустимий приріст пам'яті під tracemalloc після прогріву")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Не вмикати tracemalloc (менший overhead)")
+    parser.add_argument("--frames", type=int, default=10, help="Глибина трас tracemalloc")
+    parser.add_argument("--top", type=int, default=25, help="Скільки алокаторів включати в дамп")
+    parser.add_argument("--dump", help="Файл для дампу різниці алокацій (за замовчуванням лише при провалі)")
+    parser.add_argument("--json", dest="json_path", help="Зберегти звіт у JSON-файл")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    telegram = UpstreamProfile(args.tg_latency)
+    openai = UpstreamProfile(args.openai_latency, error_rate=args.openai_errors)
+    with FakeUpstreams(telegram, openai) as upstreams:
+        configure_environment(upstreams)
+        report = asyncio.run(soak(args, upstreams))
+
+    print(
+        f"\nТривалість {report['duration_s']} с; RSS {report['baseline']['rss_mb']} → {report['final']['rss_mb']} МБ "
+        f"({report['rss_growth_mb']:+} МБ, тренд {report['rss_slope_mb_per_h']:+} МБ/год); "
+        f"tracemalloc {report['traced_growth_mb']:+} МБ"
+    )
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if report["failures"]:
+        for failure in report["failures"]:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Зростання пам'яті в межах порогів")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+Неблокуюче логування: записи потрапляють в обмежену чергу, а форматування
+та запис у stream виконує окремий потік (QueueListener). Event loop лише
+кладе запис у чергу, тож логування не конкурує з обробкою апдейтів.
+
+  - LOG_FORMAT=json — структуровані JSON-записи (одна подія на рядок)
+  - LOG_SAMPLING="openai_service=0.1,aiogram.event=0.05" — вибірка записів
+    нижче WARNING для гучних логерів
+  - LOG_REDACT_PROMPTS — не писати в логи тексти користувачів (див. Redacted)
+  - LOG_QUEUE_SIZE — розмір черги; при переповненні записи відкидаються
+    і рахуються в метриці bot_log_records_dropped_total
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import metrics
+import tracing
+from config import LOG_FORMAT, LOG_QUEUE_SIZE, LOG_REDACT_PROMPTS, LOG_SAMPLING
+
+LOG_RECORDS_DROPPED = metrics.REGISTRY.counter(
+    "bot_log_records_dropped_total", "Записи логів, відкинуті через переповнену чергу",
+)
+LOG_RECORDS_SAMPLED_OUT = metrics.REGISTRY.counter(
+    "bot_log_records_sampled_out_total", "Записи логів, відкинуті семплінгом", ("logger",),
+)
+LOG_QUEUE_DEPTH = metrics.JOB_QUEUE_DEPTH.labels("log")
+
+# Атрибути LogRecord, які не є користувацькими полями (extra=...)
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "trace_id"}
+
+_TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+class Redacted:
+    """
+    Ліниве представлення тексту користувача для логів.
+    Рядок будується лише у потоці логування, і лише якщо запис не відкинуто.
+    """
+
+    __slots__ = ("_text", "_preview")
+
+    def __init__(self, text: Optional[str], preview: int = 100):
+        self._text = text or ""
+        self._preview = preview
+
+    def __str__(self) -> str:
+        if LOG_REDACT_PROMPTS:
+            return f"<redacted {len(self._text)} chars>"
+        if len(self._text) > self._preview:
+            return self._text[:self._preview] + "..."
+        return self._text
+
+    __repr__ = __str__
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """Розбирає "logger=rate,logger2=rate" у словник"""
+    rates: Dict[str, float] = {}
+    for item in spec.split(","):
+        name, sep, rate = item.strip().partition("=")
+        if not sep or not name:
+            continue
+        try:
+            rates[name.strip()] = max(0.0, min(1.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Пропускає лише частку записів нижче WARNING для логерів з LOG_SAMPLING
+    (правило дочірнього логера успадковується від батьківського).
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, Optional[float]] = {}
+
+    def _rate_for(self, name: str) -> Optional[float]:
+        if name not in self._resolved:
+            rate = None
+            probe = name
+            while probe:
+                if probe in self.rates:
+                    rate = self.rates[probe]
+                    break
+                probe = probe.rpartition(".")[0]
+            self._resolved[name] = rate
+        return self._resolved[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate_for(record.name)
+        if rate is None or random.random() < rate:
+            return True
+        LOG_RECORDS_SAMPLED_OUT.labels(record.name).inc()
+        return False
+
+
+class _TraceContextFilter(logging.Filter):
+    """Додає trace id поточного апдейту (contextvars читаються лише в потоці event loop)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = tracing.current_trace_id()
+        return True
+
+
+class _BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler без форматування у потоці, що логує: повідомлення
+    (msg % args) збирається вже у потоці QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+class JsonFormatter(logging.Formatter):
+    """Один JSON-об'єкт на запис: час, рівень, логер, повідомлення, trace id та extra-поля"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            payload["trace_id"] = trace_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(level: str, fmt: str = LOG_FORMAT) -> None:
+    """
+    Налаштовує кореневий логер на неблокуючий конвеєр.
+    Повторний виклик нічого не робить.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    LOG_QUEUE_DEPTH.set_function(log_queue.qsize)
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(_TEXT_FORMAT))
+
+    queue_handler = _BoundedQueueHandler(log_queue)
+    rates = parse_sampling(LOG_SAMPLING)
+    if rates:
+        queue_handler.addFilter(SamplingFilter(rates))
+    queue_handler.addFilter(_TraceContextFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Дописує залишок черги та зупиняє потік логування"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
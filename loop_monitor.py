@@ -0,0 +1,191 @@
+"""
+Монітор event loop: затримка (lag) і зависання з трасою стеку.
+
+Єдиний event loop обробляє всі апдейти, тому будь-яка блокуюча робота
+(регулярні вирази над величезним текстом, base64, синхронне логування)
+зупиняє бота для всіх. Дешева заміна asyncio debug mode для продакшену:
+  - семплер — задача, що кожні LOOP_MONITOR_INTERVAL засинає і міряє,
+    наскільки пізніше прокинулась (bot_event_loop_lag_seconds);
+  - watchdog — окремий потік, що стежить за "серцебиттям" семплера; якщо
+    loop не відповідає довше LOOP_SLOW_THRESHOLD, він знімає стек потоку
+    event loop (sys._current_frames) і поточну задачу — саме той код,
+    що блокує, — пише WARNING і рахує зависання в метриках.
+Останні зависання зберігаються в LoopMonitor.stalls.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Optional
+
+import metrics
+from config import LOOP_MONITOR_ENABLED, LOOP_MONITOR_INTERVAL, LOOP_SLOW_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG = metrics.REGISTRY.gauge("bot_event_loop_lag_seconds", "Затримка event loop за останнім виміром")
+LOOP_LAG_HIST = metrics.REGISTRY.histogram(
+    "bot_event_loop_lag_sample_seconds", "Розподіл вимірів затримки event loop",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_STALLS = metrics.REGISTRY.counter("bot_event_loop_stalls_total", "Зависання event loop довше порогу")
+LOOP_STALL_SECONDS = metrics.REGISTRY.histogram(
+    "bot_event_loop_stall_seconds", "Тривалість зависань event loop",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+# зовнішні кадри показують, чий це хендлер, внутрішні — що саме блокує
+_STACK_OUTER = 10
+_STACK_INNER = 30
+_LAG_SMOOTHING = 0.3
+
+
+@dataclass
+class Stall:
+    """Зафіксоване зависання: коли, скільки тривало, яка задача і де саме"""
+    started: float  # time.time() останнього серцебиття перед зависанням
+    duration: float  # оновлюється, доки loop не відпустить
+    task: str
+    stack: str
+
+
+def _format_stack(frame) -> str:
+    frames = traceback.extract_stack(frame)
+    # кадри самого event loop (run_forever → Handle._run) нічого не кажуть
+    for index in range(len(frames) - 1, -1, -1):
+        if frames[index].name == "_run" and frames[index].filename.endswith(os.path.join("asyncio", "events.py")):
+            frames = traceback.StackSummary.from_list(frames[index + 1:])
+            break
+    if len(frames) <= _STACK_OUTER + _STACK_INNER:
+        return "".join(frames.format())
+    head = traceback.StackSummary.from_list(frames[:_STACK_OUTER]).format()
+    tail = traceback.StackSummary.from_list(frames[-_STACK_INNER:]).format()
+    skipped = len(frames) - _STACK_OUTER - _STACK_INNER
+    return "".join(head) + f"  ... ще {skipped} кадрів ...\n" + "".join(tail)
+
+
+def _describe_task(task: Optional[asyncio.Task]) -> str:
+    if task is None:
+        return "<callback поза задачею>"
+    coro = task.get_coro()
+    name = getattr(coro, "__qualname__", None) or repr(coro)
+    return f"{task.get_name()} ({name})"
+
+
+class LoopMonitor:
+    """
+    Args:
+        interval: Період семплера, секунди
+        slow_threshold: Після скількох секунд без відповіді loop вважається завислим
+        keep: Скільки останніх зависань зберігати
+    """
+
+    def __init__(self, interval: float = 0.25, slow_threshold: float = 0.2, keep: int = 20):
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.lag = 0.0
+        self.lag_avg = 0.0  # згладжена затримка: поодинокий сплеск не перемикає деградацію
+        self.stalls: Deque[Stall] = deque(maxlen=keep)
+        self._beat = time.monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        LOOP_LAG.set_function(lambda: self.lag)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            # наскільки пізніше за заплановане прокинувся таймер
+            self.lag = max(0.0, loop.time() - started - self.interval)
+            self.lag_avg += _LAG_SMOOTHING * (self.lag - self.lag_avg)
+            LOOP_LAG_HIST.observe(self.lag)
+
+    def _capture(self, started: float) -> Stall:
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = _format_stack(frame) if frame is not None else ""
+        # current_task лише читає словник поточних задач — безпечно з іншого потоку
+        task = asyncio.current_task(self._loop)
+        silent = time.monotonic() - started
+        return Stall(time.time() - silent, silent - self.interval, _describe_task(task), stack)
+
+    def _watch(self) -> None:
+        # loop "відповідає", якщо семплер прокидається не пізніше interval + slow_threshold
+        limit = self.interval + self.slow_threshold
+        stall: Optional[Stall] = None
+        stalled_beat = None
+        while not self._stop.wait(min(self.slow_threshold / 2, 0.1)):
+            beat = self._beat
+            silent = time.monotonic() - beat
+            if stall is not None and beat != stalled_beat:
+                LOOP_STALL_SECONDS.observe(stall.duration)
+                logger.info("Event loop відновився після %.3f с (%s)", stall.duration, stall.task)
+                stall = None
+            if silent > limit:
+                if stall is None:
+                    stall = self._capture(beat)
+                    stalled_beat = beat
+                    self.stalls.append(stall)
+                    LOOP_STALLS.inc()
+                    logger.warning("🐢 Event loop заблоковано понад %.3f с, задача %s:\n%s",
+                                   silent - self.interval, stall.task, stall.stack)
+                stall.duration = silent - self.interval
+
+    def start(self) -> None:
+        """Запускає семплер у поточному loop і watchdog-потік (повторний виклик нічого не робить)"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = metrics.track_task(self._sample(), "loop_monitor")
+        self._stop.clear()
+        if self.slow_threshold > 0:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+
+_loop_monitor: Optional[LoopMonitor] = None
+
+
+def get_loop_monitor() -> LoopMonitor:
+    """Отримати глобальний екземпляр монітора event loop"""
+    global _loop_monitor
+    if _loop_monitor is None:
+        _loop_monitor = LoopMonitor(interval=LOOP_MONITOR_INTERVAL, slow_threshold=LOOP_SLOW_THRESHOLD)
+    return _loop_monitor
+
+
+async def on_startup() -> None:
+    if LOOP_MONITOR_ENABLED:
+        get_loop_monitor().start()
+
+
+async def on_shutdown() -> None:
+    await get_loop_monitor().stop()
@@ -0,0 +1,336 @@
+"""
+Метрики у форматі Prometheus (text exposition 0.0.4) без зовнішніх залежностей.
+
+Лічильники не використовують локів: усе оновлюється з одного event loop,
+а операції над dict/list атомарні під GIL. Оновлення метрики — це пошук
+дочірнього об'єкта в dict за кортежем лейблів і кілька арифметичних операцій,
+тож метрики можна тримати увімкненими в продакшені.
+"""
+import abc
+import asyncio
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Бакети за замовчуванням для латентності (секунди)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Бакети для розмірів payload (байти): 1 КБ … 16 МБ
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 2097152, 4194304, 8388608, 16777216)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(abc.ABC):
+    """Базовий клас метрики з лейблами"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """Дочірня метрика для конкретного набору лейблів (кешується)"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: очікується {len(self.labelnames)} лейблів, отримано {len(key)}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """Новий дочірній об'єкт для набору лейблів"""
+
+    def _default(self):
+        return self.labels()
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for key, child in list(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    """Монотонний лічильник"""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+
+class _GaugeChild:
+    __slots__ = ("value", "_function")
+
+    def __init__(self):
+        self.value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Значення обчислюється лише під час scrape"""
+        self._function = function
+
+    def current(self) -> float:
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception:
+                return float("nan")
+        return self.value
+
+
+class Gauge(_Metric):
+    """Значення, яке може зростати і спадати"""
+
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._default().set_function(function)
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.current())}"]
+
+
+class _HistogramChild:
+    __slots__ = ("_upper_bounds", "counts", "sum", "count")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self._upper_bounds = upper_bounds
+        # останній елемент — бакет +Inf
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self._upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> "_Timer":
+        """Контекстний менеджер, що вимірює тривалість блоку"""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("_child", "_started")
+
+    def __init__(self, child: _HistogramChild):
+        self._child = child
+        self._started = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._started)
+        return False
+
+
+class Histogram(_Metric):
+    """Гістограма з фіксованими бакетами (кумулятивні лічильники рахуються при scrape)"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self) -> _Timer:
+        return self._default().time()
+
+    def _render_child(self, key, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class Registry:
+    """Реєстр метрик процесу"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрику {metric.name} вже зареєстровано")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ---------- Метрики бота ----------
+
+UPDATE_LATENCY = REGISTRY.histogram(
+    "bot_update_handling_seconds", "Час обробки апдейту Telegram", ("kind", "handler"),
+)
+OPENAI_LATENCY = REGISTRY.histogram(
+    "openai_request_seconds", "Латентність запитів до OpenAI", ("endpoint", "model", "status"),
+)
+PAYLOAD_SIZE = REGISTRY.histogram(
+    "bot_payload_bytes", "Розмір згенерованих payload (TTS, зображення)", ("kind",), buckets=SIZE_BUCKETS,
+)
+JOB_QUEUE_DEPTH = REGISTRY.gauge(
+    "bot_job_queue_depth", "Кількість задач у черзі", ("queue",),
+)
+INFLIGHT_TASKS = REGISTRY.gauge(
+    "bot_inflight_tasks", "Фонові задачі, що виконуються зараз", ("kind",),
+)
+ASYNCIO_TASKS = REGISTRY.gauge(
+    "bot_asyncio_tasks", "Усі живі asyncio задачі процесу",
+)
+RETRIES = REGISTRY.counter(
+    "bot_retries_total", "Повторні спроби запитів", ("operation", "reason"),
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "bot_cache_requests_total", "Звернення до кешів (hit/miss)", ("cache", "result"),
+)
+FLOOD_WAITS = REGISTRY.counter(
+    "telegram_flood_wait_total", "Кількість відповідей Telegram 429 (RetryAfter)", ("method",),
+)
+FLOOD_WAIT_SECONDS = REGISTRY.counter(
+    "telegram_flood_wait_seconds_total", "Сумарний час очікування через flood control", ("method",),
+)
+
+
+def _count_asyncio_tasks() -> float:
+    try:
+        return len(asyncio.all_tasks())
+    except RuntimeError:
+        # scrape поза event loop
+        return 0
+
+
+ASYNCIO_TASKS.set_function(_count_asyncio_tasks)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Облік звернення до кешу"""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_flood_wait(method: str, retry_after: float) -> None:
+    """Облік flood control від Telegram"""
+    FLOOD_WAITS.labels(method).inc()
+    FLOOD_WAIT_SECONDS.labels(method).inc(retry_after)
+
+
+_background_tasks = set()
+
+
+def track_task(coro, kind: str) -> asyncio.Task:
+    """
+    Запускає фонову задачу з обліком in-flight і тримає на неї сильне посилання,
+    щоб задачу не прибрав GC до завершення.
+    """
+    gauge = INFLIGHT_TASKS.labels(kind)
+    gauge.inc()
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+
+    def _done(t: asyncio.Task) -> None:
+        _background_tasks.discard(t)
+        gauge.dec()
+
+    task.add_done_callback(_done)
+    return task
+
+
+def render() -> str:
+    """Текст для endpoint'у /metrics"""
+    return REGISTRY.render()
@@ -0,0 +1,79 @@
+"""
+Middleware для Dispatcher: метрики та трасування обробки апдейтів.
+"""
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject, Update
+
+import metrics
+import tracing
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """
+    Outer-middleware на рівні Update: вимірює повний час обробки апдейту.
+    Лейбл handler заповнює HandlerNameMiddleware (ім'я функції-обробника),
+    тому кардинальність обмежена кількістю хендлерів, а не вмістом повідомлень.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        label = [event.event_type, "unhandled"]
+        data["metrics_label"] = label
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            metrics.UPDATE_LATENCY.labels(label[0], label[1]).observe(time.perf_counter() - started)
+
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """Inner-middleware: записує ім'я обраного хендлера в лейбл метрик апдейту"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        label = data.get("metrics_label")
+        handler_object = data.get("handler")
+        if label is not None and handler_object is not None:
+            label[1] = getattr(handler_object.callback, "__name__", "handler")
+        return await handler(event, data)
+
+
+class TracingMiddleware(BaseMiddleware):
+    """Outer-middleware на рівні Update: відкриває кореневий спан траси апдейту"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        with tracing.start_trace("telegram.update", update_id=event.update_id, event_type=event.event_type) as root:
+            result = await handler(event, data)
+            label = data.get("metrics_label")
+            if label is not None:
+                root.set_attribute("handler", label[1])
+            return result
+
+
+def setup_tracing_middlewares(dp: Dispatcher) -> None:
+    """Підключає трасування апдейтів до диспетчера"""
+    dp.update.outer_middleware(TracingMiddleware())
+
+
+def setup_metrics_middlewares(dp: Dispatcher) -> None:
+    """Підключає middleware метрик до диспетчера"""
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    handler_names = HandlerNameMiddleware()
+    dp.message.middleware(handler_names)
+    dp.callback_query.middleware(handler_names)
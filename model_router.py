@@ -0,0 +1,206 @@
+"""
+Маршрутизація текстових запитів між моделями OpenAI.
+
+Модель обирається на кожен виклик generate_text за декларативною таблицею
+маршрутів: перший маршрут, умови якого збіглися, дає список моделей-кандидатів.
+Умови маршруту:
+  tasks       — тип команди (ask, creative, code, translate, summarize, explain);
+  min_tokens / max_tokens — оцінка вхідних токенів (промпт + системне повідомлення);
+  tiers       — рівень користувача (free, premium, admin);
+  max_load    — найвищий рівень перевантаження (overload), за якого маршрут діє.
+Серед кандидатів маршрут обирає за prefer:
+  latency — найменша згладжена латентність за спостереженнями цього маршруту;
+  cost    — найменша згладжена вартість виклику;
+  order   — перша модель, що не сиплеться помилками.
+Моделі без статистики пробуються першими, щоб з'явились дані; модель, що
+переважно повертає помилки, пропускається, доки є інші.
+
+Таблицю можна замінити JSON у MODEL_ROUTES, наприклад:
+  [{"name": "short", "max_tokens": 150, "models": ["gpt-4o-mini"]},
+   {"name": "default", "models": ["gpt-4o-mini", "gpt-4o"], "prefer": "cost"}]
+"""
+import json
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import metrics
+from config import (
+    ADMIN_USER_ID, MODEL_FAST, MODEL_PRICES, MODEL_ROUTES, MODEL_ROUTING_ENABLED, MODEL_STRONG, OPENAI_MODEL,
+    PREMIUM_USER_IDS,
+)
+from overload import get_overload_controller
+
+logger = logging.getLogger(__name__)
+
+ROUTE_REQUESTS = metrics.REGISTRY.counter(
+    "bot_model_route_requests_total", "Запити до моделей за маршрутом і результатом", ("route", "model", "status"),
+)
+ROUTE_LATENCY = metrics.REGISTRY.histogram(
+    "bot_model_route_latency_seconds", "Латентність моделі в межах маршруту", ("route", "model"),
+)
+ROUTE_COST = metrics.REGISTRY.counter(
+    "bot_model_route_cost_usd_total", "Оцінка вартості запитів за цінами MODEL_PRICES, USD", ("route", "model"),
+)
+
+_SMOOTHING = 0.2
+_ERROR_LIMIT = 0.5  # модель з часткою помилок вище — пропускається, доки є інші
+
+
+def estimate_tokens(*texts: Optional[str]) -> int:
+    """Груба оцінка кількості токенів (~4 символи на токен) без токенізатора"""
+    return sum(len(text) for text in texts if text) // 4 + 1
+
+
+def parse_prices(spec: str) -> Dict[str, Tuple[float, float]]:
+    """"model=вхід/вихід,..." (USD за 1M токенів) у словник"""
+    prices: Dict[str, Tuple[float, float]] = {}
+    for item in spec.split(","):
+        model, sep, value = item.strip().partition("=")
+        prompt_price, _, completion_price = value.partition("/")
+        if not sep or not model:
+            continue
+        try:
+            prices[model.strip()] = (float(prompt_price), float(completion_price or prompt_price))
+        except ValueError:
+            continue
+    return prices
+
+
+@dataclass(frozen=True)
+class Route:
+    name: str
+    models: Tuple[str, ...]
+    tasks: Tuple[str, ...] = ()
+    min_tokens: int = 0
+    max_tokens: Optional[int] = None
+    tiers: Tuple[str, ...] = ()
+    max_load: Optional[int] = None
+    prefer: str = "latency"
+
+    def matches(self, task: str, tokens: int, tier: str, load: int) -> bool:
+        return (
+            (not self.tasks or task in self.tasks)
+            and tokens >= self.min_tokens
+            and (self.max_tokens is None or tokens <= self.max_tokens)
+            and (not self.tiers or tier in self.tiers)
+            and (self.max_load is None or load <= self.max_load)
+        )
+
+
+def default_routes() -> List[Route]:
+    return [
+        # коротке питання — найшвидша модель
+        Route("short", (MODEL_FAST,), max_tokens=150),
+        # код і довгі тексти — сильніша модель, поки бот не перевантажений
+        Route("code", (MODEL_STRONG,), tasks=("code",), tiers=("premium", "admin"), max_load=0),
+        Route("long", (MODEL_STRONG, OPENAI_MODEL), min_tokens=1500, max_load=0),
+        Route("default", (OPENAI_MODEL, MODEL_FAST), prefer="order"),
+    ]
+
+
+def parse_routes(spec: str) -> List[Route]:
+    """Таблиця маршрутів з JSON (MODEL_ROUTES); останній маршрут має підходити всім"""
+    routes = []
+    for item in json.loads(spec):
+        item = dict(item)
+        item["models"] = tuple(item["models"])
+        for key in ("tasks", "tiers"):
+            if key in item:
+                item[key] = tuple(item[key])
+        routes.append(Route(**item))
+    if not routes:
+        raise ValueError("MODEL_ROUTES: порожня таблиця маршрутів")
+    return routes
+
+
+@dataclass
+class _ModelStats:
+    calls: int = 0
+    latency: float = 0.0
+    cost: float = 0.0
+    error_rate: float = 0.0
+
+
+@dataclass(frozen=True)
+class Decision:
+    route: str
+    model: str
+
+
+class ModelRouter:
+    def __init__(self, routes: Sequence[Route], prices: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.routes = list(routes)
+        self.prices = dict(prices or {})
+        self._stats: Dict[Tuple[str, str], _ModelStats] = {}
+
+    @staticmethod
+    def user_tier(user_id: Optional[int]) -> str:
+        if user_id is not None and ADMIN_USER_ID and str(user_id) == ADMIN_USER_ID:
+            return "admin"
+        if user_id is not None and str(user_id) in PREMIUM_USER_IDS:
+            return "premium"
+        return "free"
+
+    def stats(self, route: str, model: str) -> _ModelStats:
+        return self._stats.setdefault((route, model), _ModelStats())
+
+    def _pick(self, route: Route) -> str:
+        candidates = [(model, self.stats(route.name, model)) for model in route.models]
+        healthy = [c for c in candidates if c[1].error_rate <= _ERROR_LIMIT] or candidates
+        if route.prefer == "order":
+            return healthy[0][0]
+        untried = [model for model, stats in healthy if not stats.calls]
+        if untried:
+            return untried[0]
+        key = (lambda c: c[1].cost) if route.prefer == "cost" else (lambda c: c[1].latency)
+        return min(healthy, key=key)[0]
+
+    def route(self, task: str, tokens: int, user_id: Optional[int] = None, load: Optional[int] = None) -> Decision:
+        """Маршрут і модель для запиту; load=None — поточний рівень перевантаження"""
+        tier = self.user_tier(user_id)
+        if load is None:
+            load = get_overload_controller().tier
+        for route in self.routes:
+            if route.matches(task, tokens, tier, load):
+                return Decision(route.name, self._pick(route))
+        # жоден маршрут не підійшов — останній у таблиці
+        return Decision(self.routes[-1].name, self._pick(self.routes[-1]))
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        prompt_price, completion_price = self.prices.get(model, (0.0, 0.0))
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+    def record(self, decision: Decision, latency: float, ok: bool,
+               prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        """Зворотний зв'язок: латентність, помилки і вартість впливають на наступні вибори"""
+        stats = self.stats(decision.route, decision.model)
+        cost = self.cost(decision.model, prompt_tokens, completion_tokens)
+        if stats.calls == 0:
+            stats.latency, stats.cost, stats.error_rate = latency, cost, 0.0 if ok else 1.0
+        else:
+            stats.latency += _SMOOTHING * (latency - stats.latency)
+            stats.cost += _SMOOTHING * (cost - stats.cost)
+            stats.error_rate += _SMOOTHING * ((0.0 if ok else 1.0) - stats.error_rate)
+        stats.calls += 1
+        ROUTE_REQUESTS.labels(decision.route, decision.model, "ok" if ok else "error").inc()
+        ROUTE_LATENCY.labels(decision.route, decision.model).observe(latency)
+        if cost:
+            ROUTE_COST.labels(decision.route, decision.model).inc(cost)
+
+
+_model_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """Отримати глобальний екземпляр маршрутизатора моделей"""
+    global _model_router
+    if _model_router is None:
+        if not MODEL_ROUTING_ENABLED:
+            routes = [Route("static", (OPENAI_MODEL,), prefer="order")]
+        elif MODEL_ROUTES:
+            routes = parse_routes(MODEL_ROUTES)
+        else:
+            routes = default_routes()
+        _model_router = ModelRouter(routes, parse_prices(MODEL_PRICES))
+    return _model_router
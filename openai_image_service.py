@@ -1,9 +1,14 @@
 import logging
-import io
 import base64
+import time
 from typing import Optional, List
-from openai import AsyncOpenAI
-from config import OPENAI_API_KEY, OPENAI_IMAGE_MODEL, OPENAI_IMAGE_SIZE, OPENAI_IMAGE_QUALITY
+
+import metrics
+import tracing
+from log_pipeline import Redacted
+from overload import get_overload_controller
+from openai_keys import get_key_pool
+from config import OPENAI_IMAGE_MODEL, OPENAI_IMAGE_SIZE, OPENAI_IMAGE_QUALITY
 
 logger = logging.getLogger(__name__)
 
@@ -11,18 +16,15 @@ class OpenAIImageService:
     """Сервіс для роботи з OpenAI Image API (генерація зображень)"""
     
     def __init__(self):
-        """Ініціалізація клієнта OpenAI для генерації зображень"""
-        if not OPENAI_API_KEY:
-            raise ValueError("OPENAI_API_KEY не встановлено")
-        
+        """Ініціалізація сервісу генерації зображень (клієнти — з пулу ключів)"""
         try:
-            self.client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+            self.keys = get_key_pool()
             self.model = OPENAI_IMAGE_MODEL
             self.default_size = OPENAI_IMAGE_SIZE
             self.default_quality = OPENAI_IMAGE_QUALITY
             logger.info("OpenAI Image клієнт успішно ініціалізовано")
         except Exception as e:
-            logger.error(f"Помилка ініціалізації OpenAI Image клієнта: {e}")
+            logger.error("Помилка ініціалізації OpenAI Image клієнта: %s", e)
             raise
     
     async def generate_image(self, prompt: str, size: Optional[str] = None, 
@@ -49,16 +51,34 @@ class OpenAIImageService:
                 n = 10
                 logger.warning("Кількість зображень обмежена до 10")
             
-            logger.info(f"Генерація зображення за промтом: {prompt[:100]}...")
-            logger.info(f"Параметри: розмір={selected_size}, якість={selected_quality}, кількість={n}")
+            logger.info("Генерація зображення за промтом: %s", Redacted(prompt))
+            logger.info("Параметри: розмір=%s, якість=%s, кількість=%s", selected_size, selected_quality, n)
             
-            response = await self.client.images.generate(
-                model=self.model,
-                prompt=prompt,
-                size=selected_size,
-                quality=selected_quality,
-                n=n
-            )
+            max_retries = get_overload_controller().max_retries()
+
+            started = time.perf_counter()
+            status = "error"
+            try:
+                async with self.keys.lease("images.generate", self.model) as lease:
+                    client = lease.client
+                    if max_retries is not None:
+                        client = client.with_options(max_retries=max_retries)
+                    with tracing.span("openai.generate_image", model=self.model, size=selected_size,
+                                      quality=selected_quality, n=n, key=lease.key.name):
+                        raw = await client.images.with_raw_response.generate(
+                            model=self.model,
+                            prompt=prompt,
+                            size=selected_size,
+                            quality=selected_quality,
+                            n=n
+                        )
+                    lease.headers = raw.headers
+                    response = raw.parse()
+                status = "ok"
+            finally:
+                metrics.OPENAI_LATENCY.labels("images.generate", self.model, status).observe(
+                    time.perf_counter() - started
+                )
             
             # Отримуємо base64 дані зображень
             image_bytes_list = []
@@ -66,21 +86,23 @@ class OpenAIImageService:
                 for image in response.data:
                     if hasattr(image, 'b64_json') and image.b64_json:
                         # Декодуємо base64 дані
-                        image_bytes = base64.b64decode(image.b64_json)
+                        with tracing.span("image.b64decode", encoded_chars=len(image.b64_json)):
+                            image_bytes = base64.b64decode(image.b64_json)
                         image_bytes_list.append(image_bytes)
-                        logger.info(f"Отримано зображення розміром {len(image_bytes)} байт")
+                        metrics.PAYLOAD_SIZE.labels("image").observe(len(image_bytes))
+                        logger.debug("Отримано зображення розміром %s байт", len(image_bytes))
                     else:
-                        logger.warning(f"Зображення без b64_json: {image}")
+                        logger.warning("Зображення без b64_json (url: %s)", getattr(image, "url", None))
             
             if not image_bytes_list:
                 logger.error("Не отримано жодного валідного зображення")
                 raise Exception("API не повернув валідних зображень")
             
-            logger.info(f"Згенеровано {len(image_bytes_list)} зображень")
+            logger.info("Згенеровано %s зображень", len(image_bytes_list))
             return image_bytes_list
             
         except Exception as e:
-            logger.error(f"Помилка при генерації зображення: {e}")
+            logger.error("Помилка при генерації зображення: %s", e)
             raise Exception(f"Не вдалося згенерувати зображення: {str(e)}")
     
     async def generate_image_variation(self, image_url: str, size: Optional[str] = None, 
@@ -105,22 +127,25 @@ class OpenAIImageService:
                 n = 10
                 logger.warning("Кількість варіацій обмежена до 10")
             
-            logger.info(f"Генерація варіацій зображення: {image_url}")
+            logger.info("Генерація варіацій зображення: %s", image_url)
             
-            response = await self.client.images.create_variation(
-                image=image_url,
-                size=selected_size,
-                quality=selected_quality,
-                n=n
-            )
+            async with self.keys.lease("images.create_variation", self.model) as lease:
+                raw = await lease.client.images.with_raw_response.create_variation(
+                    image=image_url,
+                    size=selected_size,
+                    quality=selected_quality,
+                    n=n
+                )
+                lease.headers = raw.headers
+                response = raw.parse()
             
             variation_urls = [image.url for image in response.data]
-            logger.info(f"Згенеровано {len(variation_urls)} варіацій")
+            logger.info("Згенеровано %d варіацій", len(variation_urls))
             
             return variation_urls
             
         except Exception as e:
-            logger.error(f"Помилка при генерації варіацій зображення: {e}")
+            logger.error("Помилка при генерації варіацій зображення: %s", e)
             raise Exception(f"Не вдалося згенерувати варіації зображення: {str(e)}")
     
     async def edit_image(self, image_url: str, mask_url: str, prompt: str, 
@@ -145,23 +170,26 @@ class OpenAIImageService:
                 n = 10
                 logger.warning("Кількість зображень обмежена до 10")
             
-            logger.info(f"Редагування зображення за промтом: {prompt[:100]}...")
+            logger.info("Редагування зображення за промтом: %s", Redacted(prompt))
             
-            response = await self.client.images.edit(
-                image=image_url,
-                mask=mask_url,
-                prompt=prompt,
-                size=selected_size,
-                n=n
-            )
+            async with self.keys.lease("images.edit", self.model) as lease:
+                raw = await lease.client.images.with_raw_response.edit(
+                    image=image_url,
+                    mask=mask_url,
+                    prompt=prompt,
+                    size=selected_size,
+                    n=n
+                )
+                lease.headers = raw.headers
+                response = raw.parse()
             
             edited_urls = [image.url for image in response.data]
-            logger.info(f"Відредаговано {len(edited_urls)} зображень")
+            logger.info("Відредаговано %d зображень", len(edited_urls))
             
             return edited_urls
             
         except Exception as e:
-            logger.error(f"Помилка при редагуванні зображення: {e}")
+            logger.error("Помилка при редагуванні зображення: %s", e)
             raise Exception(f"Не вдалося відредагувати зображення: {str(e)}")
     
     def get_available_sizes(self) -> List[str]:
@@ -0,0 +1,371 @@
+"""
+Пул ключів OpenAI (кілька ключів / організацій) з балансуванням за запасом лімітів.
+
+Один OPENAI_API_KEY обмежує пропускну здатність лімітами однієї організації.
+OPENAI_API_KEYS задає пул через кому: "ключ", "ключ@org-id" або "ім'я=ключ@org-id".
+Ліміти OpenAI рахуються на організацію і модель, тож стан лімітів ведеться на
+(організація — або сам ключ, якщо організацію не вказано; модель) і
+оновлюється із заголовків кожної відповіді chat, audio та images:
+  x-ratelimit-limit-*, x-ratelimit-remaining-*, x-ratelimit-reset-* (requests/tokens).
+Запит отримує ключ з найбільшим запасом — меншою з часток запитів і токенів,
+що лишились (після моменту скидання ліміт вважається повним). До приходу
+заголовків запас зменшується локально, щоб паралельні запити розходились
+по ключах. Ключ, що отримав 429, охолоджується для цієї моделі до retry-after
+або моменту скидання (інакше OPENAI_KEY_COOLDOWN) і обирається, лише коли
+охолоджуються всі. Використання кожного ключа — в метриках bot_openai_key_*;
+мітка — ім'я ключа, сам ключ ніде не логується.
+
+Допуск запитів сповільнюється до 429, а не після: коли запас обраного ключа
+падає нижче RATE_LIMIT_SOFT_HEADROOM, запити розподіляються рівномірно так,
+щоб залишку вистачило до скидання ліміту; якщо залишку не вистачає на запит
+(токенів — із бюджетом відповіді token_budget), запит чекає скидання.
+Пауза обмежена RATE_LIMIT_MAX_WAIT (bot_openai_ratelimit_wait_seconds).
+"""
+import asyncio
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import metrics
+import startup
+from config import (
+    OPENAI_API_KEY, OPENAI_API_KEYS, OPENAI_BASE_URL, OPENAI_KEY_COOLDOWN, RATE_LIMIT_MAX_WAIT,
+    RATE_LIMIT_SOFT_HEADROOM,
+)
+
+logger = logging.getLogger(__name__)
+
+KEY_REQUESTS = metrics.REGISTRY.counter(
+    "bot_openai_key_requests_total", "Запити до OpenAI за ключем пулу і результатом", ("key", "api", "status"),
+)
+KEY_TOKENS = metrics.REGISTRY.counter(
+    "bot_openai_key_tokens_total", "Використані токени за ключем пулу", ("key", "kind"),
+)
+KEY_REMAINING = metrics.REGISTRY.gauge(
+    "bot_openai_key_remaining", "Залишок ліміту (x-ratelimit-remaining-*) організації або ключа", ("key", "model", "kind"),
+)
+KEY_HEADROOM = metrics.REGISTRY.gauge(
+    "bot_openai_key_headroom", "Частка ліміту, що лишилась (менша з запитів і токенів)", ("key", "model"),
+)
+RATE_LIMIT_WAIT = metrics.REGISTRY.histogram(
+    "bot_openai_ratelimit_wait_seconds", "Пауза перед запитом, щоб не впертися в ліміт", ("api",),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+KEY_COOLDOWNS = metrics.REGISTRY.counter(
+    "bot_openai_key_cooldowns_total", "Охолодження ключа після 429", ("key", "model"),
+)
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Тривалість з заголовків OpenAI ("20ms", "1s", "6m0s" або число секунд) у секундах"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _UNITS[unit] for number, unit in parts)
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        return int(float(headers.get(name)))
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Пауза з retry-after-ms / retry-after, секунди"""
+    if not headers:
+        return None
+    milliseconds = parse_duration(headers.get("retry-after-ms"))
+    if milliseconds is not None:
+        return milliseconds / 1000
+    return parse_duration(headers.get("retry-after"))
+
+
+@dataclass(eq=False)
+class ApiKey:
+    name: str  # мітка для логів і метрик
+    key: str = field(repr=False)
+    organization: Optional[str] = None
+    in_flight: int = 0
+
+    @property
+    def bucket(self) -> str:
+        """Ключі однієї організації ділять її ліміти"""
+        return self.organization or self.name
+
+    def auth_headers(self) -> Dict[str, str]:
+        headers = {"Authorization": f"Bearer {self.key}"}
+        if self.organization:
+            headers["OpenAI-Organization"] = self.organization
+        return headers
+
+
+def parse_keys(spec: str) -> List[ApiKey]:
+    """"ключ,ключ@org,ім'я=ключ@org" у список ключів; без імені — key1, key2, ..."""
+    keys: List[ApiKey] = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, rest = item.partition("=")
+        if not sep:
+            name, rest = f"key{len(keys) + 1}", item
+        secret, _, organization = rest.partition("@")
+        if secret.strip():
+            keys.append(ApiKey(name.strip(), secret.strip(), organization.strip() or None))
+    return keys
+
+
+@dataclass
+class LimitState:
+    """Ліміти однієї організації для однієї моделі за останніми заголовками"""
+    limit_requests: Optional[int] = None
+    remaining_requests: Optional[float] = None
+    reset_requests_at: Optional[float] = None
+    limit_tokens: Optional[int] = None
+    remaining_tokens: Optional[float] = None
+    reset_tokens_at: Optional[float] = None
+    cooldown_until: float = 0.0
+    next_at: float = 0.0  # найраніший старт наступного запиту під час рівномірного розподілу
+    updated: float = 0.0
+
+    def update(self, headers: Mapping[str, str], now: float) -> bool:
+        """Оновлює стан із заголовків; False — заголовків лімітів немає"""
+        remaining_requests = _header_int(headers, "x-ratelimit-remaining-requests")
+        remaining_tokens = _header_int(headers, "x-ratelimit-remaining-tokens")
+        if remaining_requests is None and remaining_tokens is None:
+            return False
+        if remaining_requests is not None:
+            self.remaining_requests = remaining_requests
+            self.limit_requests = _header_int(headers, "x-ratelimit-limit-requests") or self.limit_requests
+            reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+            self.reset_requests_at = now + reset if reset is not None else None
+        if remaining_tokens is not None:
+            self.remaining_tokens = remaining_tokens
+            self.limit_tokens = _header_int(headers, "x-ratelimit-limit-tokens") or self.limit_tokens
+            reset = parse_duration(headers.get("x-ratelimit-reset-tokens"))
+            self.reset_tokens_at = now + reset if reset is not None else None
+        self.updated = now
+        return True
+
+    def headroom(self, now: float, tokens: int = 0) -> float:
+        """Частка ліміту, що лишилась (0..1); невідомий або скинутий ліміт — 1.0"""
+        fractions = [1.0]
+        if self.limit_requests and self.remaining_requests is not None \
+                and (self.reset_requests_at is None or now < self.reset_requests_at):
+            fractions.append(self.remaining_requests / self.limit_requests)
+        if self.limit_tokens and self.remaining_tokens is not None \
+                and (self.reset_tokens_at is None or now < self.reset_tokens_at):
+            fractions.append((self.remaining_tokens - tokens) / self.limit_tokens)
+        return max(0.0, min(fractions))
+
+    def reset_delay(self, now: float) -> Optional[float]:
+        """Через скільки секунд скинеться вичерпаний ліміт"""
+        delays = []
+        if self.remaining_requests is not None and self.remaining_requests <= 0 and self.reset_requests_at:
+            delays.append(self.reset_requests_at - now)
+        if self.remaining_tokens is not None and self.remaining_tokens <= 0 and self.reset_tokens_at:
+            delays.append(self.reset_tokens_at - now)
+        return max(delays) if delays and max(delays) > 0 else None
+
+    def pacing(self, now: float, tokens: int, soft_headroom: float) -> Tuple[float, float]:
+        """
+        (інтервал між запитами, чекати до): нижче soft_headroom залишок ділиться
+        рівномірно до скидання; якщо його не вистачає на запит — чекати скидання
+        """
+        spacing, blocked_until = 0.0, 0.0
+        for remaining, limit, reset_at, need in (
+            (self.remaining_requests, self.limit_requests, self.reset_requests_at, 1),
+            (self.remaining_tokens, self.limit_tokens, self.reset_tokens_at, tokens),
+        ):
+            if remaining is None or not limit or not need or reset_at is None or now >= reset_at:
+                continue
+            if remaining < need:
+                blocked_until = max(blocked_until, reset_at)
+            elif remaining < limit * soft_headroom:
+                spacing = max(spacing, (reset_at - now) * need / remaining)
+        return spacing, blocked_until
+
+    def consume(self, tokens: int) -> None:
+        """Локальне списання до приходу свіжих заголовків"""
+        if self.remaining_requests is not None:
+            self.remaining_requests -= 1
+        if self.remaining_tokens is not None:
+            self.remaining_tokens -= tokens
+
+
+def _status_label(status: Optional[int]) -> str:
+    if status is None:
+        return "error"
+    return "ok" if 200 <= status < 300 else str(status)
+
+
+class Lease:
+    """Ключ, виданий на один запит; headers — заголовки успішної відповіді"""
+
+    def __init__(self, pool: "KeyPool", key: ApiKey):
+        self.pool = pool
+        self.key = key
+        self.headers: Optional[Mapping[str, str]] = None
+
+    @property
+    def client(self) -> Any:
+        """AsyncOpenAI цього ключа"""
+        return self.pool.client(self.key)
+
+    def add_usage(self, prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        self.pool.record_usage(self.key, prompt_tokens, completion_tokens)
+
+
+class KeyPool:
+    """
+    Args:
+        keys: Ключі пулу
+        cooldown: Охолодження після 429 без retry-after і часу скидання, секунди
+        base_url: Базова адреса API для клієнтів SDK
+        soft_headroom: Нижче цієї частки ліміту запити розподіляються рівномірно (0 — лише чекати скидання)
+        max_wait: Найдовша пауза перед запитом, секунди
+    """
+
+    def __init__(self, keys: Sequence[ApiKey], cooldown: float = 20.0, base_url: Optional[str] = None,
+                 soft_headroom: float = 0.2, max_wait: float = 10.0):
+        if not keys:
+            raise ValueError("OPENAI_API_KEY не встановлено")
+        self.keys = list(keys)
+        self.cooldown = cooldown
+        self.base_url = base_url
+        self.soft_headroom = soft_headroom
+        self.max_wait = max_wait
+        self._limits: Dict[Tuple[str, str], LimitState] = {}
+        self._clients: Dict[str, Any] = {}
+
+    def limits(self, key: ApiKey, model: str) -> LimitState:
+        state = self._limits.get((key.bucket, model))
+        if state is None:
+            state = self._limits[(key.bucket, model)] = LimitState()
+            KEY_REMAINING.labels(key.bucket, model, "requests").set_function(lambda: state.remaining_requests or 0)
+            KEY_REMAINING.labels(key.bucket, model, "tokens").set_function(lambda: state.remaining_tokens or 0)
+            KEY_HEADROOM.labels(key.bucket, model).set_function(lambda: state.headroom(time.monotonic()))
+        return state
+
+    def acquire(self, model: str, tokens: int = 0, now: Optional[float] = None) -> ApiKey:
+        """Ключ з найбільшим запасом для model; якщо всі охолоджуються — той, що звільниться першим"""
+        return self.reserve(model, tokens, now)[0]
+
+    def reserve(self, model: str, tokens: int = 0, now: Optional[float] = None) -> Tuple[ApiKey, float]:
+        """Ключ (як acquire) і пауза перед запитом, щоб не впертися в ліміт"""
+        now = time.monotonic() if now is None else now
+        states = [(key, self.limits(key, model)) for key in self.keys]
+        ready = [(key, state) for key, state in states if state.cooldown_until <= now]
+        if ready:
+            key, state = max(ready, key=lambda c: (c[1].headroom(now, tokens), -c[0].in_flight))
+        else:
+            key, state = min(states, key=lambda c: c[1].cooldown_until)
+        start = max(now, state.cooldown_until)
+        spacing, blocked_until = state.pacing(now, tokens, self.soft_headroom)
+        start = max(start, blocked_until)
+        if spacing:
+            start = max(start, state.next_at)
+            state.next_at = start + spacing
+        state.consume(tokens)
+        key.in_flight += 1
+        return key, min(start - now, self.max_wait)
+
+    def release(self, key: ApiKey, api: str, model: str, status: Optional[int],
+                headers: Optional[Mapping[str, str]] = None, now: Optional[float] = None) -> None:
+        """Результат запиту: оновлює ліміти із заголовків, після 429 охолоджує ключ"""
+        now = time.monotonic() if now is None else now
+        key.in_flight = max(0, key.in_flight - 1)
+        state = self.limits(key, model)
+        if headers:
+            state.update(headers, now)
+        if status == 429:
+            wait = retry_after(headers) or state.reset_delay(now) or self.cooldown
+            state.cooldown_until = max(state.cooldown_until, now + wait)
+            KEY_COOLDOWNS.labels(key.name, model).inc()
+            logger.warning("Ключ OpenAI %s охолоджується %.1f с для %s (429)", key.name, wait, model)
+        KEY_REQUESTS.labels(key.name, api, _status_label(status)).inc()
+
+    def record_usage(self, key: ApiKey, prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        if prompt_tokens:
+            KEY_TOKENS.labels(key.name, "prompt").inc(prompt_tokens)
+        if completion_tokens:
+            KEY_TOKENS.labels(key.name, "completion").inc(completion_tokens)
+
+    def client(self, key: ApiKey) -> Any:
+        """Клієнт SDK для ключа (спільний для сервісів тексту і зображень)"""
+        client = self._clients.get(key.name)
+        if client is None:
+            client = self._clients[key.name] = self._new_client(key)
+        return client
+
+    def _new_client(self, key: ApiKey) -> Any:
+        # SDK імпортується ліниво; у lease() — поза event loop
+        from openai import AsyncOpenAI
+
+        return AsyncOpenAI(api_key=key.key, organization=key.organization, base_url=self.base_url)
+
+    async def open_client(self, key: ApiKey) -> Any:
+        """Як client(), але імпорт SDK і створення клієнта (SSL-контекст) — у потоці"""
+        client = self._clients.get(key.name)
+        if client is None:
+            await startup.import_off_loop("openai")
+            built = await asyncio.to_thread(self._new_client, key)
+            client = self._clients.setdefault(key.name, built)
+            if client is not built:
+                await built.close()  # паралельний lease вже створив клієнт для цього ключа
+        return client
+
+    @asynccontextmanager
+    async def lease(self, api: str, model: str, tokens: int = 0, sdk: bool = True) -> AsyncIterator[Lease]:
+        """
+        Ключ на один запит. Статус і заголовки помилки беруться з e.response
+        (openai.APIStatusError, httpx.HTTPStatusError); успішні заголовки — з lease.headers.
+        sdk=False — запит іде власним HTTP-клієнтом, lease.client не потрібен.
+        """
+        key, delay = self.reserve(model, tokens)
+        lease = Lease(self, key)
+        try:
+            if sdk:
+                # імпорт openai і клієнт — у потоці, щоб lease.client не блокував event loop
+                await self.open_client(key)
+            if delay > 0:
+                RATE_LIMIT_WAIT.labels(api).observe(delay)
+                await asyncio.sleep(delay)
+            yield lease
+        except BaseException as e:
+            response = getattr(e, "response", None)
+            self.release(lease.key, api, model, getattr(response, "status_code", None),
+                         getattr(response, "headers", None))
+            raise
+        self.release(lease.key, api, model, 200, lease.headers)
+
+
+_key_pool: Optional[KeyPool] = None
+
+
+def get_key_pool() -> KeyPool:
+    """Отримати глобальний пул ключів OpenAI (OPENAI_API_KEYS або OPENAI_API_KEY)"""
+    global _key_pool
+    if _key_pool is None:
+        _key_pool = KeyPool(
+            parse_keys(OPENAI_API_KEYS or OPENAI_API_KEY),
+            cooldown=OPENAI_KEY_COOLDOWN,
+            base_url=OPENAI_BASE_URL,
+            soft_headroom=RATE_LIMIT_SOFT_HEADROOM,
+            max_wait=RATE_LIMIT_MAX_WAIT,
+        )
+        logger.info("Пул ключів OpenAI: %s", ", ".join(key.name for key in _key_pool.keys))
+    return _key_pool
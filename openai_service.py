@@ -1,7 +1,18 @@
 import logging
-from typing import Optional
-from openai import AsyncOpenAI
-from config import OPENAI_API_KEY, OPENAI_MODEL, OPENAI_MAX_TOKENS, OPENAI_TEMPERATURE
+import time
+from typing import List, Optional, Tuple
+
+import metrics
+import prompts
+import tracing
+from log_pipeline import Redacted
+from conversation_memory import get_conversation_memory
+from model_router import Decision, estimate_tokens, get_model_router
+from overload import get_overload_controller
+from token_budget import get_token_budgets
+from translation_memory import BatchFormatError, format_batch, get_translation_memory, parse_batch
+from openai_keys import get_key_pool
+from config import OPENAI_MODEL, OPENAI_MAX_TOKENS, OPENAI_TEMPERATURE
 
 logger = logging.getLogger(__name__)
 
@@ -9,154 +20,242 @@ class OpenAIService:
     """Сервіс для роботи з OpenAI API (генерація тексту)"""
     
     def __init__(self):
-        """Ініціалізація клієнта OpenAI для генерації тексту"""
-        if not OPENAI_API_KEY:
-            raise ValueError("OPENAI_API_KEY не встановлено")
-        
+        """Ініціалізація сервісу генерації тексту (клієнти — з пулу ключів)"""
         try:
-            # Створюємо клієнт без додаткових параметрів
-            self.client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+            self.keys = get_key_pool()
             self.model = OPENAI_MODEL
             self.max_tokens = OPENAI_MAX_TOKENS
             self.temperature = OPENAI_TEMPERATURE
             logger.info("OpenAI клієнт успішно ініціалізовано")
         except Exception as e:
-            logger.error(f"Помилка ініціалізації OpenAI клієнта: {e}")
+            logger.error("Помилка ініціалізації OpenAI клієнта: %s", e)
             raise
     
-    async def generate_text(self, prompt: str, system_message: Optional[str] = None) -> str:
+    async def generate_text(self, prompt: str, system_message: Optional[str] = None,
+                            task: str = "ask", user_id: Optional[int] = None) -> str:
         """
         Генерація тексту за допомогою OpenAI (Chat Completions API)
         
         Args:
             prompt: Запит користувача
             system_message: Системне повідомлення для налаштування поведінки AI
+            task: Тип команди для вибору моделі (ask, creative, code, translate, summarize, explain)
+            user_id: Користувач (рівень free/premium/admin для вибору моделі)
             
         Returns:
             Згенерований текст
         """
         try:
-            messages = []
-            
-            # Додаємо системне повідомлення, якщо воно вказане
-            if system_message:
-                messages.append({"role": "system", "content": system_message})
-            
-            # Додаємо запит користувача
-            messages.append({"role": "user", "content": prompt})
-            
-            logger.info(f"Відправка запиту до OpenAI: {prompt[:100]}...")
-            
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature
+            return await self._complete(prompt, system_message, task, user_id)
+        except Exception as e:
+            logger.error("Помилка при генерації тексту: %s", e)
+            return f"Вибачте, виникла помилка при обробці вашого запиту: {str(e)}"
+
+    async def _complete(self, prompt: str, system_message: Optional[str] = None, task: str = "ask",
+                        user_id: Optional[int] = None, history: Optional[List[dict]] = None) -> str:
+        """Один запит Chat Completions (помилки — винятками); history — попередні повідомлення розмови"""
+        messages = []
+
+        # Додаємо системне повідомлення, якщо воно вказане
+        if system_message:
+            messages.append({"role": "system", "content": system_message})
+
+        # Попередні повідомлення розмови (пам'ять /ask), потім запит користувача
+        if history:
+            messages.extend(history)
+        messages.append({"role": "user", "content": prompt})
+
+        # Модель за таблицею маршрутів, max_tokens — за фактичними довжинами відповідей
+        # команди; під перевантаженням — дешевша модель, менший max_tokens, без повторів SDK
+        prompt_tokens = estimate_tokens(prompt, system_message, *(m["content"] for m in history or ()))
+        router = get_model_router()
+        decision = router.route(task, prompt_tokens, user_id)
+        budgets = get_token_budgets()
+        overload = get_overload_controller()
+        model, max_tokens = overload.text_params(decision.model, budgets.max_tokens(task, prompt_tokens))
+        max_retries = overload.max_retries()
+
+        logger.info("Відправка запиту до OpenAI: %s", Redacted(prompt), extra={"model": model, "prompt_chars": len(prompt)})
+
+        started = time.perf_counter()
+        status = "error"
+        try:
+            # ключ з найбільшим запасом лімітів; заголовки x-ratelimit-* повертаються в пул
+            async with self.keys.lease("chat.completions", model, prompt_tokens + max_tokens) as lease:
+                client = lease.client
+                if max_retries is not None:
+                    client = client.with_options(max_retries=max_retries)
+                with tracing.span("openai.generate_text", model=model, prompt_chars=len(prompt), key=lease.key.name):
+                    raw = await client.chat.completions.with_raw_response.create(
+                        model=model,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        temperature=self.temperature
+                    )
+                lease.headers = raw.headers
+                response = raw.parse()
+                usage = response.usage
+                if usage is not None:
+                    lease.add_usage(usage.prompt_tokens, usage.completion_tokens)
+                    # скільки токенів префікса взято з кешу OpenAI
+                    prompts.record_usage(model, usage, time.perf_counter() - started)
+            status = "ok"
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.OPENAI_LATENCY.labels("chat.completions", model, status).observe(elapsed)
+            usage = getattr(response, "usage", None) if status == "ok" else None
+            router.record(
+                Decision(decision.route, model),
+                elapsed, status == "ok",
+                getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0,
             )
+
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        if completion_tokens is not None:
+            budgets.record(task, prompt_tokens, completion_tokens,
+                           truncated=response.choices[0].finish_reason == "length")
+
+        generated_text = response.choices[0].message.content
+        logger.info("Отримано відповідь від OpenAI: %s", Redacted(generated_text), extra={"completion_chars": len(generated_text or "")})
+
+        return generated_text.strip()
+
+    async def ask(self, question: str, chat_id: Optional[int] = None, user_id: Optional[int] = None) -> str:
+        """
+        Відповідь на /ask з урахуванням попередньої розмови користувача в чаті
+        
+        Args:
+            question: Запит користувача
+            chat_id: Чат розмови (None — без пам'яті)
+            user_id: Користувач: власна історія в чаті і вибір моделі (None — без пам'яті)
             
-            generated_text = response.choices[0].message.content
-            logger.info(f"Отримано відповідь від OpenAI: {generated_text[:100]}...")
-            
-            return generated_text.strip()
-            
+        Returns:
+            Відповідь моделі
+        """
+        memory = get_conversation_memory() if chat_id is not None and user_id is not None else None
+        if memory is None:
+            return await self.generate_text(question, user_id=user_id)
+        try:
+            history = await memory.window(chat_id, user_id)
+            answer = await self._complete(question, task="ask", user_id=user_id, history=history)
         except Exception as e:
-            logger.error(f"Помилка при генерації тексту: {e}")
+            logger.error("Помилка при генерації тексту: %s", e)
             return f"Вибачте, виникла помилка при обробці вашого запиту: {str(e)}"
+        await memory.add_exchange(chat_id, user_id, question, answer)
+        return answer
+
+    async def summarize_history(self, summary: str, turns: List[Tuple[str, str]]) -> str:
+        """Стискає старі репліки розмови (разом з попереднім підсумком) у новий підсумок"""
+        lines = [f"Попередній підсумок: {summary}"] if summary else []
+        lines.extend(f"{'Користувач' if role == 'user' else 'Асистент'}: {text}" for role, text in turns)
+        return await self._complete("\n".join(lines), prompts.MEMORY_SUMMARY.system_message(), task="summarize_memory")
     
-    async def generate_creative_text(self, prompt: str) -> str:
+    async def generate_creative_text(self, prompt: str, user_id: Optional[int] = None) -> str:
         """
         Генерація креативного тексту
         
         Args:
             prompt: Запит користувача
+            user_id: Користувач (для вибору моделі)
             
         Returns:
             Креативний текст
         """
-        system_message = """
-        Ти креативний письменник та помічник. Твоя задача - створювати цікавий, 
-        захоплюючий контент українською мовою. Відповідай живо, використовуючи 
-        емодзі та різноманітні стилі викладу. Будь дружнім та корисним.
-        """
-        
-        return await self.generate_text(prompt, system_message)
+        return await self.generate_text(prompt, prompts.CREATIVE.system_message(), task="creative", user_id=user_id)
     
-    async def generate_code(self, prompt: str, language: str = "python") -> str:
+    async def generate_code(self, prompt: str, language: str = "python", user_id: Optional[int] = None) -> str:
         """
         Генерація коду
         
         Args:
             prompt: Опис того, який код потрібно згенерувати
             language: Мова програмування
+            user_id: Користувач (для вибору моделі)
             
         Returns:
             Згенерований код
         """
-        system_message = f"""
-        Ти експерт-програміст з {language}. Твоя задача - писати якісний, 
-        чистий та добре прокоментований код. Завжди включай коментарі 
-        українською мовою та пояснення логіки роботи коду.
-        """
-        
-        code_prompt = f"Створи код на мові {language}: {prompt}"
-        return await self.generate_text(code_prompt, system_message)
+        return await self.generate_text(
+            prompts.CODE.user_message(prompt, language=language),
+            prompts.CODE.system_message(language=language),
+            task="code", user_id=user_id,
+        )
     
-    async def translate_text(self, text: str, target_language: str = "українська") -> str:
+    async def translate_text(self, text: str, target_language: str = "українська", user_id: Optional[int] = None) -> str:
         """
         Переклад тексту
         
         Args:
             text: Текст для перекладу
             target_language: Цільова мова
+            user_id: Користувач (для вибору моделі)
             
         Returns:
             Перекладений текст
         """
-        system_message = f"""
-        Ти професійний перекладач. Твоя задача - точно перекладати текст 
-        на {target_language}, зберігаючи сенс та стиль оригіналу. 
-        Перекладай природно та зрозуміло.
-        """
-        
-        prompt = f"Переклади наступний текст на {target_language}: {text}"
-        return await self.generate_text(prompt, system_message)
+        memory = get_translation_memory()
+        if memory is not None:
+            try:
+                return await memory.translate(
+                    text, target_language, lambda segments: self._translate_segments(segments, target_language, user_id),
+                )
+            except BatchFormatError as e:
+                # модель зламала формат пакета — перекладаємо текст цілком, як без пам'яті
+                logger.warning("Пакетний переклад не розібрано: %s", e)
+            except Exception as e:
+                logger.error("Помилка при генерації тексту: %s", e)
+                return f"Вибачте, виникла помилка при обробці вашого запиту: {str(e)}"
+        return await self.generate_text(
+            prompts.TRANSLATE.user_message(text, target_language=target_language),
+            prompts.TRANSLATE.system_message(target_language=target_language),
+            task="translate", user_id=user_id,
+        )
+
+    async def _translate_segments(self, segments: List[str], target_language: str,
+                                  user_id: Optional[int] = None) -> List[str]:
+        """Переклад сегментів, яких немає в пам'яті перекладів, — одним запитом"""
+        if len(segments) == 1:
+            return [await self._complete(
+                prompts.TRANSLATE.user_message(segments[0], target_language=target_language),
+                prompts.TRANSLATE.system_message(target_language=target_language),
+                task="translate", user_id=user_id,
+            )]
+        answer = await self._complete(
+            prompts.TRANSLATE_BATCH.user_message(format_batch(segments)),
+            prompts.TRANSLATE_BATCH.system_message(target_language=target_language),
+            task="translate", user_id=user_id,
+        )
+        return parse_batch(answer, len(segments))
     
-    async def summarize_text(self, text: str) -> str:
+    async def summarize_text(self, text: str, user_id: Optional[int] = None) -> str:
         """
         Створення резюме тексту
         
         Args:
             text: Текст для резюмування
+            user_id: Користувач (для вибору моделі)
             
         Returns:
             Резюме тексту
         """
-        system_message = """
-        Ти експерт з аналізу тексту. Твоя задача - створювати короткі, 
-        але інформативні резюме. Виділяй основні ідеї та ключові моменти.
-        """
-        
-        prompt = f"Створи коротке резюме наступного тексту: {text}"
-        return await self.generate_text(prompt, system_message)
+        return await self.generate_text(
+            prompts.SUMMARIZE.user_message(text), prompts.SUMMARIZE.system_message(), task="summarize", user_id=user_id,
+        )
     
-    async def explain_concept(self, concept: str) -> str:
+    async def explain_concept(self, concept: str, user_id: Optional[int] = None) -> str:
         """
         Пояснення концепції або терміну
         
         Args:
             concept: Концепція для пояснення
+            user_id: Користувач (для вибору моделі)
             
         Returns:
             Пояснення концепції
         """
-        system_message = """
-        Ти експерт-педагог. Твоя задача - пояснювати складні концепції 
-        простими словами, з прикладами та аналогіями. Будь зрозумілим 
-        та корисним.
-        """
-        
-        prompt = f"Поясни простими словами: {concept}"
-        return await self.generate_text(prompt, system_message)
+        return await self.generate_text(
+            prompts.EXPLAIN.user_message(concept), prompts.EXPLAIN.system_message(), task="explain", user_id=user_id,
+        )
 
 # Створюємо глобальний екземпляр сервісу
 openai_service = None
@@ -1,11 +1,17 @@
 import asyncio
 import logging
-import os
-from typing import List, Tuple, Optional
+import time
+from typing import TYPE_CHECKING, List, Tuple, Optional
 
-import httpx
+import metrics
+import perf_profile
+import tracing
+from openai_keys import ApiKey, KeyPool, get_key_pool
+from overload import get_overload_controller
+from config import OPENAI_BASE_URL
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+if TYPE_CHECKING:
+    import httpx
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +19,7 @@ logger = logging.getLogger(__name__)
 class OpenAITTSService:
     """
     Асинхронний сервіс для TTS через OpenAI:
-      - ретраї при 429/5xx та мережевих помилках
+      - ретраї при 429/5xx та мережевих помилках (після 429 — з іншим ключем пулу)
       - контроль таймаутів
       - зручні хелпери get_available_voices() / get_speed_range()
       - generate_speech_with_validation(text, voice, speed) -> bytes (mp3)
@@ -37,16 +43,16 @@ class OpenAITTSService:
         write_timeout: float = 60.0,     # надсилання тіла
         max_retries: int = 3,
     ):
-        api_key = api_key or OPENAI_API_KEY
-        if not api_key:
-            raise RuntimeError("OPENAI_API_KEY is not set")
-
-        self.api_key = api_key
+        # явний api_key — пул з одного ключа; інакше спільний пул OPENAI_API_KEYS
+        self.keys = KeyPool([ApiKey("default", api_key)]) if api_key else get_key_pool()
         self.model = model or self._DEFAULT_MODEL
         self.voice = self._DEFAULT_VOICE
         self.speed = self._DEFAULT_SPEED
         self.max_retries = max_retries
 
+        # httpx імпортується ліниво — лише при першому створенні сервісу
+        import httpx
+
         # httpx AsyncClient з таймаутами
         self._timeout = httpx.Timeout(
             timeout=request_timeout,
@@ -54,13 +60,10 @@ class OpenAITTSService:
             read=read_timeout,
             write=write_timeout,
         )
-        # HTTP/1.1 keep-alive
+        # HTTP/1.1 keep-alive; Authorization — окремо на кожен запит, за ключем з пулу
         self._client = httpx.AsyncClient(
-            base_url="https://api.openai.com/v1",
-            headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-            },
+            base_url=OPENAI_BASE_URL,
+            headers={"Content-Type": "application/json"},
             timeout=self._timeout,
             http2=False,
         )
@@ -108,40 +111,52 @@ class OpenAITTSService:
         if not (self._MIN_SPEED <= speed <= self._MAX_SPEED):
             raise ValueError(f"Швидкість повинна бути від {self._MIN_SPEED} до {self._MAX_SPEED}")
 
-        # Робимо кілька спроб із бекофом
+        import httpx
+
+        # Робимо кілька спроб із бекофом (під перевантаженням — одну)
         backoff = 1.0
         last_err: Optional[Exception] = None
+        throttled = False
+        overload_retries = get_overload_controller().max_retries()
+        attempts = self.max_retries if overload_retries is None else overload_retries + 1
 
-        for attempt in range(1, self.max_retries + 1):
+        for attempt in range(1, attempts + 1):
             try:
-                return await self._request_tts(text=text, voice=voice, speed=speed)
+                with tracing.span("openai.tts", attempt=attempt, model=self.model, voice=voice, chars=len(text)):
+                    return await self._request_tts(text=text, voice=voice, speed=speed)
             except httpx.HTTPStatusError as e:
                 status = e.response.status_code
                 body = _safe_err_text(e.response)
                 # 429/5xx — має сенс спробувати ще
                 if status == 429 or 500 <= status < 600:
                     last_err = e
-                    logger.warning(f"TTS {status} attempt {attempt}/{self.max_retries}: {body}")
+                    throttled = status == 429
+                    logger.warning("TTS %s attempt %d/%d: %s", status, attempt, attempts, body)
                 else:
                     # 4xx (крім 429) — не ретраїмо
                     msg = body or str(e)
                     raise RuntimeError(f"OpenAI TTS HTTP {status}: {msg}") from e
             except (httpx.ReadTimeout, httpx.ConnectTimeout, httpx.ConnectError, httpx.RemoteProtocolError) as e:
                 last_err = e
-                logger.warning(f"TTS network timeout/errno attempt {attempt}/{self.max_retries}: {e}")
+                throttled = False
+                logger.warning("TTS network timeout/errno attempt %d/%d: %s", attempt, attempts, e)
             except Exception as e:
                 # інші помилки — можна одну-другу спробу, але зазвичай краще відразу падати
                 last_err = e
-                logger.warning(f"TTS unexpected error attempt {attempt}/{self.max_retries}: {e}")
+                throttled = False
+                logger.warning("TTS unexpected error attempt %d/%d: %s", attempt, attempts, e)
 
-            if attempt < self.max_retries:
-                await asyncio.sleep(backoff)
-                backoff = min(backoff * 2, 6.0)
+            if attempt < attempts:
+                metrics.RETRIES.labels("openai.audio.speech", type(last_err).__name__).inc()
+                # після 429 пауза — у пулі ключів: інший ключ одразу або очікування до retry-after
+                if not throttled:
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 6.0)
 
         # якщо сюди дійшли — все погано
         if isinstance(last_err, (httpx.TimeoutException, httpx.ConnectError, httpx.RemoteProtocolError)):
             raise RuntimeError("HTTP Client says - Request timeout error") from last_err
-        raise RuntimeError(f"TTS failed after {self.max_retries} attempts: {last_err}")
+        raise RuntimeError(f"TTS failed after {attempts} attempts: {last_err}")
 
     # ---------- Низькорівневий запит ----------
 
@@ -159,14 +174,22 @@ class OpenAITTSService:
             "format": "mp3",
         }
 
-        resp = await self._client.post("/audio/speech", json=payload)
+        started = time.perf_counter()
+        status = "error"
         try:
-            resp.raise_for_status()
-        except httpx.HTTPStatusError:
-            # Дамо шанс зовнішньому обробнику
-            raise
+            async with self.keys.lease("audio.speech", self.model, sdk=False) as lease:
+                resp = await self._client.post("/audio/speech", content=perf_profile.json_dumps_bytes(payload),
+                                               headers=lease.key.auth_headers())
+                status = str(resp.status_code)
+                # HTTPStatusError обробляє зовнішній цикл ретраїв
+                resp.raise_for_status()
+                lease.headers = resp.headers
+            status = "ok"
+        finally:
+            metrics.OPENAI_LATENCY.labels("audio.speech", self.model, status).observe(time.perf_counter() - started)
 
         # В API /audio/speech повертається application/octet-stream (тіло — бінарне)
+        metrics.PAYLOAD_SIZE.labels("tts").observe(len(resp.content))
         return resp.content
 
     # ---------- Закриття клієнта ----------
@@ -176,7 +199,7 @@ class OpenAITTSService:
         try:
             await self._client.aclose()
         except Exception as e:
-            logger.warning(f"Помилка при закритті httpx клієнта TTS: {e}")
+            logger.warning("Помилка при закритті httpx клієнта TTS: %s", e)
 
 
 # ---------- Сінглтон-фабрика ----------
@@ -192,7 +215,7 @@ def get_openai_tts_service() -> OpenAITTSService:
 
 # ---------- Утиліти ----------
 
-def _safe_err_text(response: httpx.Response) -> str:
+def _safe_err_text(response: "httpx.Response") -> str:
     try:
         data = response.json()
         # OpenAI зазвичай повертає {"error": {"message": "..."}}
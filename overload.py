@@ -0,0 +1,200 @@
+"""
+Контролер перевантаження: ступінчаста деградація замість загального сповільнення.
+
+Тиск (pressure) — максимум із заповненості черг апдейтів (UpdateScheduler),
+черги дорогих задач (JobScheduler) і згладженої затримки event loop (loop_monitor)
+відносно порогів.
+Коли тиск перевищує чергову межу OVERLOAD_THRESHOLDS, вмикається наступний
+рівень (рівні накопичуються):
+  1 image_low   — зображення quality=low і один варіант замість двох;
+  2 cheap_model — текстові запити йдуть на OVERLOAD_CHEAP_MODEL;
+  3 cap_tokens  — max_tokens обмежується OVERLOAD_MAX_TOKENS;
+  4 no_retries  — запити до OpenAI без повторних спроб SDK;
+  5 shed        — нові озвучки і зображення відхиляються одразу.
+Рівень піднімається одразу, а опускається поступово: на один рівень, коли тиск
+впав нижче межі з запасом OVERLOAD_HYSTERESIS і минуло OVERLOAD_COOLDOWN.
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import metrics
+from config import (
+    OVERLOAD_CHEAP_MODEL, OVERLOAD_COOLDOWN, OVERLOAD_ENABLED, OVERLOAD_HYSTERESIS, OVERLOAD_INTERVAL,
+    OVERLOAD_LAG_HIGH, OVERLOAD_MAX_TOKENS, OVERLOAD_THRESHOLDS,
+)
+from loop_monitor import get_loop_monitor
+
+logger = logging.getLogger(__name__)
+
+TIERS = ("normal", "image_low", "cheap_model", "cap_tokens", "no_retries", "shed")
+IMAGE_LOW, CHEAP_MODEL, CAP_TOKENS, NO_RETRIES, SHED = range(1, len(TIERS))
+
+OVERLOAD_TIER = metrics.REGISTRY.gauge("bot_overload_tier", "Поточний рівень деградації (0 — норма)")
+OVERLOAD_PRESSURE = metrics.REGISTRY.gauge("bot_overload_pressure", "Тиск навантаження (1 — поріг черги чи затримки)")
+OVERLOAD_CHANGES = metrics.REGISTRY.counter(
+    "bot_overload_tier_changes_total", "Зміни рівня деградації", ("tier", "direction"),
+)
+OVERLOAD_SHED = metrics.REGISTRY.counter(
+    "bot_overload_shed_total", "Дорогі задачі, відхилені через перевантаження", ("kind",),
+)
+
+
+def parse_thresholds(spec: str) -> Tuple[float, ...]:
+    """Межі тиску для рівнів 1..5 ("0.5,0.6,...") — неспадні, зайві відкидаються"""
+    values = []
+    for item in spec.split(","):
+        try:
+            values.append(float(item))
+        except ValueError:
+            continue
+    values = sorted(values)[:len(TIERS) - 1]
+    return tuple(values)
+
+
+class OverloadController:
+    """
+    Args:
+        thresholds: Межі тиску для рівнів 1..N
+        lag_high: Затримка event loop (с), що відповідає тиску 1.0
+        hysteresis: Рівень знімається, коли тиск < межа * hysteresis
+        cooldown: Мінімум секунд між пониженнями рівня
+    """
+
+    def __init__(
+        self,
+        thresholds: Sequence[float] = (0.5, 0.6, 0.7, 0.8, 0.9),
+        lag_high: float = 0.5,
+        hysteresis: float = 0.8,
+        cooldown: float = 10.0,
+        cheap_model: str = "gpt-4o-mini",
+        max_tokens: int = 300,
+    ):
+        self.thresholds = tuple(thresholds)
+        self.lag_high = lag_high
+        self.hysteresis = hysteresis
+        self.cooldown = cooldown
+        self.cheap_model = cheap_model
+        self.max_tokens_cap = max_tokens
+        self.tier = 0
+        self.pressure = 0.0
+        self.lag = 0.0
+        self._queues: Dict[str, Tuple[Callable[[], float], float]] = {}
+        self._changed_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        OVERLOAD_TIER.set_function(lambda: self.tier)
+        OVERLOAD_PRESSURE.set_function(lambda: self.pressure)
+
+    def watch_queue(self, name: str, depth: Callable[[], float], high: float) -> None:
+        """Черга, глибина якої high відповідає тиску 1.0"""
+        if high > 0:
+            self._queues[name] = (depth, float(high))
+
+    def measure(self) -> float:
+        pressure = self.lag / self.lag_high if self.lag_high > 0 else 0.0
+        for depth, high in self._queues.values():
+            pressure = max(pressure, depth() / high)
+        return pressure
+
+    def update(self, pressure: float, now: Optional[float] = None) -> int:
+        """Перераховує рівень за тиском; повертає новий рівень"""
+        now = time.monotonic() if now is None else now
+        self.pressure = pressure
+        target = sum(1 for threshold in self.thresholds if pressure >= threshold)
+        if target > self.tier:
+            self._set_tier(target, now)
+        elif target < self.tier and now - self._changed_at >= self.cooldown \
+                and pressure < self.thresholds[self.tier - 1] * self.hysteresis:
+            self._set_tier(self.tier - 1, now)
+        return self.tier
+
+    def _set_tier(self, tier: int, now: float) -> None:
+        direction = "up" if tier > self.tier else "down"
+        log = logger.warning if direction == "up" else logger.info
+        log("⚖️ Рівень перевантаження: %s → %s (тиск %.2f, затримка loop %.3f с)",
+            TIERS[self.tier], TIERS[tier], self.pressure, self.lag)
+        self.tier = tier
+        self._changed_at = now
+        OVERLOAD_CHANGES.labels(TIERS[tier], direction).inc()
+
+    # ---------- Параметри запитів на поточному рівні ----------
+
+    def effective_settings(self, settings: dict) -> dict:
+        """Налаштування користувача з урахуванням деградації (image_count — кількість варіантів)"""
+        result = dict(settings)
+        result.setdefault("image_count", 2)
+        if self.tier >= IMAGE_LOW:
+            result["image_quality"] = "low"
+            result["image_count"] = 1
+        return result
+
+    def text_params(self, model: str, max_tokens: int) -> Tuple[str, int]:
+        if self.tier >= CHEAP_MODEL and self.cheap_model:
+            model = self.cheap_model
+        if self.tier >= CAP_TOKENS:
+            max_tokens = min(max_tokens, self.max_tokens_cap)
+        return model, max_tokens
+
+    def max_retries(self) -> Optional[int]:
+        """0 — вимкнути повтори SDK OpenAI; None — як налаштовано в клієнті"""
+        return 0 if self.tier >= NO_RETRIES else None
+
+    def shedding(self) -> bool:
+        return self.tier >= SHED
+
+    def reject(self, kind: str) -> bool:
+        """True — задачу kind слід відхилити (рахується в метриках)"""
+        if not self.shedding():
+            return False
+        OVERLOAD_SHED.labels(kind).inc()
+        return True
+
+    # ---------- Цикл вимірювань ----------
+
+    async def _run(self, interval: float) -> None:
+        monitor = get_loop_monitor()
+        while True:
+            await asyncio.sleep(interval)
+            self.lag = monitor.lag_avg
+            self.update(self.measure())
+
+    def start(self, interval: float = 0.5) -> None:
+        if self._task is None or self._task.done():
+            self._task = metrics.track_task(self._run(interval), "overload")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_overload_controller: Optional[OverloadController] = None
+
+
+def get_overload_controller() -> OverloadController:
+    """Отримати глобальний екземпляр контролера перевантаження"""
+    global _overload_controller
+    if _overload_controller is None:
+        _overload_controller = OverloadController(
+            thresholds=parse_thresholds(OVERLOAD_THRESHOLDS),
+            lag_high=OVERLOAD_LAG_HIGH,
+            hysteresis=OVERLOAD_HYSTERESIS,
+            cooldown=OVERLOAD_COOLDOWN,
+            cheap_model=OVERLOAD_CHEAP_MODEL,
+            max_tokens=OVERLOAD_MAX_TOKENS,
+        )
+    return _overload_controller
+
+
+async def on_startup() -> None:
+    if OVERLOAD_ENABLED:
+        get_overload_controller().start(OVERLOAD_INTERVAL)
+
+
+async def on_shutdown() -> None:
+    await get_overload_controller().stop()
@@ -0,0 +1,85 @@
+"""
+Профіль продуктивності: event loop і JSON-кодек.
+
+PERF_PROFILE=default — стандартний asyncio loop і stdlib json.
+PERF_PROFILE=fast    — uvloop і orjson, якщо вони встановлені
+                       (pip install uvloop orjson); якщо ні — тихий
+                       відкат до стандартних з одним записом у лог.
+
+Кодек використовують AiohttpSession (розбір відповідей Bot API і апдейтів
+webhook, серіалізація параметрів запитів) та тіло запиту OpenAITTSService.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Coroutine, Optional, TypeVar
+
+from config import PERF_PROFILE
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _load_orjson():
+    if PERF_PROFILE != "fast":
+        return None
+    try:
+        import orjson
+    except ImportError:
+        logger.info("orjson не встановлено, використовується stdlib json")
+        return None
+    return orjson
+
+
+_orjson = _load_orjson()
+
+if _orjson is not None:
+    JSON_CODEC = "orjson"
+
+    def json_loads(data: Any) -> Any:
+        return _orjson.loads(data)
+
+    def json_dumps_bytes(obj: Any) -> bytes:
+        try:
+            return _orjson.dumps(obj)
+        except TypeError:
+            # типи, які orjson не підтримує (напр. int > 64 біт) — через stdlib
+            return json.dumps(obj, ensure_ascii=False).encode()
+
+    def json_dumps(obj: Any) -> str:
+        return json_dumps_bytes(obj).decode()
+else:
+    JSON_CODEC = "json"
+    json_loads = json.loads
+    json_dumps = json.dumps
+
+    def json_dumps_bytes(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+
+def loop_factory() -> Optional[Callable[[], asyncio.AbstractEventLoop]]:
+    """Фабрика uvloop для профілю fast; None — стандартний asyncio loop"""
+    if PERF_PROFILE != "fast":
+        return None
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("uvloop не встановлено, використовується стандартний asyncio loop")
+        return None
+    return uvloop.new_event_loop
+
+
+def run(main: Coroutine[Any, Any, T]) -> T:
+    """asyncio.run() з event loop поточного профілю"""
+    with asyncio.Runner(loop_factory=loop_factory()) as runner:
+        return runner.run(main)
+
+
+def describe() -> dict:
+    """Активний профіль для логів і звітів навантажувального тесту"""
+    try:
+        loop = type(asyncio.get_running_loop()).__module__.split(".")[0]
+    except RuntimeError:
+        loop = None
+    return {"profile": PERF_PROFILE, "json": JSON_CODEC, "loop": loop}
@@ -0,0 +1,169 @@
+"""
+Long polling через UpdateScheduler: апдейти одного чату обробляються строго
+по черзі, різних чатів — паралельно пулом воркерів. Замінює
+dp.start_polling(), який запускає кожен апдейт окремою задачею без
+обмеження паралельності і без порядку в межах чату.
+
+Власний цикл getUpdates замість dp._listen_updates:
+  - limit/timeout налаштовуються (POLLING_LIMIT, POLLING_TIMEOUT), а розмір
+    пачки не перевищує вільного місця в черзі;
+  - апдейт підтверджується (offset у наступному getUpdates), щойно він
+    став у смугу: повільний обробник в одному чаті не зупиняє отримання
+    апдейтів для інших. Повторну доставку (рестарт до підтвердження)
+    відсікає DedupMiddleware;
+  - при зупинці черга дообробляється (POLLING_DRAIN_TIMEOUT), після чого
+    підтверджується остання пачка — вона не прийде повторно після рестарту.
+"""
+import asyncio
+import logging
+import signal
+from typing import Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import GetUpdates
+from aiogram.utils.backoff import Backoff, BackoffConfig
+
+import metrics
+from update_scheduler import UpdateScheduler
+
+logger = logging.getLogger(__name__)
+
+POLLING_BATCH = metrics.REGISTRY.histogram(
+    "bot_polling_batch_size", "Кількість апдейтів в одній відповіді getUpdates", buckets=(0, 1, 5, 10, 25, 50, 100),
+)
+POLLING_ERRORS = metrics.REGISTRY.counter("bot_polling_errors_total", "Невдалі запити getUpdates")
+
+_BACKOFF = BackoffConfig(min_delay=1.0, max_delay=5.0, factor=1.3, jitter=0.1)
+
+
+class OffsetTracker:
+    """
+    Який offset підтверджувати Telegram (усе, що вже стоїть у черзі) і скільки
+    отриманих апдейтів ще не оброблено (смуги чатів завершують їх не по порядку).
+    """
+
+    def __init__(self):
+        self._unfinished = 0
+        self._next: Optional[int] = None
+
+    def fetched(self, update_id: int) -> None:
+        self._unfinished += 1
+        if self._next is None or update_id >= self._next:
+            self._next = update_id + 1
+
+    def done(self, update_id: int) -> None:
+        self._unfinished -= 1
+
+    @property
+    def unfinished(self) -> int:
+        return self._unfinished
+
+    @property
+    def commit_offset(self) -> Optional[int]:
+        """offset для getUpdates; None — ще нічого не отримано"""
+        return self._next
+
+
+async def _commit_offset(bot: Bot, tracker: OffsetTracker) -> None:
+    offset = tracker.commit_offset
+    if offset is None:
+        return
+    try:
+        await bot(GetUpdates(offset=offset, limit=1, timeout=0))
+    except Exception as e:
+        logger.warning("Не вдалося підтвердити offset %s: %s", offset, e)
+        return
+    logger.info("📌 Offset підтверджено: %s (не оброблено: %d)", offset, tracker.unfinished)
+
+
+async def _fetch_updates(
+    bot: Bot,
+    scheduler: UpdateScheduler,
+    tracker: OffsetTracker,
+    limit: int,
+    polling_timeout: int,
+    allowed_updates,
+) -> None:
+    backoff = Backoff(config=_BACKOFF)
+    get_updates = GetUpdates(timeout=polling_timeout, allowed_updates=allowed_updates)
+    # запит має жити довше за long poll, інакше спрацює таймаут сесії
+    request_timeout = polling_timeout + 30
+    failed = False
+    while True:
+        # підтверджуємо все, що вже в черзі
+        get_updates.offset = tracker.commit_offset
+        # не беремо більше, ніж вміщує черга: решта лишається непідтвердженою в Telegram
+        get_updates.limit = max(1, min(limit, scheduler.max_pending - scheduler.pending))
+        try:
+            updates = await bot(get_updates, request_timeout=request_timeout)
+        except Exception as e:
+            failed = True
+            POLLING_ERRORS.inc()
+            logger.error("Помилка getUpdates (%s: %s), повтор через %.1f с", type(e).__name__, e, backoff.next_delay)
+            await backoff.asleep()
+            continue
+        if failed:
+            logger.info("З'єднання з Bot API відновлено")
+            backoff.reset()
+            failed = False
+
+        POLLING_BATCH.observe(len(updates))
+        for update in updates:
+            await scheduler.put(update)
+            tracker.fetched(update.update_id)
+
+
+async def run_polling(
+    dp: Dispatcher,
+    bot: Bot,
+    workers: int = 32,
+    max_pending: int = 1000,
+    limit: int = 100,
+    polling_timeout: int = 25,
+    drain_timeout: float = 10.0,
+) -> None:
+    """
+    Отримує апдейти через getUpdates і передає їх у смуги чатів.
+    Коли в черзі max_pending апдейтів, нові не запитуються (backpressure):
+    вони лишаються на стороні Telegram, доки воркери не звільняться.
+    Зупиняється (з дообробкою черги) за SIGTERM/SIGINT або скасуванням задачі.
+    """
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    tracker = OffsetTracker()
+    scheduler = UpdateScheduler(
+        dp, bot, workers=workers, max_pending=max_pending, source="polling",
+        on_done=lambda update: tracker.done(update.update_id),
+    )
+
+    await dp.emit_startup(bot=bot, **workflow_data)
+    scheduler.start()
+    user = await bot.me()
+    logger.info(
+        "📥 Polling для @%s: %d воркерів, черга до %d, limit=%d, timeout=%d с",
+        user.username, workers, max_pending, limit, polling_timeout,
+    )
+    fetcher = asyncio.ensure_future(
+        _fetch_updates(bot, scheduler, tracker, limit, polling_timeout, dp.resolve_used_update_types())
+    )
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, fetcher.cancel)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows або не головний потік: лишається KeyboardInterrupt
+    try:
+        await fetcher
+    except asyncio.CancelledError:
+        # сигнал зупиняє лише отримання апдейтів; скасування ззовні прокидаємо далі
+        if asyncio.current_task().cancelling():
+            raise
+    finally:
+        logger.info("🛑 Зупинка polling: дообробка %d апдейтів", tracker.unfinished)
+        await scheduler.close(drain_timeout)
+        await _commit_offset(bot, tracker)
+        await dp.emit_shutdown(bot=bot, **workflow_data)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.remove_signal_handler(signum)
+            except (NotImplementedError, RuntimeError):
+                pass
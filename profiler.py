@@ -0,0 +1,227 @@
+"""
+Профілювання живого процесу на вимогу (адмін-команда /profile або захищений HTTP-маршрут).
+
+Два режими на N секунд:
+  sample   — таймер ITIMER_REAL (SIGALRM) кожні PROFILE_SAMPLE_INTERVAL
+             перериває потік event loop, і обробник сигналу записує стек
+             перерваного кадру; результат — топ функцій і файл collapsed
+             stacks ("a;b;c 42"), який приймають flamegraph.pl, speedscope
+             та inferno. Довгий виклик C-коду (re, base64) потрапляє в
+             семпл рядком, що його викликав. Якщо loop не в головному
+             потоці (або ОС без setitimer) — семплер в окремому потоці,
+             який бачить лише точки звільнення GIL (грубіше);
+  cprofile — детерміністичний cProfile у потоці event loop; результат —
+             топ за cumulative і .pstats файл (snakeviz, pstats).
+Поза сесією профайлер нічого не робить: ні потоку, ні хуків — нульові
+накладні витрати. Одночасно може йти лише одна сесія.
+"""
+import asyncio
+import cProfile
+import hmac
+import io
+import marshal
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from aiohttp import web
+
+import metrics
+from config import PROFILE_MAX_SECONDS, PROFILE_SAMPLE_INTERVAL
+
+MODES = ("sample", "cprofile")
+
+PROFILE_SESSIONS = metrics.REGISTRY.counter("bot_profile_sessions_total", "Сесії профілювання на вимогу", ("mode",))
+
+_TOP = 25
+
+
+class ProfilerBusy(RuntimeError):
+    """Інша сесія профілювання ще триває"""
+
+
+@dataclass
+class ProfileResult:
+    mode: str
+    seconds: float
+    samples: int  # для cprofile — кількість викликів функцій
+    top: str  # текстовий топ функцій
+    filename: str
+    data: bytes  # collapsed stacks або .pstats
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame) -> Tuple[str, ...]:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def _format_top(stacks: Counter, total: int) -> str:
+    own: Counter = Counter()
+    inclusive: Counter = Counter()
+    for stack, count in stacks.items():
+        own[stack[-1]] += count
+        for label in set(stack):
+            inclusive[label] += count
+    lines = [f"{'own%':>6} {'total%':>7}  функція"]
+    for label, count in own.most_common(_TOP):
+        lines.append(f"{100 * count / total:6.1f} {100 * inclusive[label] / total:7.1f}  {label}")
+    return "\n".join(lines)
+
+
+class Profiler:
+    def __init__(self, sample_interval: float = 0.005, max_seconds: float = 60.0):
+        self.sample_interval = sample_interval
+        self.max_seconds = max_seconds
+        self._lock = asyncio.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    async def profile(self, seconds: float, mode: str = "sample") -> ProfileResult:
+        """Профілює поточний процес seconds секунд (не більше max_seconds)"""
+        if mode not in MODES:
+            raise ValueError(f"Невідомий режим профілювання: {mode} (доступні: {', '.join(MODES)})")
+        if self.busy:
+            raise ProfilerBusy("Профілювання вже триває")
+        seconds = max(0.1, min(float(seconds), self.max_seconds))
+        async with self._lock:
+            PROFILE_SESSIONS.labels(mode).inc()
+            if mode == "cprofile":
+                return await self._cprofile(seconds)
+            return await self._sample(seconds)
+
+    async def _sample(self, seconds: float) -> ProfileResult:
+        stacks: Counter = Counter()
+        if threading.current_thread() is threading.main_thread() and hasattr(signal, "setitimer"):
+            await self._sample_signal(seconds, stacks)
+        else:
+            await self._sample_thread(seconds, stacks)
+
+        # простій loop видно як select (selectors.py) — це не навантаження
+        total = sum(stacks.values())
+        collapsed = "".join(f"{';'.join(stack)} {count}\n" for stack, count in stacks.most_common())
+        top = _format_top(stacks, total) if total else "Немає семплів"
+        return ProfileResult("sample", seconds, total, top,
+                             f"profile-{int(time.time())}.collapsed", collapsed.encode("utf-8"))
+
+    async def _sample_signal(self, seconds: float, stacks: Counter) -> None:
+        def on_alarm(signum, frame) -> None:
+            if frame is not None:
+                stacks[_collapse(frame)] += 1
+
+        previous = signal.signal(signal.SIGALRM, on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, self.sample_interval, self.sample_interval)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+    async def _sample_thread(self, seconds: float, stacks: Counter) -> None:
+        target = threading.get_ident()
+        stop = threading.Event()
+
+        def sampler() -> None:
+            while not stop.wait(self.sample_interval):
+                frame = sys._current_frames().get(target)
+                if frame is not None:
+                    stacks[_collapse(frame)] += 1
+
+        thread = threading.Thread(target=sampler, name="profile-sampler", daemon=True)
+        thread.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stop.set()
+            await asyncio.to_thread(thread.join)
+
+    async def _cprofile(self, seconds: float) -> ProfileResult:
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile.disable()
+
+        out = io.StringIO()
+        stats = pstats.Stats(profile, stream=out)
+        stats.sort_stats("cumulative").print_stats(_TOP)
+        # той самий формат, що й pstats.Stats.dump_stats()
+        data = marshal.dumps(stats.stats)
+        return ProfileResult("cprofile", seconds, stats.total_calls, out.getvalue().strip(),
+                             f"profile-{int(time.time())}.pstats", data)
+
+
+_profiler: Optional[Profiler] = None
+
+
+def get_profiler() -> Profiler:
+    """Отримати глобальний екземпляр профайлера"""
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler(sample_interval=PROFILE_SAMPLE_INTERVAL, max_seconds=PROFILE_MAX_SECONDS)
+    return _profiler
+
+
+def parse_args(args: str, default_seconds: float = 10.0) -> Tuple[float, str]:
+    """"/profile 30 cprofile" → (30.0, "cprofile"); порядок аргументів довільний"""
+    seconds, mode = default_seconds, "sample"
+    for arg in args.split():
+        if arg in MODES:
+            mode = arg
+        else:
+            try:
+                seconds = float(arg)
+            except ValueError:
+                raise ValueError(f"Невідомий аргумент: {arg}")
+    return seconds, mode
+
+
+# ---------- HTTP-маршрут ----------
+
+def _authorized(request: web.Request, token: str) -> bool:
+    # лише заголовок: query-параметр потрапляє в access-логи aiohttp і проксі
+    header = request.headers.get("Authorization", "")
+    supplied = header[7:] if header.startswith("Bearer ") else ""
+    return bool(token) and hmac.compare_digest(supplied, token)
+
+
+def setup_profile_route(app: web.Application, path: str, token: str) -> None:
+    """
+    GET {path}?seconds=10&mode=sample|cprofile&format=top|file
+    Потрібен токен у заголовку Authorization: Bearer <token>; без токена маршрут не реєструється.
+    """
+    if not token:
+        return
+
+    async def profile_handler(request: web.Request) -> web.StreamResponse:
+        if not _authorized(request, token):
+            return web.Response(status=403, text="forbidden")
+        try:
+            seconds = float(request.query.get("seconds", "10"))
+            result = await get_profiler().profile(seconds, request.query.get("mode", "sample"))
+        except ProfilerBusy as e:
+            return web.Response(status=409, text=str(e))
+        except ValueError as e:
+            return web.Response(status=400, text=str(e))
+        if request.query.get("format", "file") == "top":
+            return web.Response(text=result.top)
+        headers: Dict[str, str] = {"Content-Disposition": f'attachment; filename="{result.filename}"'}
+        return web.Response(body=result.data, headers=headers, content_type="application/octet-stream")
+
+    app.router.add_get(path, profile_handler)
@@ -0,0 +1,133 @@
+"""
+Шаблони промптів, розкладені під кешування префікса на боці OpenAI.
+
+OpenAI кешує спільний початок запиту (від 1024 токенів, далі кроками по 128),
+і кеш спрацьовує, лише коли префікс повідомлень однаковий до байта. Тому:
+  - системні повідомлення нормалізуються (без відступів triple-quoted рядків
+    і хвостових пробілів) і збираються один раз під час імпорту;
+  - незмінні інструкції йдуть першими, змінні частини (мова програмування,
+    цільова мова) — в кінці системного повідомлення, текст користувача — останнім;
+  - системне повідомлення з підставленими параметрами кешується, тож для
+    однакових параметрів це той самий рядок.
+Скільки токенів запиту взято з кешу (usage.prompt_tokens_details.cached_tokens),
+видно в bot_openai_prompt_tokens_total{cache="hit|miss"}, а латентність
+запитів з кешем і без — у bot_openai_chat_latency_seconds.
+"""
+import re
+import textwrap
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Tuple
+
+import metrics
+
+PROMPT_TOKENS = metrics.REGISTRY.counter(
+    "bot_openai_prompt_tokens_total", "Токени запитів chat: з кешу префікса (hit) і без нього (miss)",
+    ("model", "cache"),
+)
+CHAT_LATENCY = metrics.REGISTRY.histogram(
+    "bot_openai_chat_latency_seconds", "Латентність chat.completions залежно від кешу префікса",
+    ("model", "prompt_cache"),
+)
+
+
+def normalize(text: str) -> str:
+    """Абзаци triple-quoted рядка — по одному рядку, без відступів і зайвих пробілів"""
+    paragraphs = re.split(r"\n\s*\n", textwrap.dedent(text).strip())
+    return "\n\n".join(" ".join(paragraph.split()) for paragraph in paragraphs)
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    system: str  # незмінна частина — спільний префікс усіх запитів команди
+    system_tail: str = ""  # змінна частина в кінці системного повідомлення
+    user: str = "{text}"
+
+    def system_message(self, **values: Any) -> str:
+        return _render_system(self, tuple(sorted(values.items())))
+
+    def user_message(self, text: str, **values: Any) -> str:
+        return self.user.format(text=text, **values)
+
+
+@lru_cache(maxsize=256)
+def _render_system(template: PromptTemplate, values: Tuple[Tuple[str, Any], ...]) -> str:
+    if not template.system_tail:
+        return template.system
+    return f"{template.system}\n\n{template.system_tail.format(**dict(values))}"
+
+
+CREATIVE = PromptTemplate(normalize("""
+    Ти креативний письменник та помічник. Твоя задача - створювати цікавий,
+    захоплюючий контент українською мовою. Відповідай живо, використовуючи
+    емодзі та різноманітні стилі викладу. Будь дружнім та корисним.
+"""))
+
+CODE = PromptTemplate(
+    normalize("""
+        Ти експерт-програміст. Твоя задача - писати якісний, чистий та добре
+        прокоментований код. Завжди включай коментарі українською мовою та
+        пояснення логіки роботи коду.
+    """),
+    system_tail="Мова програмування: {language}.",
+    user="Створи код на мові {language}: {text}",
+)
+
+TRANSLATE = PromptTemplate(
+    normalize("""
+        Ти професійний перекладач. Твоя задача - точно перекладати текст,
+        зберігаючи сенс та стиль оригіналу. Перекладай природно та зрозуміло.
+    """),
+    system_tail="Цільова мова: {target_language}.",
+    user="Переклади наступний текст на {target_language}: {text}",
+)
+
+TRANSLATE_BATCH = PromptTemplate(
+    normalize("""
+        Ти професійний перекладач. Перекладай кожен пронумерований сегмент окремо,
+        точно, зберігаючи сенс та стиль оригіналу. Відповідай лише перекладами у
+        форматі "[номер] переклад", по одному рядку на сегмент, у тому ж порядку, без пояснень.
+    """),
+    system_tail="Цільова мова: {target_language}.",
+)
+
+SUMMARIZE = PromptTemplate(
+    normalize("""
+        Ти експерт з аналізу тексту. Твоя задача - створювати короткі,
+        але інформативні резюме. Виділяй основні ідеї та ключові моменти.
+    """),
+    user="Створи коротке резюме наступного тексту: {text}",
+)
+
+EXPLAIN = PromptTemplate(
+    normalize("""
+        Ти експерт-педагог. Твоя задача - пояснювати складні концепції
+        простими словами, з прикладами та аналогіями. Будь зрозумілим та корисним.
+    """),
+    user="Поясни простими словами: {text}",
+)
+
+MEMORY_SUMMARY = PromptTemplate(normalize("""
+    Стисни розмову користувача з асистентом у короткий підсумок (до 120 слів) мовою розмови.
+    Збережи факти про користувача, домовленості, імена, числа й відкриті питання; без вступів.
+"""))
+
+
+def cached_tokens(usage: Any) -> int:
+    """usage.prompt_tokens_details.cached_tokens (у старих версіях SDK — словник)"""
+    details = getattr(usage, "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        return details.get("cached_tokens") or 0
+    return getattr(details, "cached_tokens", 0) or 0
+
+
+def record_usage(model: str, usage: Any, latency: float) -> int:
+    """Облік кешу префікса за usage відповіді; повертає кількість кешованих токенів"""
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    cached = min(cached_tokens(usage), prompt_tokens)
+    if cached:
+        PROMPT_TOKENS.labels(model, "hit").inc(cached)
+    if prompt_tokens > cached:
+        PROMPT_TOKENS.labels(model, "miss").inc(prompt_tokens - cached)
+    CHAT_LATENCY.labels(model, "hit" if cached else "miss").observe(latency)
+    return cached
@@ -0,0 +1,148 @@
+"""
+Стан бота, який можна розділити між кількома процесами webhook-сервера:
+налаштування користувачів і FSM-сховище.
+
+STATE_BACKEND=memory — як і раніше, словник у пам'яті процесу.
+STATE_BACKEND=sqlite — один файл SQLite (WAL) на машину: усі воркери
+бачать однакові налаштування та стани діалогів, тож апдейти одного
+користувача можуть потрапляти в будь-який процес. Запити до файла з
+event loop ідуть через SqliteExecutor: у потоці, по одному на з'єднання,
+тож очікування блокування від інших процесів не зупиняє event loop.
+"""
+import asyncio
+import json
+import sqlite3
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from config import STATE_BACKEND, STATE_SQLITE_PATH
+
+T = TypeVar("T")
+
+
+def connect_sqlite(path: str) -> sqlite3.Connection:
+    """З'єднання SQLite для спільного доступу кількох процесів (WAL, autocommit)"""
+    conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class SqliteExecutor:
+    """
+    З'єднання SQLite для async-коду: виклики серіалізуються локом і виконуються
+    в потоці (як у update_dedup.SqliteSeenStore) — busy timeout під час запису
+    іншого процесу чекає в потоці, а не в event loop.
+    """
+
+    def __init__(self, path: str):
+        self.conn = connect_sqlite(path)
+        self._lock = asyncio.Lock()
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        async with self._lock:
+            return await asyncio.to_thread(fn, *args)
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class MemorySettingsStore:
+    """Налаштування користувачів у словнику процесу (повертає живі dict'и)"""
+
+    def __init__(self):
+        self._settings: Dict[int, dict] = {}
+
+    def __len__(self) -> int:
+        return len(self._settings)
+
+    def get(self, user_id: int) -> Optional[dict]:
+        return self._settings.get(user_id)
+
+    def put(self, user_id: int, settings: dict) -> None:
+        self._settings[user_id] = settings
+
+    async def aget(self, user_id: int) -> Optional[dict]:
+        return self.get(user_id)
+
+    async def aput(self, user_id: int, settings: dict) -> None:
+        self.put(user_id, settings)
+
+
+class SqliteSettingsStore:
+    """
+    Налаштування користувачів у спільній таблиці SQLite (JSON на користувача).
+    get/put — для синхронного коду, з event loop — aget/aput.
+    """
+
+    def __init__(self, path: str):
+        self._db = SqliteExecutor(path)
+        self._conn = self._db.conn
+        self._conn.execute("CREATE TABLE IF NOT EXISTS user_settings (user_id INTEGER PRIMARY KEY, settings TEXT NOT NULL)")
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM user_settings").fetchone()[0]
+
+    def get(self, user_id: int) -> Optional[dict]:
+        row = self._conn.execute("SELECT settings FROM user_settings WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, user_id: int, settings: dict) -> None:
+        self._conn.execute(
+            "INSERT INTO user_settings (user_id, settings) VALUES (?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET settings = excluded.settings",
+            (user_id, json.dumps(settings)),
+        )
+
+    async def aget(self, user_id: int) -> Optional[dict]:
+        return await self._db.run(self.get, user_id)
+
+    async def aput(self, user_id: int, settings: dict) -> None:
+        await self._db.run(self.put, user_id, settings)
+
+
+class SqliteStorage(BaseStorage):
+    """FSM-сховище aiogram у SQLite: стан і дані діалогу спільні для всіх процесів"""
+
+    def __init__(self, path: str):
+        self._db = SqliteExecutor(path)
+        self._db.conn.execute("CREATE TABLE IF NOT EXISTS fsm (key TEXT PRIMARY KEY, state TEXT, data TEXT)")
+        self._key_builder = DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+
+    def _write(self, column: str, key: str, value: Optional[str]) -> None:
+        self._db.conn.execute(
+            f"INSERT INTO fsm (key, {column}) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET {column} = excluded.{column}",
+            (key, value),
+        )
+
+    def _read(self, column: str, key: str) -> Optional[str]:
+        row = self._db.conn.execute(f"SELECT {column} FROM fsm WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        await self._db.run(self._write, "state", self._key_builder.build(key), value)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return await self._db.run(self._read, "state", self._key_builder.build(key))
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        await self._db.run(self._write, "data", self._key_builder.build(key), json.dumps(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        raw = await self._db.run(self._read, "data", self._key_builder.build(key))
+        return json.loads(raw) if raw else {}
+
+    async def close(self) -> None:
+        self._db.close()
+
+
+def create_settings_store(backend: str = STATE_BACKEND, path: str = STATE_SQLITE_PATH):
+    return SqliteSettingsStore(path) if backend == "sqlite" else MemorySettingsStore()
+
+
+def create_fsm_storage(backend: str = STATE_BACKEND, path: str = STATE_SQLITE_PATH) -> BaseStorage:
+    return SqliteStorage(path) if backend == "sqlite" else MemoryStorage()
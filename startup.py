@@ -0,0 +1,210 @@
+"""
+Холодний старт: профілювання імпортів та прогрів лінивих залежностей.
+
+Модуль навмисно легкий (лише stdlib) — його імпортують першим рядком
+точок входу, щоб зафіксувати момент старту процесу.
+
+Використання:
+    python webhook_bot.py --profile-startup
+    python bot.py --profile-startup
+    python startup.py webhook_bot
+"""
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Момент імпорту модуля ≈ початок роботи точки входу
+PROCESS_T0 = time.perf_counter()
+
+logger = logging.getLogger(__name__)
+
+# Важкі SDK, які імпортуються ліниво (при першому використанні)
+LAZY_MODULES = ("openai", "httpx")
+
+# Точки входу та код, після якого бот вважається "готовим"
+_READY_SNIPPETS = {
+    "webhook_bot": "webhook_bot.create_app()",
+    "bot": "bot.create_bot(); bot.create_dispatcher()",
+}
+
+_READY_MARKER = "__STARTUP_READY_MS__"
+
+
+def elapsed_ms() -> float:
+    """Час від старту точки входу (мс)"""
+    return (time.perf_counter() - PROCESS_T0) * 1000
+
+
+def mark_ready(label: str) -> float:
+    """Логує time-to-ready і повертає його в мілісекундах"""
+    ready_ms = elapsed_ms()
+    logger.info("⏱️ %s: готовий за %.0f мс", label, ready_ms)
+    return ready_ms
+
+
+async def warm_up(modules: Tuple[str, ...] = LAZY_MODULES) -> None:
+    """
+    Фоновий прогрів лінивих імпортів після того, як webhook вже приймає запити.
+    Імпорт виконується у потоці, щоб не блокувати event loop.
+    """
+    for name in modules:
+        if name in sys.modules:
+            continue
+        started = time.perf_counter()
+        try:
+            await import_off_loop(name)
+            logger.debug("Прогріто імпорт %s за %.0f мс", name, (time.perf_counter() - started) * 1000)
+        except Exception as e:
+            logger.warning("Не вдалося прогріти імпорт %s: %s", name, e)
+
+
+# Імпорти у потоці: одна задача на модуль, яку чекають усі виклики
+_imports: Dict[str, Any] = {}
+
+
+async def import_off_loop(name: str) -> None:
+    """
+    Лінивий імпорт у потоці: перший запит не чекає на імпорт SDK в event loop,
+    навіть якщо warm_up ще не завершився чи не запускався (loadtest, тести).
+    Модуль з'являється в sys.modules ще до кінця імпорту, тому паралельні
+    виклики чекають спільну задачу, а не перевіряють sys.modules.
+    """
+    import asyncio
+    import importlib
+
+    task = _imports.get(name)
+    if task is None or (task.done() and task.exception()) or (
+        not task.done() and task.get_loop() is not asyncio.get_running_loop()
+    ):
+        task = _imports[name] = asyncio.ensure_future(asyncio.to_thread(importlib.import_module, name))
+    await asyncio.shield(task)
+
+
+# ---------- Профілювання (-X importtime) ----------
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Розбирає вивід `python -X importtime`.
+
+    Returns:
+        Список (модуль, self_us, cumulative_us, глибина вкладеності)
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            # рядок-заголовок "self [us] | cumulative | imported package"
+            continue
+        raw_name = parts[2].rstrip()
+        depth = (len(raw_name) - len(raw_name.lstrip(" "))) // 2
+        rows.append((raw_name.strip(), self_us, cumulative_us, depth))
+    return rows
+
+
+def _entry_subtree(rows: List[Tuple[str, int, int, int]], module: str) -> List[Tuple[str, int, int, int]]:
+    """Рядки, імпортовані точкою входу (importtime друкує дочірні модулі перед батьківським)"""
+    for end, (name, _, _, depth) in enumerate(rows):
+        if depth == 0 and name == module:
+            start = end
+            while start > 0 and rows[start - 1][3] > 0:
+                start -= 1
+            return rows[start:end + 1]
+    return rows
+
+
+def summarize_importtime(rows: List[Tuple[str, int, int, int]], module: str, top: int = 15) -> Dict[str, list]:
+    """Групує імпорти точки входу: прямі залежності за пакетами та найдорожчі модулі за self-часом"""
+    subtree = _entry_subtree(rows, module)
+    packages: Dict[str, int] = {}
+    for name, _self_us, cumulative_us, depth in subtree:
+        # глибина 1 — те, що точка входу імпортує напряму
+        if depth == 1:
+            root = name.split(".")[0]
+            packages[root] = packages.get(root, 0) + cumulative_us
+
+    by_package = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    by_self = sorted(((name, self_us) for name, self_us, _, _ in subtree), key=lambda kv: kv[1], reverse=True)[:top]
+    return {"packages": by_package, "self": by_self}
+
+
+def profile_startup(module: str, top: int = 15) -> int:
+    """
+    Запускає окремий інтерпретатор з `-X importtime`, імпортує точку входу,
+    доводить її до стану "готовий" і друкує розбивку часу імпортів.
+
+    Args:
+        module: Ім'я модуля точки входу (bot або webhook_bot)
+        top: Кількість рядків у кожному зрізі звіту
+
+    Returns:
+        Код виходу (0 — успіх)
+    """
+    import subprocess
+
+    ready = _READY_SNIPPETS.get(module, module)
+    code = (
+        "import time; _t0 = time.perf_counter()\n"
+        f"import {module}\n"
+        f"{ready}\n"
+        f"print('{_READY_MARKER}', (time.perf_counter() - _t0) * 1000)\n"
+    )
+
+    env = dict(os.environ)
+    # Без справжнього токена aiogram не дасть створити Bot — для профілю достатньо фіктивного
+    if env.get("BOT_TOKEN", "YOUR_BOT_TOKEN_HERE") == "YOUR_BOT_TOKEN_HERE":
+        env["BOT_TOKEN"] = "123456:PROFILE_STARTUP"
+
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    if proc.returncode != 0:
+        print(f"❌ Не вдалося запустити {module}:\n{proc.stderr[-2000:]}")
+        return proc.returncode
+
+    ready_ms: Optional[float] = None
+    for line in proc.stdout.splitlines():
+        if line.startswith(_READY_MARKER):
+            ready_ms = float(line.split()[1])
+
+    rows = parse_importtime(proc.stderr)
+    summary = summarize_importtime(rows, module, top=top)
+    total_us = sum(cumulative_us for name, _, cumulative_us, depth in rows if depth == 0 and name == module)
+
+    print(f"🚀 Профіль холодного старту: {module}")
+    print(f"• Імпорти (сумарно): {total_us / 1000:.1f} мс, модулів: {len(rows)}")
+    if ready_ms is not None:
+        print(f"• Time-to-ready (імпорт + ініціалізація): {ready_ms:.1f} мс")
+    print(f"• Повний запуск інтерпретатора: {wall_ms:.1f} мс")
+
+    print("\nНайдорожчі пакети (cumulative):")
+    for name, cumulative_us in summary["packages"]:
+        print(f"  {cumulative_us / 1000:9.1f} мс  {name}")
+
+    print("\nНайдорожчі модулі (self):")
+    for name, self_us in summary["self"]:
+        print(f"  {self_us / 1000:9.1f} мс  {name}")
+
+    loaded_lazy = [name for name in LAZY_MODULES if any(row[0] == name for row in rows)]
+    if loaded_lazy:
+        print(f"\n⚠️ Ліниві модулі імпортовано під час старту: {', '.join(loaded_lazy)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(profile_startup(sys.argv[1] if len(sys.argv) > 1 else "webhook_bot"))
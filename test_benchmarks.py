@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Тести для раннера мікробенчмарків
+"""
+import asyncio
+
+from benchmarks.harness import compare, measure
+
+
+def test_measure_sync_and_async():
+    """measure калібрує ітерації і повертає статистику для sync та async функцій"""
+    loop = asyncio.new_event_loop()
+    try:
+        async def noop():
+            return None
+
+        for fn in (lambda: sum(range(10)), noop):
+            result = measure(fn, loop, rounds=2, min_time=0.001)
+            assert result["median_us"] > 0
+            assert result["iterations"] >= 1
+    finally:
+        loop.close()
+
+
+def test_compare_flags_regressions_against_baseline():
+    """Регресія фіксується лише при перевищенні порогу; нові бенчмарки не є регресією"""
+    baseline = {"results": {"fast": {"median_us": 10.0}, "slow": {"median_us": 10.0}}}
+    results = {"fast": {"median_us": 11.0}, "slow": {"median_us": 13.0}, "new": {"median_us": 1.0}}
+    rows = {row["name"]: row for row in compare(results, baseline, threshold=1.25)}
+    assert not rows["fast"]["regression"]
+    assert rows["slow"]["regression"] and rows["slow"]["ratio"] == 1.3
+    assert rows["new"]["ratio"] is None and not rows["new"]["regression"]
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Тести для пам'яті розмови /ask
+"""
+import asyncio
+
+from conversation_memory import ConversationMemory, MemoryConversationStore, SqliteConversationStore, Turn
+
+
+def test_window_keeps_newest_turns_within_token_budget():
+    """Вікно — підсумок і найновіші репліки, доки вміщуються в бюджет"""
+    async def scenario():
+        memory = ConversationMemory(MemoryConversationStore(), window_tokens=60, max_turns=6)
+        for index in range(5):
+            await memory.add_exchange(1, 1, f"питання {index} " + "x" * 80, f"відповідь {index} " + "y" * 80)
+        conversation = await memory.store.load((1, 1))
+        assert len(conversation.turns) == 6  # буфер обмежений
+        window = await memory.window(1, 1)
+        assert [m["role"] for m in window] == ["user", "assistant"]
+        assert window[-1]["content"].startswith("відповідь 4")
+        conversation.summary = "користувач Оля вивчає asyncio"
+        assert (await memory.window(1, 1))[0] == {
+            "role": "system", "content": "Підсумок попередньої розмови з користувачем: користувач Оля вивчає asyncio",
+        }
+        await memory.clear(1, 1)
+        assert await memory.window(1, 1) == []
+
+    asyncio.run(scenario())
+
+
+def test_group_members_have_separate_histories():
+    """У групі контекст і /reset — окремі для кожного учасника"""
+    async def scenario():
+        memory = ConversationMemory(MemoryConversationStore())
+        await memory.add_exchange(-100, 1, "моє питання", "відповідь першому")
+        await memory.add_exchange(-100, 2, "інше питання", "відповідь другому")
+        assert [m["content"] for m in await memory.window(-100, 2)] == ["інше питання", "відповідь другому"]
+        await memory.clear(-100, 1)
+        assert await memory.window(-100, 1) == []
+        assert len(await memory.window(-100, 2)) == 2
+
+    asyncio.run(scenario())
+
+
+def test_memory_store_evicts_least_recently_used_conversations():
+    """Словник процесу обмежений size: витісняється найдавніше використана розмова"""
+    async def scenario():
+        memory = ConversationMemory(MemoryConversationStore(size=2))
+        for user_id in (1, 2):
+            await memory.add_exchange(1, user_id, f"питання {user_id}", "відповідь")
+        await memory.window(1, 1)  # розмова 1 використана останньою
+        await memory.add_exchange(1, 3, "питання 3", "відповідь")
+        assert len(memory.store._conversations) == 2
+        assert await memory.window(1, 2) == []
+        assert len(await memory.window(1, 1)) == 2 and len(await memory.window(1, 3)) == 2
+
+    asyncio.run(scenario())
+
+
+def test_old_turns_are_compacted_into_summary_in_background():
+    """Понад compact_after реплік старші стискаються в підсумок, останні лишаються дослівно"""
+    seen = []
+
+    async def summarizer(summary, turns):
+        seen.append((summary, [turn.text for turn in turns]))
+        return f"підсумок {len(turns)}"
+
+    async def scenario():
+        memory = ConversationMemory(MemoryConversationStore(), summarizer, compact_after=4, keep_turns=2)
+        await memory.add_exchange(7, 7, "q1", "a1")
+        await memory.add_exchange(7, 7, "q2", "a2")
+        await asyncio.sleep(0)
+        assert not seen
+        await memory.add_exchange(7, 7, "q3", "a3")
+        await asyncio.sleep(0.01)
+        return await memory.store.load((7, 7))
+
+    conversation = asyncio.run(scenario())
+    assert seen == [("", ["q1", "a1", "q2", "a2"])]
+    assert conversation.summary == "підсумок 4"
+    assert [turn.text for turn in conversation.turns] == ["q3", "a3"]
+
+
+def test_sqlite_store_round_trip(tmp_path):
+    """Історія в SQLite спільна для процесів: зберігається і читається як JSON"""
+    path = str(tmp_path / "state.sqlite3")
+
+    async def scenario():
+        store = SqliteConversationStore(path)
+        conversation = await store.load((-5, 1))
+        conversation.summary = "коротко"
+        conversation.turns.append(Turn("user", "привіт", 3))
+        await store.save((-5, 1), conversation)
+        loaded = await SqliteConversationStore(path).load((-5, 1))
+        assert loaded.summary == "коротко" and loaded.turns == [Turn("user", "привіт", 3)]
+        assert (await store.load((-5, 2))).turns == []  # інший учасник групи
+        await store.delete((-5, 1))
+        assert (await store.load((-5, 1))).turns == []
+
+    asyncio.run(scenario())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Тести для спільного пакета хендлерів
+"""
+import handlers
+
+
+def test_router_order_commands_before_states_before_fallback():
+    """Команди мають пріоритет над станами FSM, а стани — над звичайним текстом"""
+    assert [router.name for router in handlers.router.sub_routers] == ["admin", "commands", "callbacks", "inputs", "fallback"]
+
+
+def test_polling_entry_point_uses_shared_handlers():
+    """bot.py не має власних копій хендлерів і налаштувань"""
+    import bot
+
+    assert bot.get_user_settings is handlers.get_user_settings
+    assert bot.update_user_setting is handlers.update_user_setting
+    assert not hasattr(bot, "dp"), "диспетчер polling створюється лише при запуску"
+
+
+def test_text_while_tts_job_is_queued_does_not_submit_another_job(monkeypatch):
+    """Стан введення знімається, щойно задачу прийнято в чергу: наступний текст — не нова озвучка"""
+    import asyncio
+
+    from aiogram import Bot, Dispatcher
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.types import Update
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+
+    import job_scheduler
+    from handlers import inputs, jobs
+    from handlers.common import UserStates
+    from loadtest.fake_telegram import fake_result
+    from loadtest.scenarios import message_update
+
+    user_id = 777
+    scheduler = job_scheduler.JobScheduler(capacity=10, user_limits={"tts": 1}, user_queue=5)
+    monkeypatch.setattr(job_scheduler, "_job_scheduler", scheduler)
+    monkeypatch.setattr(inputs, "OPENAI_CONFIGURED", True)
+    release = asyncio.Event()
+    spoken, sent = [], []
+
+    async def fake_tts_job(bot, chat_id, user, status_message_id, text, voice, speed):
+        spoken.append(text)
+        await release.wait()
+
+    monkeypatch.setattr(jobs, "_tts_job", fake_tts_job)
+
+    async def handle(request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        sent.append((method, params.get("text")))
+        return web.json_response({"ok": True, "result": fake_result(method, params)})
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", handle)
+        async with TestServer(app) as server:
+            session = AiohttpSession(api=TelegramAPIServer.from_base(str(server.make_url(""))))
+            bot = Bot("123:abc", session=session)
+            dp = Dispatcher()
+            dp.include_router(handlers.router)
+            try:
+                # попередня озвучка ще йде — нова стане в чергу
+                assert scheduler.submit(user_id, "tts", release.wait).status == job_scheduler.STARTED
+                await dp.fsm.get_context(bot, user_id, user_id).set_state(UserStates.waiting_for_tts_text)
+                await dp.feed_update(bot, Update.model_validate(message_update(user_id, "перший текст")))
+                assert scheduler.queued() == 1
+                await dp.feed_update(bot, Update.model_validate(message_update(user_id, "другий текст")))
+                assert scheduler.queued() == 1
+                assert ("sendMessage", "🔔 Ви написали: другий текст") in sent
+                release.set()
+                while not spoken:
+                    await asyncio.sleep(0.01)
+                assert spoken == ["перший текст"]
+            finally:
+                dp.sub_routers.remove(handlers.router)
+                handlers.router._parent_router = None  # роутер підключається до одного диспетчера
+                await session.close()
+
+    asyncio.run(scenario())
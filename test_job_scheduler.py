@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Тести для справедливого планувальника дорогих задач
+"""
+import asyncio
+
+from job_scheduler import QUEUED, REJECTED, STARTED, JobScheduler, parse_limits
+
+
+def test_parse_limits():
+    """Розбір "kind=n" пропускає некоректні елементи"""
+    assert parse_limits("image=4, tts=1,bad,x=y") == {"image": 4, "tts": 1}
+
+
+def test_user_limit_queues_with_position_and_rejects_overflow():
+    """Понад ліміт користувача — черга з позицією, понад розмір черги — відмова"""
+    async def scenario():
+        scheduler = JobScheduler(capacity=10, user_limits={"tts": 1}, user_queue=2)
+        release = asyncio.Event()
+        started = []
+
+        def job(name):
+            async def run():
+                started.append(name)
+                await release.wait()
+            return run
+
+        tickets = [scheduler.submit(1, "tts", job(i)) for i in range(4)]
+        assert [t.status for t in tickets] == [STARTED, QUEUED, QUEUED, REJECTED]
+        assert [t.position for t in tickets[1:3]] == [1, 2]
+
+        release.set()
+        while len(started) < 3 or scheduler.running(1):
+            await asyncio.sleep(0.01)
+        assert started == [0, 1, 2]
+
+    asyncio.run(scenario())
+
+
+def test_deficit_round_robin_does_not_starve_light_user():
+    """Новий користувач чекає один обхід round-robin, а не всю чергу активного"""
+    async def scenario():
+        scheduler = JobScheduler(capacity=4, costs={"image": 4, "tts": 1}, user_queue=10, quantum=4)
+        gates = {}
+        order = []
+
+        def job(name):
+            gates[name] = asyncio.Event()
+
+            async def run():
+                order.append(name)
+                await gates[name].wait()
+            return run
+
+        scheduler.submit("heavy", "image", job("h1"))
+        for name in ("h2", "h3"):
+            scheduler.submit("heavy", "image", job(name))
+        ticket = scheduler.submit("light", "tts", job("l1"))
+        assert ticket.status == QUEUED and ticket.position == 2
+
+        for name in ("h1", "h2", "l1", "h3"):
+            while name not in order:
+                await asyncio.sleep(0.01)
+            gates[name].set()
+        assert order == ["h1", "h2", "l1", "h3"]
+
+    asyncio.run(scenario())
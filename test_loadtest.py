@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Тести для допоміжних функцій навантажувального тесту
+"""
+import pytest
+
+from loadtest.runner import latency_summary, percentile
+from loadtest.scenarios import SCENARIOS, callback_update, message_update, parse_mix
+
+
+def test_percentile_nearest_rank():
+    """Перцентилі рахуються методом найближчого рангу"""
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 99) == 0.099
+    assert percentile([], 50) == 0.0
+    assert latency_summary(values)["max_ms"] == 100.0
+
+
+def test_synthetic_updates_are_valid():
+    """Синтетичні апдейти проходять валідацію aiogram і мають унікальні id"""
+    from aiogram.types import Update
+
+    command = Update.model_validate(message_update(1, "/ask питання"))
+    callback = Update.model_validate(callback_update(1, "ask_ai"))
+    assert command.message.entities[0].type == "bot_command"
+    assert callback.callback_query.data == "ask_ai"
+    assert command.update_id != callback.update_id
+    for build in SCENARIOS.values():
+        assert build(7)
+
+
+def test_parse_mix_rejects_unknown_scenario():
+    """Невідомий сценарій у суміші — помилка, а не тиха ігнорація"""
+    assert parse_mix("ask=2,tts") == [("ask", 2.0), ("tts", 1.0)]
+    with pytest.raises(ValueError):
+        parse_mix("nope=1")
+
+
+def test_soak_duration_and_trend_helpers():
+    """Тривалість soak-тесту задається з суфіксами, тренд RSS — нахил МНК-прямої"""
+    from loadtest.soak import linear_slope, parse_duration
+
+    assert parse_duration("90") == 90.0
+    assert parse_duration("30m") == 1800.0
+    assert parse_duration("4h") == 14400.0
+    assert linear_slope([(0, 100.0), (10, 110.0), (20, 120.0)]) == 1.0
+    assert linear_slope([(5, 100.0)]) == 0.0
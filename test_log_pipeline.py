@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Тести для неблокуючого конвеєра логування
+"""
+import json
+import logging
+
+import log_pipeline
+from log_pipeline import JsonFormatter, Redacted, SamplingFilter, parse_sampling
+
+
+def _record(name: str, level: int, msg: str, *args) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_parse_sampling():
+    """Розбір LOG_SAMPLING ігнорує некоректні елементи та обмежує частку [0, 1]"""
+    rates = parse_sampling("openai_service=0.1, aiohttp.access=2, broken, x=abc")
+    assert rates == {"openai_service": 0.1, "aiohttp.access": 1.0}
+
+
+def test_sampling_filter_keeps_warnings_and_inherits_rules():
+    """Семплінг діє лише нижче WARNING і успадковується дочірніми логерами"""
+    sampling = SamplingFilter({"aiohttp": 0.0})
+    assert not sampling.filter(_record("aiohttp.access", logging.INFO, "GET /"))
+    assert sampling.filter(_record("aiohttp.access", logging.WARNING, "slow"))
+    assert sampling.filter(_record("openai_service", logging.INFO, "ok"))
+
+
+def test_redacted_is_lazy_and_hides_prompt():
+    """Текст користувача не потрапляє в лог при увімкненому редагуванні"""
+    original = log_pipeline.LOG_REDACT_PROMPTS
+    try:
+        log_pipeline.LOG_REDACT_PROMPTS = True
+        assert str(Redacted("секретний промт")) == "<redacted 15 chars>"
+        log_pipeline.LOG_REDACT_PROMPTS = False
+        assert str(Redacted("a" * 150)) == "a" * 100 + "..."
+    finally:
+        log_pipeline.LOG_REDACT_PROMPTS = original
+
+
+def test_json_formatter_includes_extra_fields():
+    """JSON-запис містить повідомлення, trace id та extra-поля"""
+    record = _record("openai_service", logging.INFO, "Запит: %s", "x")
+    record.model = "gpt-4o-mini"
+    record.trace_id = "abc"
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["msg"] == "Запит: x"
+    assert payload["model"] == "gpt-4o-mini"
+    assert payload["trace_id"] == "abc"
+    assert payload["level"] == "INFO"
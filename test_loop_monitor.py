@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Тести для монітора event loop
+"""
+import asyncio
+import time
+
+from loop_monitor import LoopMonitor
+
+
+def test_blocking_call_is_reported_with_stack():
+    """Блокуючий виклик у корутині фіксується зі стеком і назвою задачі, затримка зростає"""
+    async def blocking_handler():
+        time.sleep(0.4)
+
+    async def scenario():
+        monitor = LoopMonitor(interval=0.05, slow_threshold=0.1)
+        monitor.start()
+        await asyncio.sleep(0.1)
+        await asyncio.create_task(blocking_handler(), name="handler")
+        await asyncio.sleep(0.2)
+        await monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(scenario())
+    assert len(monitor.stalls) == 1
+    stall = monitor.stalls[0]
+    assert "blocking_handler" in stall.stack and "handler" in stall.task
+    assert 0.2 < stall.duration < 1.0
+
+
+def test_idle_loop_has_no_stalls():
+    """Без блокувань зависань немає"""
+    async def scenario():
+        monitor = LoopMonitor(interval=0.02, slow_threshold=0.1)
+        monitor.start()
+        await asyncio.sleep(0.3)
+        await monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(scenario())
+    assert not monitor.stalls and monitor.lag < 0.1
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Тести для метрик у форматі Prometheus
+"""
+from metrics import Registry
+
+
+def test_counter_and_gauge_render():
+    """Лічильники та gauge рендеряться з лейблами"""
+    registry = Registry()
+    retries = registry.counter("test_retries_total", "Повтори", ("operation",))
+    depth = registry.gauge("test_queue_depth", "Глибина черги")
+
+    retries.labels("send_message").inc()
+    retries.labels("send_message").inc(2)
+    depth.set(5)
+
+    text = registry.render()
+    assert '# TYPE test_retries_total counter' in text
+    assert 'test_retries_total{operation="send_message"} 3' in text
+    assert 'test_queue_depth 5' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    """Бакети гістограми кумулятивні, є _sum та _count"""
+    registry = Registry()
+    latency = registry.histogram("test_latency_seconds", "Латентність", ("handler",), buckets=(0.1, 1.0))
+    child = latency.labels("ask_handler")
+    for value in (0.05, 0.5, 0.7, 3.0):
+        child.observe(value)
+
+    text = registry.render()
+    assert 'test_latency_seconds_bucket{handler="ask_handler",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{handler="ask_handler",le="1"} 3' in text
+    assert 'test_latency_seconds_bucket{handler="ask_handler",le="+Inf"} 4' in text
+    assert 'test_latency_seconds_count{handler="ask_handler"} 4' in text
+    assert 'test_latency_seconds_sum{handler="ask_handler"} 4.25' in text
+
+
+def test_label_values_are_escaped():
+    """Спецсимволи в лейблах екрануються"""
+    registry = Registry()
+    counter = registry.counter("test_escape_total", "Екранування", ("value",))
+    counter.labels('a"b\nc').inc()
+    assert 'test_escape_total{value="a\\"b\\nc"} 1' in registry.render()
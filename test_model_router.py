@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Тести для маршрутизації запитів між моделями
+"""
+from model_router import Decision, ModelRouter, Route, parse_prices, parse_routes
+
+
+def _router() -> ModelRouter:
+    return ModelRouter([
+        Route("short", ("fast",), max_tokens=150),
+        Route("code", ("strong",), tasks=("code",), tiers=("premium", "admin"), max_load=0),
+        Route("default", ("base", "fast"), prefer="order"),
+    ], prices={"fast": (1.0, 2.0)})
+
+
+def test_routes_by_tokens_task_tier_and_load():
+    """Перший маршрут, чиї умови збіглися: токени, тип команди, рівень користувача, навантаження"""
+    router = _router()
+    assert router.route("ask", 20, load=0) == Decision("short", "fast")
+    assert router.route("code", 500, load=0) == Decision("default", "base")  # free користувач
+    router.user_tier = lambda user_id: "premium"
+    assert router.route("code", 500, load=0) == Decision("code", "strong")
+    assert router.route("code", 500, load=2) == Decision("default", "base")
+
+
+def test_feedback_prefers_faster_and_skips_failing_models():
+    """Латентність і помилки з record() змінюють вибір"""
+    router = ModelRouter([Route("r", ("a", "b"))])
+    assert router.route("ask", 10, load=0).model == "a"  # без статистики — пробуємо по черзі
+    router.record(Decision("r", "a"), 2.0, True)
+    assert router.route("ask", 10, load=0).model == "b"
+    router.record(Decision("r", "b"), 0.5, True)
+    assert router.route("ask", 10, load=0).model == "b"
+    router.record(Decision("r", "b"), 0.5, False)
+    router.record(Decision("r", "b"), 0.5, False)
+    router.record(Decision("r", "b"), 0.5, False)
+    router.record(Decision("r", "b"), 0.5, False)
+    assert router.route("ask", 10, load=0).model == "a"
+
+
+def test_cost_estimate_and_config_parsing():
+    """Ціни з MODEL_PRICES і таблиця з MODEL_ROUTES"""
+    assert parse_prices("a=1/2, b=3, bad") == {"a": (1.0, 2.0), "b": (3.0, 3.0)}
+    assert _router().cost("fast", 1_000_000, 500_000) == 2.0
+    routes = parse_routes('[{"name": "x", "models": ["m"], "tasks": ["code"]}]')
+    assert routes == [Route("x", ("m",), tasks=("code",))]
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Тести для пулу ключів OpenAI
+"""
+import asyncio
+
+from openai_keys import KeyPool, parse_duration, parse_keys
+
+
+def _headers(remaining_requests: int, remaining_tokens: int, **extra) -> dict:
+    headers = {
+        "x-ratelimit-limit-requests": "100",
+        "x-ratelimit-remaining-requests": str(remaining_requests),
+        "x-ratelimit-reset-requests": "6m0s",
+        "x-ratelimit-limit-tokens": "10000",
+        "x-ratelimit-remaining-tokens": str(remaining_tokens),
+        "x-ratelimit-reset-tokens": "20ms",
+    }
+    headers.update(extra)
+    return headers
+
+
+def test_parse_keys_and_durations():
+    """Формат OPENAI_API_KEYS і тривалості з заголовків x-ratelimit-reset-*"""
+    keys = parse_keys("sk-a, main=sk-b@org-1 ,,sk-c@org-1")
+    assert [(k.name, k.key, k.organization) for k in keys] == [
+        ("key1", "sk-a", None), ("main", "sk-b", "org-1"), ("key3", "sk-c", "org-1"),
+    ]
+    assert keys[1].bucket == keys[2].bucket == "org-1"
+    assert keys[1].auth_headers() == {"Authorization": "Bearer sk-b", "OpenAI-Organization": "org-1"}
+    assert "sk-a" not in repr(keys[0])
+    assert parse_duration("20ms") == 0.02
+    assert parse_duration("6m0s") == 360.0
+    assert parse_duration("1h2m3.5s") == 3723.5
+    assert parse_duration("2") == 2.0
+    assert parse_duration("") is None
+
+
+def test_picks_key_with_most_headroom():
+    """Запит іде на ключ з більшим запасом; локальне списання розводить паралельні запити"""
+    pool = KeyPool(parse_keys("sk-a,sk-b"))
+    a, b = pool.keys
+    pool.release(pool.acquire("m", now=0.0), "chat", "m", 200, _headers(10, 9000), now=0.0)
+    assert pool.acquire("m", now=1.0) is b  # про b ще нічого не відомо — запас 1.0
+    pool.release(b, "chat", "m", 200, _headers(50, 9000), now=1.0)
+    assert pool.acquire("m", 100, now=2.0) is b
+    # інша модель — окремий ліміт
+    assert pool.limits(a, "other").headroom(2.0) == 1.0
+
+
+def test_429_cools_key_down_until_retry_after():
+    """Після 429 ключ обходиться, доки не мине retry-after; якщо охолоджуються всі — найближчий"""
+    pool = KeyPool(parse_keys("sk-a,sk-b"), cooldown=30.0)
+    a, b = pool.keys
+    pool.release(a, "chat", "m", 429, _headers(0, 0, **{"retry-after": "5"}), now=0.0)
+    assert pool.acquire("m", now=1.0) is b
+    pool.release(b, "chat", "m", 429, {}, now=2.0)  # без заголовків — cooldown
+    assert pool.acquire("m", now=3.0) is a  # a охолоджується до 5.0, b — до 32.0
+    assert pool.limits(b, "m").cooldown_until == 32.0
+
+
+def test_lease_reports_status_from_exception():
+    """lease() повертає ключ у пул і бере статус та заголовки з e.response"""
+    pool = KeyPool(parse_keys("sk-a"))
+
+    class _Response:
+        status_code = 429
+        headers = {"retry-after-ms": "1500"}
+
+    class _Error(Exception):
+        response = _Response()
+
+    async def scenario():
+        try:
+            async with pool.lease("audio.speech", "tts") as lease:
+                assert lease.key.in_flight == 1
+                raise _Error()
+        except _Error:
+            pass
+        async with pool.lease("audio.speech", "tts") as lease:
+            lease.headers = _headers(99, 100)
+
+    asyncio.run(scenario())
+    key = pool.keys[0]
+    assert key.in_flight == 0
+    state = pool.limits(key, "tts")
+    assert state.cooldown_until > 0 and state.remaining_requests == 99
+
+
+def test_concurrent_leases_share_one_client():
+    """Паралельні lease одного ключа отримують один клієнт SDK, створений у потоці"""
+    pool = KeyPool(parse_keys("sk-a"))
+    clients = []
+
+    async def request():
+        async with pool.lease("chat", "m") as lease:
+            clients.append(lease.client)
+
+    async def scenario():
+        await asyncio.gather(*(request() for _ in range(5)))
+
+    asyncio.run(scenario())
+    assert len({id(client) for client in clients}) == 1
+    assert clients[0] is pool.client(pool.keys[0])
+
+
+def test_paces_requests_before_limit_is_hit():
+    """Нижче soft_headroom — рівномірний темп до скидання; бракує залишку — чекати скидання"""
+    pool = KeyPool(parse_keys("sk-a"), soft_headroom=0.2, max_wait=100.0)
+    key = pool.keys[0]
+    pool.release(key, "chat", "m", 200, _headers(50, 9000), now=0.0)
+    assert pool.reserve("m", 100, now=0.0)[1] == 0.0  # запасу досить
+    pool.release(key, "chat", "m", 200, _headers(10, 9000, **{"x-ratelimit-reset-requests": "20s"}), now=0.0)
+    # 10 запитів на 20 с — по 2 с на запит, паралельні стають у чергу
+    assert pool.reserve("m", now=0.0)[1] == 0.0
+    assert pool.reserve("m", now=0.0)[1] == 2.0
+    # токенів не вистачає на бюджет відповіді — до скидання лімітів токенів (20 мс)
+    pool.release(key, "chat", "m", 200, _headers(90, 50), now=1.0)
+    assert abs(pool.reserve("m", 500, now=1.0)[1] - 0.02) < 1e-9
+    # пауза обмежена max_wait
+    pool.max_wait = 1.0
+    pool.release(key, "chat", "m", 200, _headers(0, 9000), now=2.0)
+    assert pool.reserve("m", now=2.0)[1] == 1.0
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Тести для контролера перевантаження
+"""
+from overload import OverloadController, parse_thresholds
+
+
+def test_parse_thresholds_sorted_and_limited():
+    """Межі сортуються, зайві й некоректні відкидаються"""
+    assert parse_thresholds("0.9,0.5,x,0.7,0.6,0.8,1.0") == (0.5, 0.6, 0.7, 0.8, 0.9)
+
+
+def test_tier_rises_at_once_and_falls_step_by_step():
+    """Рівень піднімається одразу, а знімається по одному з гістерезисом і паузою"""
+    controller = OverloadController(hysteresis=0.8, cooldown=10)
+    assert controller.update(0.75, now=0) == 3
+    assert controller.update(0.1, now=5) == 3       # ще не минула пауза
+    assert controller.update(0.6, now=20) == 3      # нижче межі 0.7, але не з запасом (0.56)
+    assert controller.update(0.1, now=21) == 2
+    assert controller.update(0.1, now=25) == 2
+    assert controller.update(0.1, now=31) == 1
+    assert controller.update(0.95, now=32) == 5
+
+
+def test_queue_and_lag_pressure():
+    """Тиск — максимум із заповненості черг і затримки event loop"""
+    depth = {"value": 30}
+    controller = OverloadController(lag_high=0.5)
+    controller.watch_queue("updates", lambda: depth["value"], 100)
+    assert controller.measure() == 0.3
+    controller.lag = 0.4
+    assert controller.measure() == 0.8
+
+
+def test_degraded_parameters_by_tier():
+    """Рівні накопичуються: зображення, модель, max_tokens, повтори, відмова"""
+    controller = OverloadController(cheap_model="cheap", max_tokens=300)
+    settings = {"image_quality": "high", "image_size": "auto"}
+    assert controller.effective_settings(settings)["image_count"] == 2
+    assert controller.text_params("gpt", 1000) == ("gpt", 1000)
+
+    controller.update(0.65, now=0)
+    degraded = controller.effective_settings(settings)
+    assert degraded["image_quality"] == "low" and degraded["image_count"] == 1
+    assert settings["image_quality"] == "high"
+    assert controller.text_params("gpt", 1000) == ("cheap", 1000)
+    assert controller.max_retries() is None and not controller.reject("tts")
+
+    controller.update(1.0, now=1)
+    assert controller.text_params("gpt", 1000) == ("cheap", 300)
+    assert controller.max_retries() == 0 and controller.reject("tts")
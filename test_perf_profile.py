@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Тести для профілю продуктивності (event loop і JSON-кодек)
+"""
+import asyncio
+
+import perf_profile
+
+
+def test_codec_round_trip_keeps_unicode_and_types():
+    """Кодек активного профілю повертає ті самі дані, що й stdlib json"""
+    payload = {"text": "Привіт, світ 👋", "chat_id": 123, "speed": 1.25, "ok": True, "items": [None, "a"]}
+    assert perf_profile.json_loads(perf_profile.json_dumps(payload)) == payload
+    assert perf_profile.json_loads(perf_profile.json_dumps_bytes(payload)) == payload
+    assert perf_profile.json_dumps_bytes({"big": 2 ** 70}) in (b'{"big": 1180591620717411303424}', b'{"big":1180591620717411303424}')
+
+
+def test_run_reports_active_loop():
+    """run() виконує корутину на loop поточного профілю"""
+    async def probe():
+        await asyncio.sleep(0)
+        return perf_profile.describe()
+
+    info = perf_profile.run(probe())
+    assert info["loop"] in ("asyncio", "uvloop")
+    assert info["json"] == perf_profile.JSON_CODEC
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Тести для long polling через UpdateScheduler
+"""
+import asyncio
+import contextlib
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from loadtest.fake_telegram import fake_result
+from loadtest.scenarios import message_update
+from polling import OffsetTracker, run_polling
+
+
+def test_offset_tracker_commits_everything_enqueued():
+    """Підтверджується все, що стоїть у черзі, незалежно від обробки"""
+    tracker = OffsetTracker()
+    assert tracker.commit_offset is None
+    for update_id in (10, 11, 12):
+        tracker.fetched(update_id)
+    assert tracker.commit_offset == 13 and tracker.unfinished == 3
+    tracker.done(12)
+    tracker.done(10)
+    assert tracker.commit_offset == 13 and tracker.unfinished == 1
+
+
+def test_run_polling_respects_limit_and_commits_offset_on_stop():
+    """Апдейтів у відповіді не більше limit, а при зупинці — offset після останнього обробленого"""
+    updates = [dict(message_update(user_id, "/x"), update_id=100 + i) for i, user_id in enumerate((1, 2, 1, 3, 2))]
+    requests = []
+    batch_sizes = []
+
+    async def handle(request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        if method != "getUpdates":
+            return web.json_response({"ok": True, "result": fake_result(method, params)})
+        requests.append(params)
+        offset, limit = int(params.get("offset") or 0), int(params["limit"])
+        batch = [u for u in updates if u["update_id"] >= offset][:limit]
+        batch_sizes.append(len(batch))
+        if not batch:
+            await asyncio.sleep(0.05)
+        return web.json_response({"ok": True, "result": batch})
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", handle)
+        async with TestServer(app) as server:
+            session = AiohttpSession(api=TelegramAPIServer.from_base(str(server.make_url(""))))
+            bot = Bot("123:abc", session=session)
+            handled = []
+            dp = Dispatcher()
+
+            @dp.message()
+            async def on_message(message):
+                handled.append(message.message_id)
+
+            task = asyncio.create_task(run_polling(dp, bot, workers=2, max_pending=10, limit=2, polling_timeout=1))
+            while len(handled) < len(updates):
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+            await session.close()
+
+        assert max(batch_sizes) <= 2
+        assert int(requests[-1]["offset"]) == 105 and int(requests[-1]["timeout"]) == 0
+
+    asyncio.run(scenario())
+
+
+def test_slow_update_does_not_block_intake_for_other_chats():
+    """Завислий обробник в одному чаті не зупиняє отримання понад 100 наступних апдейтів"""
+    total = 250
+    # /x0 — у чаті 1, решта — в інших чатах (у межах чату порядок строгий)
+    updates = [dict(message_update(2 + i % 50 if i else 1, f"/x{i}"), update_id=300 + i) for i in range(total)]
+    pending = []
+
+    async def handle(request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        if method != "getUpdates":
+            return web.json_response({"ok": True, "result": fake_result(method, params)})
+        offset, limit = int(params.get("offset") or 0), int(params["limit"])
+        # апдейти надходять поступово; Telegram забуває все, що нижче offset
+        if updates:
+            pending.extend(updates[:30])
+            del updates[:30]
+        pending[:] = [u for u in pending if u["update_id"] >= offset]
+        batch = pending[:limit]
+        if not batch:
+            await asyncio.sleep(0.05)
+        return web.json_response({"ok": True, "result": batch})
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", handle)
+        async with TestServer(app) as server:
+            session = AiohttpSession(api=TelegramAPIServer.from_base(str(server.make_url(""))))
+            bot = Bot("123:abc", session=session)
+            handled = []
+            dp = Dispatcher()
+
+            @dp.message()
+            async def on_message(message):
+                if message.text == "/x0":
+                    await asyncio.Event().wait()  # "зависла" обробка (довгий /ask чи зображення)
+                handled.append(message.text)
+
+            task = asyncio.create_task(
+                run_polling(dp, bot, workers=4, max_pending=1000, limit=100, polling_timeout=1, drain_timeout=0.05)
+            )
+            try:
+                await asyncio.wait_for(_until(lambda: len(handled) == total - 1), 10)
+            finally:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+                await session.close()
+
+        assert "/x0" not in handled and len(set(handled)) == total - 1
+
+    asyncio.run(scenario())
+
+
+async def _until(condition) -> None:
+    while not condition():
+        await asyncio.sleep(0.01)
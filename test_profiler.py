@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Тести для профілювання на вимогу
+"""
+import asyncio
+import marshal
+import time
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from profiler import Profiler, parse_args, setup_profile_route
+
+
+async def _busy_coroutine(duration: float) -> None:
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        for _ in range(20000):  # Python-код: семплер отримує GIL між байткодами
+            pass
+        await asyncio.sleep(0)
+
+
+def test_parse_args():
+    """Секунди і режим у довільному порядку, невідомий аргумент — помилка"""
+    assert parse_args("") == (10.0, "sample")
+    assert parse_args("cprofile 5") == (5.0, "cprofile")
+    with pytest.raises(ValueError):
+        parse_args("abc")
+
+
+def test_sample_mode_returns_collapsed_stacks():
+    """Семплер бачить функцію, що навантажує loop, у collapsed stacks"""
+    async def scenario():
+        profiler = Profiler(sample_interval=0.002)
+        busy = asyncio.create_task(_busy_coroutine(0.3))
+        result = await profiler.profile(0.2, "sample")
+        await busy
+        return result
+
+    result = asyncio.run(scenario())
+    lines = result.data.decode().splitlines()
+    assert result.samples > 10 and any("_busy_coroutine" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_cprofile_mode_returns_pstats():
+    """cProfile повертає топ і дані у форматі pstats"""
+    async def scenario():
+        busy = asyncio.create_task(_busy_coroutine(0.2))
+        result = await Profiler().profile(0.1, "cprofile")
+        await busy
+        return result
+
+    result = asyncio.run(scenario())
+    assert "_busy_coroutine" in result.top
+    assert isinstance(marshal.loads(result.data), dict)
+
+
+def test_http_route_requires_token():
+    """Без правильного токена в заголовку — 403 (зокрема токен у query), з токеном — топ функцій"""
+    async def scenario():
+        app = web.Application()
+        setup_profile_route(app, "/debug/profile", "secret")
+        async with TestClient(TestServer(app)) as client:
+            denied = await client.get("/debug/profile", headers={"Authorization": "Bearer wrong"})
+            in_query = await client.get("/debug/profile", params={"token": "secret"})
+            allowed = await client.get("/debug/profile", params={"seconds": "0.1", "format": "top"},
+                                       headers={"Authorization": "Bearer secret"})
+            return denied.status, in_query.status, allowed.status, await allowed.text()
+
+    denied, in_query, allowed, body = asyncio.run(scenario())
+    assert denied == 403 and in_query == 403 and allowed == 200 and "функція" in body
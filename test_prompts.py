@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Тести для шаблонів промптів і обліку кешу префікса
+"""
+from types import SimpleNamespace
+
+import prompts
+
+
+def test_templates_are_normalized_with_variable_parts_last():
+    """Без відступів; змінна частина — в кінці, незмінний префікс однаковий для всіх значень"""
+    assert prompts.normalize("""
+        Перший рядок
+           продовження.
+
+        Другий абзац.
+    """) == "Перший рядок продовження.\n\nДругий абзац."
+    for template in (prompts.CREATIVE, prompts.CODE, prompts.TRANSLATE, prompts.SUMMARIZE, prompts.EXPLAIN):
+        assert "  " not in template.system and not template.system.startswith((" ", "\n"))
+    python = prompts.CODE.system_message(language="python")
+    rust = prompts.CODE.system_message(language="rust")
+    assert python.startswith(prompts.CODE.system) and rust.startswith(prompts.CODE.system)
+    assert python.endswith("Мова програмування: python.")
+    # той самий рядок для тих самих параметрів — збирається один раз
+    assert prompts.CODE.system_message(language="python") is python
+    assert prompts.TRANSLATE.user_message("Hello", target_language="англійська").endswith(": Hello")
+
+
+def test_record_usage_counts_cached_prompt_tokens():
+    """cached_tokens з usage — як об'єкт SDK, так і словник"""
+    assert prompts.record_usage("m", SimpleNamespace(prompt_tokens=2000, prompt_tokens_details={"cached_tokens": 1536}), 0.3) == 1536
+    details = SimpleNamespace(cached_tokens=1024)
+    assert prompts.record_usage("m", SimpleNamespace(prompt_tokens=1100, prompt_tokens_details=details), 0.2) == 1024
+    assert prompts.record_usage("m", SimpleNamespace(prompt_tokens=50), 0.1) == 0
+    assert prompts.PROMPT_TOKENS.labels("m", "hit").value == 2560
+    assert prompts.PROMPT_TOKENS.labels("m", "miss").value == 590
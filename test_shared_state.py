@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Тести для спільного між процесами стану бота (SQLite)
+"""
+import asyncio
+
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+
+from shared_state import SqliteSettingsStore, SqliteStorage
+
+
+class _Form(StatesGroup):
+    waiting = State()
+
+
+def test_sqlite_settings_are_shared_between_instances(tmp_path):
+    """Налаштування, збережені одним процесом, бачить інший"""
+    path = str(tmp_path / "state.sqlite3")
+    first, second = SqliteSettingsStore(path), SqliteSettingsStore(path)
+    assert second.get(1) is None
+    first.put(1, {"language": "uk", "notifications": True})
+    first.put(1, {"language": "en", "notifications": True})
+    assert second.get(1) == {"language": "en", "notifications": True}
+    assert len(second) == 1
+    # з event loop — те саме, але запити йдуть у потоці
+    asyncio.run(second.aput(2, {"language": "uk"}))
+    assert asyncio.run(first.aget(2)) == {"language": "uk"}
+
+
+def test_sqlite_fsm_storage_round_trip(tmp_path):
+    """Стан і дані FSM переживають перехід між сховищами над одним файлом"""
+    path = str(tmp_path / "state.sqlite3")
+    key = StorageKey(bot_id=1, chat_id=10, user_id=10)
+
+    async def scenario():
+        first, second = SqliteStorage(path), SqliteStorage(path)
+        await first.set_state(key, _Form.waiting)
+        await first.set_data(key, {"prompt": "кіт"})
+        assert await second.get_state(key) == _Form.waiting.state
+        assert await second.get_data(key) == {"prompt": "кіт"}
+        await second.set_state(key, None)
+        assert await first.get_state(key) is None
+        assert await first.get_data(key) == {"prompt": "кіт"}
+        await first.close()
+        await second.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Тести для профілювання холодного старту
+"""
+import asyncio
+import sys
+
+import pytest
+
+import startup
+
+
+@pytest.mark.parametrize("module", ["bot", "webhook_bot"])
+def test_profile_startup_reaches_ready_for_entry_points(module, capsys):
+    """--profile-startup доводить кожну точку входу до стану «готовий»"""
+    assert startup.profile_startup(module, top=3) == 0
+    output = capsys.readouterr().out
+    assert f"Профіль холодного старту: {module}" in output
+    assert "Time-to-ready" in output
+
+
+def test_concurrent_import_off_loop_waits_for_the_same_import(tmp_path, monkeypatch):
+    """Другий виклик не повертається, поки модуль ще імпортується в потоці"""
+    (tmp_path / "slow_sdk_for_test.py").write_text("import time\ntime.sleep(0.2)\nREADY = True\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    async def caller():
+        await startup.import_off_loop("slow_sdk_for_test")
+        return getattr(sys.modules["slow_sdk_for_test"], "READY", False)
+
+    async def scenario():
+        first = asyncio.create_task(caller())
+        await asyncio.sleep(0.05)  # модуль уже в sys.modules, але ще не виконаний
+        assert "slow_sdk_for_test" in sys.modules
+        return await asyncio.gather(first, caller())
+
+    try:
+        assert asyncio.run(scenario()) == [True, True]
+    finally:
+        sys.modules.pop("slow_sdk_for_test", None)
+        startup._imports.pop("slow_sdk_for_test", None)
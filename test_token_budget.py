@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Тести для адаптивного max_tokens
+"""
+from token_budget import TokenBudgets
+
+
+def test_default_until_enough_samples_then_percentile_with_margin():
+    """До min_samples — default, далі перцентиль * запас у межах [minimum, default]"""
+    budgets = TokenBudgets(default=1000, minimum=64, percentile=0.99, margin=1.2, min_samples=10)
+    for _ in range(9):
+        budgets.record("explain", 50, 100)
+    assert budgets.max_tokens("explain", 50) == 1000
+    budgets.record("explain", 50, 100)
+    assert budgets.max_tokens("explain", 50) == 120
+
+
+def test_input_length_classes_fall_back_to_command_window():
+    """Власне вікно класу довжини входу; для нового класу — вікно всієї команди"""
+    budgets = TokenBudgets(default=1000, minimum=1, margin=1.0, min_samples=3)
+    for _ in range(3):
+        budgets.record("summarize", 50, 100)
+        budgets.record("summarize", 1000, 400)
+    assert budgets.max_tokens("summarize", 50) == 100
+    assert budgets.max_tokens("summarize", 1000) == 400
+    assert budgets.max_tokens("summarize", 5000) == 400
+
+
+def test_translate_scales_with_input_and_truncation_grows_budget():
+    """Переклад: бюджет пропорційний входу; обрізані відповіді збільшують бюджет"""
+    budgets = TokenBudgets(default=4000, minimum=1, margin=1.0, min_samples=3)
+    for _ in range(3):
+        budgets.record("translate", 100, 150)
+    assert budgets.max_tokens("translate", 100) == 150
+    assert budgets.max_tokens("translate", 1000) == 1500
+    budgets.record("translate", 100, 150, truncated=True)
+    assert budgets.max_tokens("translate", 100) == 225
+    assert TokenBudgets(enabled=False, min_samples=0).max_tokens("translate", 100) == 1000
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Тести для експорту спанів трасування
+"""
+import asyncio
+import json
+
+import tracing
+from tracing import Span, SpanExporter
+
+
+def _span(name: str) -> Span:
+    return Span(name, "t" * 32, None, {})
+
+
+def test_full_buffer_is_flushed_in_background(tmp_path):
+    """Заповнений буфер скидається одразу, не чекаючи flush_interval"""
+    path = tmp_path / "traces.jsonl"
+    exporter = SpanExporter("file", str(path), "", flush_interval=3600, max_buffer=3)
+
+    async def scenario():
+        for index in range(3):
+            exporter.add(_span(f"s{index}"))
+        await exporter._flushing
+
+    asyncio.run(scenario())
+    assert [json.loads(line)["name"] for line in path.read_text().splitlines()] == ["s0", "s1", "s2"]
+    assert exporter.dropped == 0
+
+
+def test_spans_over_full_buffer_are_dropped_and_counted(tmp_path):
+    """Поки скидання триває, спани понад max_buffer відкидаються і потрапляють у метрику"""
+    exporter = SpanExporter("file", str(tmp_path / "traces.jsonl"), "", flush_interval=3600, max_buffer=2)
+    before = tracing.SPANS_DROPPED.labels().value
+
+    for index in range(3):  # поза event loop фонового скидання немає
+        exporter.add(_span(f"s{index}"))
+    assert exporter.dropped == 1
+    assert tracing.SPANS_DROPPED.labels().value == before + 1
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Тести для пам'яті перекладів /translate
+"""
+import asyncio
+
+import pytest
+
+from translation_memory import (
+    BatchFormatError, MemoryTranslationStore, SqliteTranslationStore, TranslationMemory, format_batch, parse_batch,
+    segment,
+)
+
+
+def _translator(calls):
+    async def translate(segments):
+        calls.append(list(segments))
+        return [f"<{text}>" for text in segments]
+    return translate
+
+
+def test_segmentation_preserves_separators():
+    """Речення і рядки ділимо без втрати пробілів; скорочення перед малою літерою не ріжуть речення"""
+    text = "Hello world. How are you?\n\nSee p. 5 and e.g. this!  Bye"
+    segments, separators = segment(text)
+    assert segments == ["Hello world.", "How are you?", "See p. 5 and e.g. this!", "Bye"]
+    assert "".join(s + sep for s, sep in zip(segments, separators + [""])) == text
+
+
+def test_only_missing_segments_are_sent_in_one_batch():
+    """Повторені речення беруться з пам'яті, решта — одним викликом, результат у вихідному порядку"""
+    memory = TranslationMemory(MemoryTranslationStore())
+    calls = []
+    first = asyncio.run(memory.translate("Sale today. Shop is open.\n42", "uk", _translator(calls)))
+    assert first == "<Sale today.> <Shop is open.>\n42"
+    second = asyncio.run(memory.translate("Sale  today. Shop is open. Sale today. New item!", "uk", _translator(calls)))
+    assert second == "<Sale today.> <Shop is open.> <Sale today.> <New item!>"
+    assert calls == [["Sale today.", "Shop is open."], ["New item!"]]
+    # інша цільова мова — окремі переклади
+    asyncio.run(memory.translate("Sale today.", "de", _translator(calls)))
+    assert calls[-1] == ["Sale today."]
+
+
+def test_fuzzy_matches_ignore_case_and_punctuation():
+    """Майже точний збіг — лише з fuzzy=True"""
+    store = MemoryTranslationStore()
+    exact = TranslationMemory(store)
+    fuzzy = TranslationMemory(store, fuzzy=True)
+    asyncio.run(exact.remember("uk", [("Shop is open!", "Магазин відчинено!")]))
+    assert asyncio.run(exact.lookup("uk", ["shop is open"])) == [None]
+    assert asyncio.run(fuzzy.lookup("uk", ["shop is open", "Shop  is open!"])) == ["Магазин відчинено!"] * 2
+
+
+def test_memory_store_is_bounded_and_sqlite_round_trip(tmp_path):
+    """Пам'ять процесу витісняє найдавніші; SQLite спільний для процесів"""
+    store = MemoryTranslationStore(size=2)
+    for index in range(3):
+        store.put("uk", f"s{index}", f"s{index}", f"t{index}")
+    assert store.get("uk", "s0", "s0") is None and store.get("uk", "s2") == "t2"
+    path = str(tmp_path / "state.sqlite3")
+    asyncio.run(SqliteTranslationStore(path).put_many("uk", [("Hello.", "hello", "Привіт.")]))
+    found = asyncio.run(SqliteTranslationStore(path).get_many("uk", [("Hello.", None), ("HELLO", "hello"), ("Bye", None)]))
+    assert found == ["Привіт.", "Привіт.", None]
+
+
+def test_batch_format_round_trip():
+    """Нумеровані рядки пакета; неповна відповідь — BatchFormatError"""
+    assert format_batch(["a", "b"]) == "[1] a\n[2] b"
+    assert parse_batch("[1] перше\n[2]  друге \n", 2) == ["перше", "друге"]
+    with pytest.raises(BatchFormatError):
+        parse_batch("[1] перше", 2)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Тести для придушення дублікатів апдейтів
+"""
+import asyncio
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from loadtest.scenarios import message_update
+from update_dedup import DUPLICATE_UPDATES, DedupMiddleware, SeenSet, UpdateDeduplicator
+
+
+def test_seen_set_ttl_and_size_bounds():
+    """update_id забувається після TTL, а при переповненні витісняються найстаріші"""
+    now = [0.0]
+    seen = SeenSet(ttl=10, max_size=2, clock=lambda: now[0])
+    assert seen.add(1) and not seen.add(1)
+    now[0] = 11.0
+    assert seen.add(1), "після TTL той самий id знову вважається новим"
+    assert seen.add(2) and seen.add(3)
+    assert len(seen) == 2 and seen.add(1), "найстаріший id витіснено при переповненні"
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    """Два процеси (два дедуплікатори над одним файлом) бачать id один одного"""
+    path = str(tmp_path / "dedup.sqlite3")
+
+    async def scenario():
+        first = UpdateDeduplicator(backend="sqlite", sqlite_path=path)
+        second = UpdateDeduplicator(backend="sqlite", sqlite_path=path)
+        assert await first.seen_first(100)
+        assert not await second.seen_first(100)
+        assert await second.seen_first(101)
+
+    asyncio.run(scenario())
+
+
+def test_middleware_drops_redelivered_update():
+    """Повторна доставка того самого update_id не доходить до хендлера і рахується в метриці"""
+
+    async def scenario():
+        calls = []
+        dp = Dispatcher()
+        dp.update.outer_middleware(DedupMiddleware(UpdateDeduplicator(backend="memory")))
+
+        @dp.message()
+        async def handler(message):
+            calls.append(message.message_id)
+
+        update = Update.model_validate(message_update(1, "/image кіт"))
+        bot = Bot("123:abc")
+        before = DUPLICATE_UPDATES.labels("message").value
+        await dp.feed_update(bot, update)
+        await dp.feed_update(bot, update)
+        assert len(calls) == 1
+        assert DUPLICATE_UPDATES.labels("message").value == before + 1
+
+    asyncio.run(scenario())
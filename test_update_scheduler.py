@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Тести для планувальника апдейтів зі смугами чатів
+"""
+import asyncio
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from loadtest.scenarios import callback_update, message_update
+from update_scheduler import UpdateScheduler, chat_key
+
+
+def test_chat_key_for_raw_and_parsed_updates():
+    """Ключ смуги однаковий для сирого та розібраного апдейту; без чату — унікальний"""
+    message = message_update(11, "/start")
+    callback = callback_update(12, "settings")
+    assert chat_key(message) == chat_key(Update.model_validate(message)) == 11
+    assert chat_key(callback) == chat_key(Update.model_validate(callback)) == 12
+    assert chat_key({"update_id": 5, "poll": {"id": "p"}}) == ("update", 5)
+
+
+def test_order_within_chat_and_parallel_across_chats():
+    """Апдейти одного чату йдуть строго по черзі, інший чат не чекає на повільний"""
+
+    async def scenario():
+        finished = []
+        active = {}
+        max_active = {}
+        dp = Dispatcher()
+
+        @dp.message()
+        async def handler(message):
+            chat = message.chat.id
+            active[chat] = active.get(chat, 0) + 1
+            max_active[chat] = max(max_active.get(chat, 0), active[chat])
+            await asyncio.sleep(0.1 if message.text == "slow" else 0)
+            active[chat] -= 1
+            finished.append((chat, message.text))
+
+        scheduler = UpdateScheduler(dp, Bot("123:abc"), workers=4, max_pending=10)
+        scheduler.start()
+        assert scheduler.offer(message_update(1, "slow"))
+        await scheduler.put(Update.model_validate(message_update(1, "fast")))
+        assert scheduler.offer(message_update(2, "fast"))
+        await scheduler.join()
+        await scheduler.close()
+
+        assert finished == [(2, "fast"), (1, "slow"), (1, "fast")]
+        assert max_active == {1: 1, 2: 1}
+
+    asyncio.run(scenario())
+
+
+def test_offer_respects_max_pending():
+    """offer відмовляє, коли черга заповнена (воркери не запущені)"""
+
+    async def scenario():
+        scheduler = UpdateScheduler(Dispatcher(), Bot("123:abc"), workers=1, max_pending=2)
+        assert scheduler.offer(message_update(1, "a"))
+        assert scheduler.offer(message_update(2, "b"))
+        assert not scheduler.offer(message_update(3, "c"))
+        assert scheduler.pending == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Тести для webhook-обробника з обмеженою чергою
+"""
+import asyncio
+
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from webhook_queue import QueuedRequestHandler
+
+
+def _update(update_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": 0, "text": "hi",
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "T"},
+        },
+    }
+
+
+def test_queue_acks_immediately_and_sheds_when_full():
+    """Webhook відповідає одразу, при повній черзі повертає 503, а при зупинці дообробляє чергу"""
+
+    async def scenario():
+        release = asyncio.Event()
+        handled = []
+        dp = Dispatcher()
+
+        @dp.message()
+        async def slow_handler(message):
+            await release.wait()
+            handled.append(message.message_id)
+
+        handler = QueuedRequestHandler(dp, Bot("123:abc"), queue_size=1, workers=1, drain_timeout=5)
+        app = web.Application()
+        handler.register(app, path="/webhook")
+
+        async with TestClient(TestServer(app)) as client:
+            first = await client.post("/webhook", json=_update(1))
+            await asyncio.sleep(0.05)  # воркер забрав перший апдейт і висить у хендлері
+            second = await client.post("/webhook", json=_update(2))
+            third = await client.post("/webhook", json=_update(3))
+            invalid = await client.post("/webhook", data=b"not json")
+
+            assert first.status == 200 and second.status == 200
+            assert third.status == 503 and third.headers["Retry-After"] == "1"
+            assert invalid.status == 400
+            assert handled == []
+
+            release.set()
+        # TestClient закриває застосунок → close() дообробив чергу
+        assert handled == [1, 2]
+
+    asyncio.run(scenario())
@@ -0,0 +1,136 @@
+"""
+Адаптивний max_tokens для кожної команди замість єдиного OPENAI_MAX_TOKENS.
+
+Бюджет відповіді вчиться на фактичних довжинах (usage.completion_tokens):
+для кожної команди і класу довжини входу зберігається ковзне вікно
+останніх TOKEN_BUDGET_WINDOW відповідей, а бюджет = перцентиль
+TOKEN_BUDGET_PERCENTILE * TOKEN_BUDGET_MARGIN. Для команд, де відповідь
+пропорційна входу (переклад), вікно зберігає відношення вихід/вхід, і
+бюджет масштабується довжиною конкретного запиту.
+
+Поки даних менше за TOKEN_BUDGET_MIN_SAMPLES — використовується OPENAI_MAX_TOKENS.
+Обрізана відповідь (finish_reason=length) записується з запасом, тож
+бюджет, що виявився замалим, зростає. Той самий бюджет — резерв токенів
+для обліку лімітів швидкості (TPM).
+"""
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+import metrics
+from config import (
+    OPENAI_MAX_TOKENS, TOKEN_BUDGET_ENABLED, TOKEN_BUDGET_MARGIN, TOKEN_BUDGET_MIN, TOKEN_BUDGET_MIN_SAMPLES,
+    TOKEN_BUDGET_PERCENTILE, TOKEN_BUDGET_WINDOW,
+)
+
+logger = logging.getLogger(__name__)
+
+COMPLETION_TOKENS = metrics.REGISTRY.histogram(
+    "bot_completion_tokens", "Фактична довжина відповідей моделі, токени", ("task",),
+    buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096),
+)
+TOKEN_BUDGET = metrics.REGISTRY.histogram(
+    "bot_token_budget", "Призначений max_tokens на запит", ("task",),
+    buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096),
+)
+TRUNCATED = metrics.REGISTRY.counter(
+    "bot_completion_truncated_total", "Відповіді, обрізані по max_tokens (finish_reason=length)", ("task",),
+)
+
+# Відповідь пропорційна входу
+SCALED_TASKS = frozenset({"translate"})
+# Межі класів довжини входу, токени
+INPUT_CLASSES = (100, 500, 2000)
+_TRUNCATED_BOOST = 1.5
+
+
+def input_class(prompt_tokens: int) -> int:
+    """Індекс класу довжини входу (0 — найкоротші)"""
+    for index, limit in enumerate(INPUT_CLASSES):
+        if prompt_tokens < limit:
+            return index
+    return len(INPUT_CLASSES)
+
+
+def _percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class TokenBudgets:
+    """
+    Args:
+        default: max_tokens, поки немає даних (і верхня межа бюджету)
+        minimum: Нижня межа бюджету
+        percentile: Перцентиль довжин відповідей (0.99 — p99)
+        margin: Множник запасу над перцентилем
+        window: Скільки останніх відповідей пам'ятати на ключ
+        min_samples: Мінімум відповідей, щоб довіряти вікну
+        enabled: False — завжди default (довжини все одно збираються в метрики)
+    """
+
+    def __init__(self, default: int = 1000, minimum: int = 64, percentile: float = 0.99,
+                 margin: float = 1.2, window: int = 500, min_samples: int = 20, enabled: bool = True):
+        self.default = default
+        self.minimum = minimum
+        self.percentile = percentile
+        self.margin = margin
+        self.window = window
+        self.min_samples = min_samples
+        self.enabled = enabled
+        self._samples: Dict[Tuple[str, Optional[int]], Deque[float]] = {}
+
+    def _keys(self, task: str, prompt_tokens: int):
+        # пропорційні команди — одне вікно відношень; інші — спершу свій клас довжини, потім уся команда
+        if task in SCALED_TASKS:
+            return ((task, None),)
+        return (task, input_class(prompt_tokens)), (task, None)
+
+    def max_tokens(self, task: str, prompt_tokens: int) -> int:
+        """Бюджет відповіді для запиту з prompt_tokens вхідних токенів"""
+        budget = self.default
+        for key in self._keys(task, prompt_tokens) if self.enabled else ():
+            samples = self._samples.get(key)
+            if samples is not None and len(samples) >= self.min_samples:
+                value = _percentile(samples, self.percentile) * self.margin
+                if task in SCALED_TASKS:
+                    value *= prompt_tokens
+                budget = int(min(self.default, max(self.minimum, value)))
+                break
+        TOKEN_BUDGET.labels(task).observe(budget)
+        return budget
+
+    def record(self, task: str, prompt_tokens: int, completion_tokens: int, truncated: bool = False) -> None:
+        """Фактична довжина відповіді; truncated — модель уперлась у max_tokens"""
+        COMPLETION_TOKENS.labels(task).observe(completion_tokens)
+        value = float(completion_tokens)
+        if truncated:
+            TRUNCATED.labels(task).inc()
+            value *= _TRUNCATED_BOOST
+        if task in SCALED_TASKS:
+            value /= max(1, prompt_tokens)
+        for key in self._keys(task, prompt_tokens):
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(value)
+
+
+_token_budgets: Optional[TokenBudgets] = None
+
+
+def get_token_budgets() -> TokenBudgets:
+    """Отримати глобальний екземпляр бюджетів відповіді"""
+    global _token_budgets
+    if _token_budgets is None:
+        _token_budgets = TokenBudgets(
+            default=OPENAI_MAX_TOKENS,
+            minimum=TOKEN_BUDGET_MIN,
+            percentile=TOKEN_BUDGET_PERCENTILE,
+            margin=TOKEN_BUDGET_MARGIN,
+            window=TOKEN_BUDGET_WINDOW,
+            min_samples=TOKEN_BUDGET_MIN_SAMPLES,
+            enabled=TOKEN_BUDGET_ENABLED,
+        )
+    return _token_budgets
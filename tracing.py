@@ -0,0 +1,260 @@
+"""
+Легке трасування апдейтів: trace id на кожен апдейт Telegram і спани навколо
+викликів OpenAI, декодування, відправки в Telegram та кожної спроби ретраю.
+
+Контекст тримається в contextvars, тому фонові задачі (asyncio.create_task)
+автоматично успадковують трасу апдейту. Якщо апдейт не потрапив у вибірку,
+span() повертає спільний no-op об'єкт — накладні витрати зводяться до
+читання contextvar.
+
+Експорт:
+  - file — JSON lines у TRACE_FILE_PATH
+  - otlp — OTLP/HTTP JSON на TRACE_OTLP_ENDPOINT (колектор або його заглушка)
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+import metrics
+from config import TRACE_EXPORT, TRACE_FILE_PATH, TRACE_OTLP_ENDPOINT, TRACE_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+SPANS_DROPPED = metrics.REGISTRY.counter(
+    "bot_trace_spans_dropped_total", "Спани, відкинуті через переповнений буфер експорту",
+)
+
+SERVICE_NAME = "content-creator-bot"
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def _new_id(n_bytes: int) -> str:
+    return os.urandom(n_bytes).hex()
+
+
+class Span:
+    """Один спан траси"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status", "_token")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.start_ns = 0
+        self.end_ns = 0
+        self.attributes = attributes
+        self.status = "ok"
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = time.time_ns()
+        if exc_type is not None and not issubclass(exc_type, asyncio.CancelledError):
+            self.status = "error"
+            self.attributes["error.type"] = exc_type.__name__
+            self.attributes["error.message"] = str(exc)[:200]
+        _current_span.reset(self._token)
+        _exporter.add(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Спан поза вибіркою — нічого не записує"""
+
+    __slots__ = ()
+    trace_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def start_trace(name: str, **attributes: Any):
+    """
+    Кореневий спан нової траси (з урахуванням TRACE_SAMPLE_RATE).
+
+    Returns:
+        Span або NOOP_SPAN, якщо траса не потрапила у вибірку
+    """
+    if TRACE_SAMPLE_RATE <= 0 or random.random() >= TRACE_SAMPLE_RATE:
+        return NOOP_SPAN
+    return Span(name, _new_id(16), None, attributes)
+
+
+def span(name: str, **attributes: Any):
+    """Дочірній спан поточної траси; поза трасою — no-op"""
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(name, parent.trace_id, parent.span_id, attributes)
+
+
+def current_trace_id() -> Optional[str]:
+    """Trace id поточного контексту (None, якщо трасування немає)"""
+    current = _current_span.get()
+    return current.trace_id if current is not None else None
+
+
+# ---------- Експорт ----------
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: List[Span]) -> Dict[str, Any]:
+    """Перетворює спани у тіло запиту OTLP/HTTP JSON (/v1/traces)"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": "tracing"},
+                "spans": [
+                    {
+                        "traceId": s.trace_id,
+                        "spanId": s.span_id,
+                        "parentSpanId": s.parent_id or "",
+                        "name": s.name,
+                        "kind": 1,
+                        "startTimeUnixNano": str(s.start_ns),
+                        "endTimeUnixNano": str(s.end_ns),
+                        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                        "status": {"code": 2 if s.status == "error" else 1},
+                    }
+                    for s in spans
+                ],
+            }],
+        }]
+    }
+
+
+class SpanExporter:
+    """
+    Буферизований експортер: спани накопичуються в пам'яті та скидаються
+    пачками раз на flush_interval секунд, а коли буфер заповнився — одразу,
+    фоновою задачею. Якщо буфер заповнився знову, поки скидання ще триває,
+    нові спани відкидаються (bot_trace_spans_dropped_total).
+    """
+
+    def __init__(self, mode: str, file_path: str, otlp_endpoint: str,
+                 flush_interval: float = 5.0, max_buffer: int = 2048):
+        self.mode = mode
+        self.file_path = file_path
+        self.otlp_endpoint = otlp_endpoint
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self._buffer: List[Span] = []
+        self._task: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Task] = None
+
+    def add(self, finished: Span) -> None:
+        if len(self._buffer) >= self.max_buffer:
+            # не даємо трасуванню з'їсти пам'ять, якщо експорт не встигає
+            self.dropped += 1
+            SPANS_DROPPED.inc()
+            return
+        self._buffer.append(finished)
+        if len(self._buffer) >= self.max_buffer:
+            self._flush_soon()
+
+    def _flush_soon(self) -> None:
+        """Скидання заповненого буфера у фоні, без очікування"""
+        if self._flushing is not None and not self._flushing.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # поза event loop буфер скине фоновий цикл
+        self._flushing = loop.create_task(self.flush())
+
+    def start(self) -> None:
+        """Запускає фонове скидання (викликати з запущеного event loop)"""
+        if self._task is None and TRACE_SAMPLE_RATE > 0:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        try:
+            if self.mode == "otlp":
+                await self._export_otlp(batch)
+            else:
+                await asyncio.to_thread(self._export_file, batch)
+        except Exception as e:
+            logger.warning("Не вдалося експортувати %d спанів: %s", len(batch), e)
+
+    def _export_file(self, batch: List[Span]) -> None:
+        with open(self.file_path, "a", encoding="utf-8") as f:
+            for finished in batch:
+                f.write(json.dumps(finished.to_dict(), ensure_ascii=False, default=str))
+                f.write("\n")
+
+    async def _export_otlp(self, batch: List[Span]) -> None:
+        import aiohttp
+
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+            async with session.post(self.otlp_endpoint, json=to_otlp(batch)) as resp:
+                if resp.status >= 400:
+                    logger.warning("OTLP колектор відповів %s", resp.status)
+
+    async def shutdown(self) -> None:
+        """Зупиняє фонове скидання і експортує залишок"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+
+_exporter = SpanExporter(TRACE_EXPORT, TRACE_FILE_PATH, TRACE_OTLP_ENDPOINT)
+
+
+def get_exporter() -> SpanExporter:
+    """Експортер спанів процесу"""
+    return _exporter
@@ -0,0 +1,215 @@
+"""
+Пам'ять перекладів для /translate: повторні речення не надсилаються моделі.
+
+Текст ділиться на сегменти (речення і рядки; роздільники зберігаються як є).
+Кожен сегмент шукається в локальному індексі за цільовою мовою і
+нормалізованим текстом (пробіли згорнуто); мова оригіналу визначається
+самим текстом сегмента. З TRANSLATION_MEMORY_FUZZY ще й майже точний збіг:
+без урахування регістру і розділових знаків. Відсутні сегменти (без
+повторів) ідуть моделі одним запитом з нумерованими рядками, переклади
+зберігаються в індексі, а результат складається назад у вихідному порядку.
+Сегменти без літер (числа, емодзі, посилання) не перекладаються.
+
+Індекс — як і решта стану (shared_state): STATE_BACKEND=memory (LRU на
+TRANSLATION_MEMORY_SIZE сегментів) або sqlite у спільному файлі; з SQLite
+усі сегменти тексту читаються (і записуються) одним викликом у потоці.
+"""
+import re
+from collections import OrderedDict
+from itertools import zip_longest
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import metrics
+from config import (
+    STATE_BACKEND, STATE_SQLITE_PATH, TRANSLATION_MEMORY_ENABLED, TRANSLATION_MEMORY_FUZZY, TRANSLATION_MEMORY_SIZE,
+)
+from shared_state import SqliteExecutor
+
+SEGMENTS = metrics.REGISTRY.counter(
+    "bot_translation_memory_segments_total", "Сегменти /translate: з пам'яті перекладів (hit) чи від моделі (miss)",
+    ("result",),
+)
+
+# межа речення: кінцевий знак і пробіл перед великою літерою чи лапками, або перенос рядка
+_BOUNDARY = re.compile(r"((?<=[.!?…])[ \t]+(?=[A-ZА-ЯІЇЄҐ\"«“(])|[ \t]*\n\s*)")
+_LETTER = re.compile(r"[^\W\d_]")
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_BATCH_LINE = re.compile(r"^\s*\[(\d+)\]\s?(.*)$")
+
+
+class BatchFormatError(ValueError):
+    """Модель не дотрималась формату нумерованих рядків"""
+
+
+def segment(text: str) -> Tuple[List[str], List[str]]:
+    """(сегменти, роздільники між ними); "".join почергово відновлює текст"""
+    parts = _BOUNDARY.split(text)
+    return parts[0::2], parts[1::2]
+
+
+def exact_key(segment_text: str) -> str:
+    return " ".join(segment_text.split())
+
+
+def fuzzy_key(segment_text: str) -> str:
+    return " ".join(_PUNCTUATION.sub(" ", segment_text.casefold()).split())
+
+
+def format_batch(segments: List[str]) -> str:
+    return "\n".join(f"[{index}] {text}" for index, text in enumerate(segments, 1))
+
+
+def parse_batch(text: str, count: int) -> List[str]:
+    """Відповідь "[1] ...\\n[2] ..." у список перекладів; BatchFormatError — якщо чогось бракує"""
+    translations: Dict[int, str] = {}
+    for line in text.splitlines():
+        match = _BATCH_LINE.match(line)
+        if match:
+            translations[int(match.group(1))] = match.group(2).strip()
+    if sorted(translations) != list(range(1, count + 1)):
+        raise BatchFormatError(f"Очікувалось {count} перекладів, отримано {len(translations)}")
+    return [translations[index] for index in range(1, count + 1)]
+
+
+class MemoryTranslationStore:
+    """Переклади у словнику процесу, найдавніше використані витісняються"""
+
+    def __init__(self, size: int = 10000):
+        self.size = size
+        self._exact: "OrderedDict[Tuple[str, str], Tuple[str, str]]" = OrderedDict()  # → (переклад, fuzzy-ключ)
+        self._fuzzy: Dict[Tuple[str, str], str] = {}  # fuzzy-ключ → exact-ключ
+
+    def get(self, target: str, exact: str, fuzzy: Optional[str] = None) -> Optional[str]:
+        key = (target, exact)
+        if key not in self._exact and fuzzy is not None:
+            key = (target, self._fuzzy.get((target, fuzzy), ""))
+        entry = self._exact.get(key)
+        if entry is None:
+            return None
+        self._exact.move_to_end(key)
+        return entry[0]
+
+    def put(self, target: str, exact: str, fuzzy: str, translation: str) -> None:
+        self._exact[(target, exact)] = (translation, fuzzy)
+        self._exact.move_to_end((target, exact))
+        self._fuzzy[(target, fuzzy)] = exact
+        while len(self._exact) > self.size:
+            (old_target, old_exact), (_, old_fuzzy) = self._exact.popitem(last=False)
+            if self._fuzzy.get((old_target, old_fuzzy)) == old_exact:
+                del self._fuzzy[(old_target, old_fuzzy)]
+
+    async def get_many(self, target: str, keys: List[Tuple[str, Optional[str]]]) -> List[Optional[str]]:
+        return [self.get(target, exact, fuzzy) for exact, fuzzy in keys]
+
+    async def put_many(self, target: str, rows: List[Tuple[str, str, str]]) -> None:
+        for exact, fuzzy, translation in rows:
+            self.put(target, exact, fuzzy, translation)
+
+
+class SqliteTranslationStore:
+    """Переклади у спільній таблиці SQLite; з event loop — get_many/put_many (у потоці)"""
+
+    def __init__(self, path: str):
+        self._db = SqliteExecutor(path)
+        self._conn = self._db.conn
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translation_memory "
+            "(target TEXT NOT NULL, exact TEXT NOT NULL, fuzzy TEXT NOT NULL, translation TEXT NOT NULL, "
+            "PRIMARY KEY (target, exact))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS translation_memory_fuzzy ON translation_memory (target, fuzzy)")
+
+    def get(self, target: str, exact: str, fuzzy: Optional[str] = None) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT translation FROM translation_memory WHERE target = ? AND exact = ?", (target, exact),
+        ).fetchone()
+        if row is None and fuzzy is not None:
+            row = self._conn.execute(
+                "SELECT translation FROM translation_memory WHERE target = ? AND fuzzy = ? LIMIT 1", (target, fuzzy),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, target: str, exact: str, fuzzy: str, translation: str) -> None:
+        self._conn.execute(
+            "INSERT INTO translation_memory (target, exact, fuzzy, translation) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(target, exact) DO UPDATE SET fuzzy = excluded.fuzzy, translation = excluded.translation",
+            (target, exact, fuzzy, translation),
+        )
+
+    async def get_many(self, target: str, keys: List[Tuple[str, Optional[str]]]) -> List[Optional[str]]:
+        return await self._db.run(lambda: [self.get(target, exact, fuzzy) for exact, fuzzy in keys])
+
+    async def put_many(self, target: str, rows: List[Tuple[str, str, str]]) -> None:
+        def put_rows() -> None:
+            for exact, fuzzy, translation in rows:
+                self.put(target, exact, fuzzy, translation)
+
+        await self._db.run(put_rows)
+
+
+def create_translation_store(backend: str = STATE_BACKEND, path: str = STATE_SQLITE_PATH,
+                             size: int = TRANSLATION_MEMORY_SIZE):
+    return SqliteTranslationStore(path) if backend == "sqlite" else MemoryTranslationStore(size)
+
+
+# відсутні сегменти -> їхні переклади в тому ж порядку
+Translator = Callable[[List[str]], Awaitable[List[str]]]
+
+
+class TranslationMemory:
+    """
+    Args:
+        store: Індекс перекладів (get_many/put_many)
+        fuzzy: Шукати також майже точні збіги (регістр і розділові знаки не враховуються)
+    """
+
+    def __init__(self, store, fuzzy: bool = False):
+        self.store = store
+        self.fuzzy = fuzzy
+
+    async def lookup(self, target: str, segments: List[str]) -> List[Optional[str]]:
+        """Переклади сегментів з пам'яті (None — немає) одним зверненням до індексу"""
+        return await self.store.get_many(
+            target, [(exact_key(text), fuzzy_key(text) if self.fuzzy else None) for text in segments],
+        )
+
+    async def remember(self, target: str, pairs: List[Tuple[str, str]]) -> None:
+        await self.store.put_many(
+            target, [(exact_key(text), fuzzy_key(text), translation) for text, translation in pairs],
+        )
+
+    async def translate(self, text: str, target: str, translator: Translator) -> str:
+        """Переклад тексту: сегменти з пам'яті, решта — одним викликом translator"""
+        segments, separators = segment(text)
+        result = list(segments)
+        indexes = [index for index, segment_text in enumerate(segments) if _LETTER.search(segment_text)]
+        cached = await self.lookup(target, [segments[index] for index in indexes])
+        missing: Dict[str, List[int]] = {}
+        for index, translation in zip(indexes, cached):
+            if translation is not None:
+                result[index] = translation
+                SEGMENTS.labels("hit").inc()
+            else:
+                missing.setdefault(segments[index].strip(), []).append(index)
+        if missing:
+            sources = list(missing)
+            translations = await translator(sources)
+            if len(translations) != len(sources):
+                raise BatchFormatError(f"Очікувалось {len(sources)} перекладів, отримано {len(translations)}")
+            SEGMENTS.labels("miss").inc(len(sources))
+            await self.remember(target, list(zip(sources, translations)))
+            for source, translation in zip(sources, translations):
+                for index in missing[source]:
+                    result[index] = translation
+        return "".join(part + separator for part, separator in zip_longest(result, separators, fillvalue=""))
+
+
+_translation_memory: Optional[TranslationMemory] = None
+
+
+def get_translation_memory() -> Optional[TranslationMemory]:
+    """Отримати глобальну пам'ять перекладів (None — вимкнено TRANSLATION_MEMORY_ENABLED)"""
+    global _translation_memory
+    if _translation_memory is None and TRANSLATION_MEMORY_ENABLED:
+        _translation_memory = TranslationMemory(create_translation_store(), fuzzy=TRANSLATION_MEMORY_FUZZY)
+    return _translation_memory
@@ -0,0 +1,149 @@
+"""
+Придушення дублікатів апдейтів за update_id.
+
+Коли webhook відповідає повільно або з помилкою, Telegram доставляє той самий
+апдейт повторно — і без захисту другий /image коштує реальних грошей.
+DedupMiddleware стоїть першим outer-middleware диспетчера і відкидає апдейт,
+якщо його update_id вже бачили, ще до трасування, метрик і хендлерів.
+
+Бекенди "вже бачених" id:
+  - memory — обмежений за часом (DEDUP_TTL) і розміром (DEDUP_MAX_SIZE)
+    набір у пам'яті процесу
+  - sqlite — спільна таблиця для кількох процесів на одній машині
+    (атомарний INSERT OR IGNORE), застарілі записи періодично чистяться
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject, Update
+
+import metrics
+from config import DEDUP_BACKEND, DEDUP_MAX_SIZE, DEDUP_SQLITE_PATH, DEDUP_TTL
+from shared_state import connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_UPDATES = metrics.REGISTRY.counter(
+    "bot_duplicate_updates_total", "Повторно доставлені апдейти, відкинуті до обробки", ("event_type",),
+)
+DEDUP_SEEN = metrics.REGISTRY.gauge(
+    "bot_dedup_seen_updates", "Кількість update_id у наборі вже бачених (бекенд memory)",
+)
+
+
+class SeenSet:
+    """
+    Набір update_id з обмеженням за часом життя і розміром.
+    Записи впорядковані за часом додавання, тож прострочені та найстаріші
+    видаляються з початку за O(1).
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_size: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clock = clock
+        self._seen: "OrderedDict[int, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def _evict(self, now: float) -> None:
+        while self._seen:
+            update_id, expires_at = next(iter(self._seen.items()))
+            if expires_at > now:
+                break
+            del self._seen[update_id]
+
+    def add(self, update_id: int) -> bool:
+        """Повертає True, якщо update_id новий (і запам'ятовує його)"""
+        now = self._clock()
+        self._evict(now)
+        if update_id in self._seen:
+            return False
+        self._seen[update_id] = now + self.ttl
+        if len(self._seen) > self.max_size:
+            self._seen.popitem(last=False)
+        return True
+
+
+class SqliteSeenStore:
+    """
+    Спільний між процесами набір update_id у SQLite (WAL).
+    Перевірка і запис — один атомарний INSERT OR IGNORE.
+    """
+
+    _PURGE_EVERY = 1000
+
+    def __init__(self, path: str, ttl: float = 3600.0):
+        self.path = path
+        self.ttl = ttl
+        self._conn = connect_sqlite(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_updates (update_id INTEGER PRIMARY KEY, seen_at REAL NOT NULL)"
+        )
+        self._inserts = 0
+
+    def add(self, update_id: int) -> bool:
+        now = time.time()
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO seen_updates (update_id, seen_at) VALUES (?, ?)", (update_id, now)
+        )
+        self._inserts += 1
+        if self._inserts % self._PURGE_EVERY == 0:
+            self._conn.execute("DELETE FROM seen_updates WHERE seen_at < ?", (now - self.ttl,))
+        return cursor.rowcount == 1
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class UpdateDeduplicator:
+    """Спільний інтерфейс над бекендами: async seen_first(update_id)"""
+
+    def __init__(self, backend: str = DEDUP_BACKEND, ttl: float = DEDUP_TTL, max_size: int = DEDUP_MAX_SIZE,
+                 sqlite_path: str = DEDUP_SQLITE_PATH):
+        self.backend = backend
+        self._memory: Optional[SeenSet] = None
+        self._sqlite: Optional[SqliteSeenStore] = None
+        if backend == "sqlite":
+            self._sqlite = SqliteSeenStore(sqlite_path, ttl)
+            self._lock = asyncio.Lock()
+        else:
+            self._memory = SeenSet(ttl, max_size)
+            DEDUP_SEEN.set_function(lambda: len(self._memory))
+
+    async def seen_first(self, update_id: int) -> bool:
+        """True — апдейт бачимо вперше і його треба обробити"""
+        if self._memory is not None:
+            return self._memory.add(update_id)
+        # одне з'єднання на процес: запити серіалізуються, а сам запис іде в потоці
+        async with self._lock:
+            return await asyncio.to_thread(self._sqlite.add, update_id)
+
+
+class DedupMiddleware(BaseMiddleware):
+    """Outer-middleware на рівні Update: відкидає повторно доставлені апдейти"""
+
+    def __init__(self, deduplicator: UpdateDeduplicator):
+        self.deduplicator = deduplicator
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not await self.deduplicator.seen_first(event.update_id):
+            DUPLICATE_UPDATES.labels(event.event_type).inc()
+            logger.info("Дублікат апдейту %s (%s) відкинуто", event.update_id, event.event_type)
+            return None
+        return await handler(event, data)
+
+
+def setup_dedup_middleware(dp: Dispatcher) -> None:
+    """Підключає придушення дублікатів; викликати ДО інших outer-middleware"""
+    dp.update.outer_middleware(DedupMiddleware(UpdateDeduplicator()))
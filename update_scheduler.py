@@ -0,0 +1,205 @@
+"""
+Планувальник апдейтів: строгий порядок у межах чату, паралельність між чатами.
+
+Кожен чат має власну "смугу" (lane) — FIFO його апдейтів. Ключ смуги, що
+має роботу, стоїть у спільній черзі готових смуг; воркер бере ключ, обробляє
+ОДИН апдейт і, якщо в смузі ще щось є, ставить ключ у кінець черги. Тому:
+  - апдейти одного чату ніколи не обробляються одночасно і не обганяють
+    один одного (callback → текст у waiting_for_image_prompt не гониться);
+  - різні чати обробляються паралельно, не більше `workers` одночасно;
+  - чати чергуються round-robin, і довга серія апдейтів одного чату
+    не блокує інших.
+
+Апдейти без чату (inline-запити тощо) отримують власну одноразову смугу.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple, Union
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+
+import metrics
+from overload import get_overload_controller
+
+logger = logging.getLogger(__name__)
+
+UPDATE_QUEUE_WAIT = metrics.REGISTRY.histogram(
+    "bot_update_queue_wait_seconds", "Час очікування апдейту в смузі чату до початку обробки", ("source",),
+)
+UPDATE_LANES = metrics.REGISTRY.gauge(
+    "bot_update_lanes", "Кількість чатів з апдейтами в обробці або в очікуванні", ("source",),
+)
+
+RawOrParsedUpdate = Union[Update, Dict[str, Any]]
+
+
+def _chat_key_from_event(event: Any) -> Optional[Hashable]:
+    chat = getattr(event, "chat", None)
+    if chat is None:
+        message = getattr(event, "message", None)
+        chat = getattr(message, "chat", None)
+    if chat is not None:
+        return chat.id
+    user = getattr(event, "from_user", None) or getattr(event, "user", None)
+    return user.id if user is not None else None
+
+
+def _chat_key_from_raw(update: Dict[str, Any]) -> Optional[Hashable]:
+    for field, event in update.items():
+        if field == "update_id" or not isinstance(event, dict):
+            continue
+        chat = event.get("chat") or (event.get("message") or {}).get("chat")
+        if chat is not None:
+            return chat.get("id")
+        user = event.get("from") or event.get("user")
+        return user.get("id") if user is not None else None
+    return None
+
+
+def chat_key(update: RawOrParsedUpdate) -> Hashable:
+    """Ключ смуги: id чату (або користувача); для апдейтів без них — унікальний ключ"""
+    if isinstance(update, dict):
+        key = _chat_key_from_raw(update)
+        update_id = update.get("update_id")
+    else:
+        key = _chat_key_from_event(update.event)
+        update_id = update.update_id
+    return key if key is not None else ("update", update_id)
+
+
+class UpdateScheduler:
+    """
+    Обмежений пул воркерів над смугами чатів.
+
+    Args:
+        dispatcher: Диспетчер aiogram
+        bot: Бот, від імені якого обробляються апдейти
+        workers: Максимум апдейтів, що обробляються одночасно
+        max_pending: Максимум апдейтів, що чекають обробки (у всіх смугах разом)
+        source: Лейбл метрик (webhook / polling)
+        on_done: Викликається після обробки кожного апдейту (успішної чи ні)
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        workers: int = 32,
+        max_pending: int = 1000,
+        source: str = "updates",
+        on_done: Optional[Callable[[RawOrParsedUpdate], None]] = None,
+        **data: Any,
+    ) -> None:
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.workers = workers
+        self.max_pending = max_pending
+        self.data = data
+        self.on_done = on_done
+        self._lanes: Dict[Hashable, Deque[Tuple[float, RawOrParsedUpdate]]] = {}
+        self._ready: "asyncio.Queue[Hashable]" = asyncio.Queue()
+        self._pending = 0
+        self._inflight = 0
+        self._space = asyncio.Event()
+        self._space.set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._worker_tasks: List[asyncio.Task] = []
+        self._wait = UPDATE_QUEUE_WAIT.labels(source)
+        self.source = source
+        metrics.JOB_QUEUE_DEPTH.labels(source).set_function(lambda: self._pending)
+        UPDATE_LANES.labels(source).set_function(lambda: len(self._lanes))
+        get_overload_controller().watch_queue(source, lambda: self._pending, max_pending)
+
+    @property
+    def pending(self) -> int:
+        """Апдейти, що чекають обробки (без тих, що вже обробляються)"""
+        return self._pending
+
+    def start(self) -> None:
+        """Запускає воркерів (повторний виклик нічого не робить)"""
+        if not self._worker_tasks:
+            self._worker_tasks = [
+                metrics.track_task(self._worker(), f"{self.source}_worker") for _ in range(self.workers)
+            ]
+
+    def _enqueue(self, update: RawOrParsedUpdate) -> None:
+        key = chat_key(update)
+        item = (time.monotonic(), update)
+        lane = self._lanes.get(key)
+        if lane is None:
+            self._lanes[key] = deque((item,))
+            self._ready.put_nowait(key)
+        else:
+            # смуга вже активна: її ключ або в черзі готових, або в руках воркера
+            lane.append(item)
+        self._pending += 1
+        self._idle.clear()
+
+    def offer(self, update: RawOrParsedUpdate) -> bool:
+        """Ставить апдейт у смугу без очікування; False — якщо досягнуто max_pending"""
+        if self._pending >= self.max_pending:
+            return False
+        self._enqueue(update)
+        return True
+
+    async def put(self, update: RawOrParsedUpdate) -> None:
+        """Ставить апдейт у смугу, чекаючи вільного місця (backpressure для polling)"""
+        while self._pending >= self.max_pending:
+            self._space.clear()
+            await self._space.wait()
+        self._enqueue(update)
+
+    async def _process(self, update: RawOrParsedUpdate) -> None:
+        if isinstance(update, dict):
+            result = await self.dispatcher.feed_raw_update(bot=self.bot, update=update, **self.data)
+        else:
+            result = await self.dispatcher.feed_update(self.bot, update, **self.data)
+        if isinstance(result, TelegramMethod):
+            await self.dispatcher.silent_call_request(bot=self.bot, result=result)
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._ready.get()
+            lane = self._lanes[key]
+            enqueued_at, update = lane.popleft()
+            self._pending -= 1
+            self._inflight += 1
+            self._space.set()
+            self._wait.observe(time.monotonic() - enqueued_at)
+            try:
+                await self._process(update)
+            except Exception:
+                logger.exception("Помилка обробки апдейту в смузі %s", key)
+            finally:
+                self._inflight -= 1
+                if lane:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._lanes[key]
+                if not self._pending and not self._inflight:
+                    self._idle.set()
+            # скасований посеред обробки апдейт (зупинка) не вважається обробленим
+            if self.on_done is not None:
+                self.on_done(update)
+
+    async def join(self) -> None:
+        """Чекає, доки всі поставлені апдейти будуть оброблені"""
+        await self._idle.wait()
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Дообробляє чергу (не довше timeout) і зупиняє воркерів"""
+        if not self._worker_tasks:
+            return
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Не дооброблено %d апдейтів (%s) при зупинці", self._pending + self._inflight, self.source)
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
@@ -0,0 +1,215 @@
+"""
+Багатопроцесний webhook-сервер: WEBHOOK_PROCESSES воркерів на одному порту.
+
+Кожен воркер — окремий процес `webhook_cluster.py --worker` з власним
+event loop, ботом і диспетчером (webhook_bot.serve). Master лише:
+  - один раз реєструє webhook у Telegram (і видаляє його при зупинці);
+  - вибирає спосіб розподілу з'єднань:
+      reuseport — кожен воркер відкриває свій сокет з SO_REUSEPORT,
+                  ядро Linux балансує з'єднання між ними;
+      prefork   — master сам відкриває сокет і передає його воркерам
+                  (для систем без SO_REUSEPORT);
+  - перезапускає воркерів, що впали;
+  - на SIGTERM/SIGINT розсилає SIGTERM воркерам, чекає, доки вони
+    дообробять свої черги (WEBHOOK_DRAIN_TIMEOUT), і лише тоді виходить.
+
+Апдейти одного користувача можуть потрапити в різні процеси, тому
+налаштування, FSM і дедуплікація мають бути спільними: якщо вони лишились
+у пам'яті, master перемикає воркерів на SQLite (STATE_BACKEND, DEDUP_BACKEND).
+Метрики (/metrics) — окремі в кожному процесі.
+
+Модуль навмисно не імпортує webhook_bot: master не тримає бота в пам'яті.
+"""
+import asyncio
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from config import (
+    BOT_TOKEN, DEDUP_BACKEND, DEDUP_ENABLED, LOG_LEVEL, STATE_BACKEND, TELEGRAM_API_URL, WEBHOOK_DRAIN_TIMEOUT,
+    WEBHOOK_PATH, WEBHOOK_PROCESS_MODE, WEBHOOK_PROCESSES, WEBHOOK_URL,
+)
+from log_pipeline import setup_logging
+
+logger = logging.getLogger(__name__)
+
+_SOCKET_FD_ENV = "WEBHOOK_SOCKET_FD"
+_REUSE_PORT_ENV = "WEBHOOK_REUSE_PORT"
+_RESTART_DELAY = 1.0
+
+
+def process_count() -> int:
+    """Кількість процесів webhook-сервера (WEBHOOK_PROCESSES=0 — за кількістю CPU)"""
+    return WEBHOOK_PROCESSES if WEBHOOK_PROCESSES > 0 else (os.cpu_count() or 1)
+
+
+def resolve_mode(mode: str = WEBHOOK_PROCESS_MODE) -> str:
+    """reuseport або prefork; auto — reuseport, якщо ОС підтримує SO_REUSEPORT"""
+    if mode == "auto":
+        return "reuseport" if hasattr(socket, "SO_REUSEPORT") else "prefork"
+    if mode not in ("reuseport", "prefork"):
+        raise ValueError(f"Невідомий WEBHOOK_PROCESS_MODE: {mode}")
+    return mode
+
+
+def shared_backend_env() -> Dict[str, str]:
+    """Змінні оточення воркерів: стан, що лишився в пам'яті, переводиться на SQLite"""
+    env = {}
+    if STATE_BACKEND == "memory":
+        env["STATE_BACKEND"] = "sqlite"
+    if DEDUP_ENABLED and DEDUP_BACKEND == "memory":
+        env["DEDUP_BACKEND"] = "sqlite"
+    return env
+
+
+def _bind_socket(port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("0.0.0.0", port))
+    sock.listen(socket.SOMAXCONN)
+    sock.set_inheritable(True)
+    return sock
+
+
+async def _call_telegram(method: str) -> None:
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL) if TELEGRAM_API_URL else PRODUCTION)
+    bot = Bot(token=BOT_TOKEN, session=session)
+    try:
+        if method == "set":
+            webhook_url = f"{WEBHOOK_URL}{WEBHOOK_PATH}"
+            await bot.set_webhook(url=webhook_url)
+            logger.info("✅ Webhook встановлено: %s", webhook_url)
+        else:
+            await bot.delete_webhook()
+            logger.info("🛑 Webhook видалено")
+    finally:
+        await session.close()
+
+
+class Cluster:
+    """Master-процес: запуск, нагляд і узгоджена зупинка воркерів"""
+
+    def __init__(self, processes: int, mode: str, port: int):
+        self.processes = processes
+        self.mode = mode
+        self.port = port
+        self._sock: Optional[socket.socket] = None
+        self._workers: List[Optional[subprocess.Popen]] = [None] * processes
+        self._stopping = False
+
+    def _spawn(self, index: int) -> subprocess.Popen:
+        env = dict(os.environ, **shared_backend_env())
+        pass_fds = ()
+        if self._sock is not None:
+            env[_SOCKET_FD_ENV] = str(self._sock.fileno())
+            pass_fds = (self._sock.fileno(),)
+        else:
+            env[_REUSE_PORT_ENV] = "1"
+        proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker", str(index)], env=env, pass_fds=pass_fds,
+        )
+        logger.info("👷 Воркер %d запущено (pid %d)", index, proc.pid)
+        return proc
+
+    def _request_stop(self, signum, frame) -> None:
+        if not self._stopping:
+            logger.info("🛑 Отримано сигнал %s, зупиняємо воркерів...", signal.Signals(signum).name)
+        self._stopping = True
+
+    def _supervise(self) -> None:
+        while not self._stopping:
+            time.sleep(0.5)
+            for index, proc in enumerate(self._workers):
+                if self._stopping or proc is None or proc.poll() is None:
+                    continue
+                logger.error("💥 Воркер %d (pid %d) завершився з кодом %s, перезапуск", index, proc.pid, proc.returncode)
+                time.sleep(_RESTART_DELAY)
+                self._workers[index] = self._spawn(index)
+
+    def _stop_workers(self) -> None:
+        alive = [proc for proc in self._workers if proc is not None and proc.poll() is None]
+        for proc in alive:
+            proc.send_signal(signal.SIGTERM)
+        deadline = time.monotonic() + WEBHOOK_DRAIN_TIMEOUT + 5
+        for proc in alive:
+            try:
+                proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                logger.warning("Воркер pid %d не зупинився вчасно, завершуємо примусово", proc.pid)
+                proc.kill()
+                proc.wait()
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        if self.mode == "prefork":
+            self._sock = _bind_socket(self.port)
+        overrides = shared_backend_env()
+        if overrides:
+            logger.warning("⚠️ Кілька процесів: спільний стан через SQLite (%s)", ", ".join(overrides))
+
+        asyncio.run(_call_telegram("set"))
+        logger.info("🌐 %d воркерів на 0.0.0.0:%d (%s)", self.processes, self.port, self.mode)
+        try:
+            for index in range(self.processes):
+                self._workers[index] = self._spawn(index)
+            self._supervise()
+        finally:
+            self._stop_workers()
+            if self._sock is not None:
+                self._sock.close()
+            asyncio.run(_call_telegram("delete"))
+        return 0
+
+
+async def _serve_worker() -> None:
+    import webhook_bot
+
+    sock = None
+    if os.getenv(_SOCKET_FD_ENV):
+        sock = socket.socket(fileno=int(os.environ[_SOCKET_FD_ENV]))
+    task = asyncio.current_task()
+    loop = asyncio.get_running_loop()
+    stopping = False
+
+    def stop() -> None:
+        # Повторний сигнал (Ctrl+C приходить і master'у, і воркеру) не перериває дообробку
+        nonlocal stopping
+        if not stopping:
+            stopping = True
+            task.cancel()
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop)
+    try:
+        await webhook_bot.serve(sock=sock, reuse_port=os.getenv(_REUSE_PORT_ENV) == "1")
+    except asyncio.CancelledError:
+        pass
+
+
+def main() -> int:
+    setup_logging(LOG_LEVEL)
+    if BOT_TOKEN == "YOUR_BOT_TOKEN_HERE":
+        logger.error("❌ Встановіть BOT_TOKEN у змінних середовища або .env файлі!")
+        return 1
+    port = int(os.getenv("PORT", 8080))
+    return Cluster(process_count(), resolve_mode(), port).run()
+
+
+if __name__ == "__main__":
+    if "--worker" in sys.argv:
+        import perf_profile
+
+        perf_profile.run(_serve_worker())
+    else:
+        sys.exit(main())
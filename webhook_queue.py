@@ -0,0 +1,113 @@
+"""
+Webhook-обробник з обмеженою чергою прийому.
+
+Запит від Telegram лише перевіряється (секрет, JSON, update_id) і ставиться
+у смугу свого чату в UpdateScheduler, після чого одразу повертається 200 —
+час відповіді webhook'а не залежить від вартості хендлера. Апдейти обробляє
+фіксований пул воркерів (порядок у межах чату зберігається), тож
+паралельність обмежена, а не росте з кожним запитом, як у
+SimpleRequestHandler(handle_in_background=True).
+
+Коли черга повна — load shedding:
+  - WEBHOOK_QUEUE_OVERFLOW=reject — відповідь 503 + Retry-After; Telegram
+    доставить апдейт повторно пізніше (природний backpressure)
+  - WEBHOOK_QUEUE_OVERFLOW=drop — відповідь 200, апдейт відкидається
+    (свіжість важливіша за повноту)
+"""
+import logging
+from typing import Any, Dict, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from aiohttp import web
+
+import metrics
+from update_scheduler import UpdateScheduler
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_UPDATES = metrics.REGISTRY.counter(
+    "bot_webhook_updates_total", "Апдейти, що надійшли на webhook, за результатом прийому", ("result",),
+)
+
+_ACCEPTED = WEBHOOK_UPDATES.labels("accepted")
+_SHED = WEBHOOK_UPDATES.labels("shed")
+_INVALID = WEBHOOK_UPDATES.labels("invalid")
+
+
+class QueuedRequestHandler(SimpleRequestHandler):
+    """
+    SimpleRequestHandler з обмеженою чергою та пулом воркерів (UpdateScheduler).
+
+    Args:
+        queue_size: Максимум апдейтів, що чекають обробки
+        workers: Кількість воркерів (одночасно оброблюваних апдейтів)
+        overflow: "reject" (503) або "drop" (200 без обробки) при повній черзі
+        drain_timeout: Скільки чекати дообробки черги при зупинці (секунди)
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        queue_size: int = 1000,
+        workers: int = 32,
+        overflow: str = "reject",
+        drain_timeout: float = 10.0,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=True, **kwargs)
+        self.scheduler = UpdateScheduler(
+            dispatcher, bot, workers=workers, max_pending=queue_size, source="webhook", **self.data,
+        )
+        self.overflow = overflow
+        self.drain_timeout = drain_timeout
+        self._accepting = True
+
+    def register(self, app: web.Application, /, path: str, **kwargs: Any) -> None:
+        app.on_startup.append(self._handle_start)
+        super().register(app, path=path, **kwargs)
+
+    async def _handle_start(self, app: web.Application) -> None:
+        self._accepting = True
+        self.scheduler.start()
+
+    def _parse_update(self, body: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            update = self.bot.session.json_loads(body)
+        except ValueError:
+            return None
+        if not isinstance(update, dict) or not isinstance(update.get("update_id"), int):
+            return None
+        return update
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if not self.verify_secret(request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), self.bot):
+            return web.Response(body="Unauthorized", status=401)
+
+        update = self._parse_update(await request.read())
+        if update is None:
+            _INVALID.inc()
+            return web.Response(body="Bad Request", status=400)
+
+        if not self._accepting:
+            _SHED.inc()
+            return web.Response(status=503, headers={"Retry-After": "1"})
+
+        if not self.scheduler.offer(update):
+            _SHED.inc()
+            logger.warning("Черга webhook переповнена (%d), апдейт %s відкинуто", self.scheduler.max_pending, update["update_id"])
+            if self.overflow == "drop":
+                return web.json_response({})
+            return web.Response(status=503, headers={"Retry-After": "1"})
+
+        _ACCEPTED.inc()
+        return web.json_response({})
+
+    __call__ = handle
+
+    async def close(self) -> None:
+        """Припиняє прийом, дообробляє чергу (не довше drain_timeout) і зупиняє воркерів"""
+        self._accepting = False
+        await self.scheduler.close(self.drain_timeout)
+        await super().close()